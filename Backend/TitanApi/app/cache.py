@@ -1,5 +1,122 @@
-OPEN_CACHE = {}
+import threading
+from typing import Dict, Iterable, NamedTuple, Tuple
+
+from crud import open_class_list_crud
+from services import open_query_service, time_grid
+
+# Open classes live in an immutable snapshot that is swapped in as a whole.
+# Readers grab the current snapshot once and never see a half built list,
+# writers serialize on _WRITE_LOCK and publish a new version when done.
+
+GroupKey = Tuple[str, str]  # (term, crn)
+
+
+class OpenSnapshot(NamedTuple):
+    version: int
+    data: Tuple[dict, ...]
+    groups: Dict[GroupKey, dict]
+    # normalized course_id -> sections, in catalog order
+    by_course: Dict[str, Tuple[dict, ...]]
+    # subject -> normalized course_ids offered in that subject
+    by_subject: Dict[str, Tuple[str, ...]]
+    # column arrays /open/query filters on (see services/open_query_service.py)
+    columns: open_query_service.OpenColumns
+    # (term, crn) -> meeting slots as bits, for conflict checks (services/time_grid.py)
+    grids: Dict[GroupKey, int]
+
+
+_SNAPSHOT = OpenSnapshot(
+    version=0, data=(), groups={}, by_course={}, by_subject={},
+    columns=open_query_service.build_columns(()), grids={},
+)
+_WRITE_LOCK = threading.Lock()
+
 COURSE_CACHE = {}
 
+
+def group_key(section: dict) -> GroupKey:
+    return (str(section["term"]), str(section["crn"]))
+
+
+def normalize_course_id(course_id) -> str:
+    """'cpsc  131 ' -> 'CPSC 131'"""
+    if not course_id:
+        return ""
+    return " ".join(str(course_id).split()).upper()
+
+
+def _build_indexes(data: Tuple[dict, ...]):
+    by_course: Dict[str, list] = {}
+    for section in data:
+        cid = normalize_course_id(section.get("course_id"))
+        if cid:
+            by_course.setdefault(cid, []).append(section)
+
+    by_subject: Dict[str, list] = {}
+    for cid in by_course:
+        by_subject.setdefault(cid.split(" ", 1)[0], []).append(cid)
+
+    return (
+        {k: tuple(v) for k, v in by_course.items()},
+        {k: tuple(v) for k, v in by_subject.items()},
+    )
+
+
+def _publish(groups: Dict[GroupKey, dict]) -> OpenSnapshot:
+    global _SNAPSHOT
+    data = tuple(groups.values())
+    by_course, by_subject = _build_indexes(data)
+    _SNAPSHOT = OpenSnapshot(
+        version=_SNAPSHOT.version + 1,
+        data=data,
+        groups=groups,
+        by_course=by_course,
+        by_subject=by_subject,
+        columns=open_query_service.build_columns(data),
+        # unchanged groups (same dict as before a refresh) keep their grid
+        grids=time_grid.build_grids(groups, _SNAPSHOT.groups, _SNAPSHOT.grids),
+    )
+    return _SNAPSHOT
+
+
+def get_open_snapshot() -> OpenSnapshot:
+    """
+    Current snapshot. Never blocks; hold on to the returned object for the
+    whole request so every read sees the same version.
+    """
+    return _SNAPSHOT
+
+
 def get_open_cache():
-    return OPEN_CACHE
\ No newline at end of file
+    snapshot = _SNAPSHOT
+    return {"version": snapshot.version, "data": snapshot.data}
+
+
+def rebuild_open_cache() -> OpenSnapshot:
+    """
+    Load every open class group from the DB and publish it as a new snapshot.
+    """
+    with _WRITE_LOCK:
+        rows = open_class_list_crud.get_open_class_groups()
+        return _publish({group_key(g): g for g in rows})
+
+
+def refresh_open_cache(keys: Iterable[GroupKey]) -> OpenSnapshot:
+    """
+    Re-read only the given (term, crn) groups after an ingest.
+    Groups that came back are replaced in place (or appended if new),
+    groups that disappeared from the DB are dropped.
+    """
+    keys = {(str(term), str(crn)) for term, crn in keys}
+    if not keys:
+        return _SNAPSHOT
+
+    with _WRITE_LOCK:
+        fresh = {group_key(g): g for g in open_class_list_crud.get_open_class_groups(keys)}
+
+        groups = dict(_SNAPSHOT.groups)
+        for key in keys:
+            if key not in fresh:
+                groups.pop(key, None)
+        groups.update(fresh)
+        return _publish(groups)
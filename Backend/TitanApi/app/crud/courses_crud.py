@@ -7,7 +7,7 @@ import sqlite3
 
 
 def get_courses(value: str | None = None):
-    with get_conn() as c:
+    with get_conn(readonly=True) as c:
         row = c.execute("SELECT * FROM course WHERE course_id=?", (value,)).fetchone()
         return dict(row) if row else None
 
@@ -18,7 +18,7 @@ def delete_courses(value: str | None = None):
         return row.rowcount > 0
 
 def get_all_courses():
-    with get_conn() as c:
+    with get_conn(readonly=True) as c:
         table = c.execute("SELECT * FROM course")
         rows = table.fetchall()
 
@@ -0,0 +1,67 @@
+import json
+import time
+from db import get_conn, ROOT
+
+# ingest_job rows (see TitanSchedulerDatabase/ingest_jobs.sql)
+
+JOBS_SQL = ROOT / "TitanSchedulerDatabase" / "ingest_jobs.sql"
+JSON_COLUMNS = ("errors", "result")
+RECENT_JOBS = 20
+
+
+def ensure_ingest_jobs():
+    """
+    Create the table if needed. Jobs still marked running belonged to a
+    process that is gone, so they are closed out as errors.
+    """
+    with get_conn() as c:
+        c.executescript(JOBS_SQL.read_text())
+        c.execute(
+            "UPDATE ingest_job SET state = 'error', finished_at = ?, "
+            "errors = ? WHERE state = 'running'",
+            (time.time(), json.dumps(["Interrupted by a server restart"])),
+        )
+
+
+def _to_dict(row) -> dict:
+    job = dict(row)
+    for col in JSON_COLUMNS:
+        if job.get(col) is not None:
+            job[col] = json.loads(job[col])
+    return job
+
+
+def create_job(job: dict):
+    """Insert a job as it starts running."""
+    with get_conn() as c:
+        c.execute(
+            "INSERT INTO ingest_job(job_id, kind, filename, state, stage, total_bytes, created_at, started_at) "
+            "VALUES (?, ?, ?, 'running', ?, ?, ?, ?)",
+            (job["job_id"], job["kind"], job["filename"], job["stage"],
+             job["total_bytes"], job["created_at"], job["started_at"]),
+        )
+
+
+def update_job(job_id: str, **fields) -> bool:
+    """Set the given columns; errors/result are stored as JSON."""
+    if not fields:
+        return False
+    values = [json.dumps(v) if k in JSON_COLUMNS and v is not None else v for k, v in fields.items()]
+    assignments = ", ".join(f"{k} = ?" for k in fields)
+    with get_conn() as c:
+        cur = c.execute(f"UPDATE ingest_job SET {assignments} WHERE job_id = ?", (*values, job_id))
+        return cur.rowcount > 0
+
+
+def get_job(job_id: str):
+    with get_conn(readonly=True) as c:
+        row = c.execute("SELECT * FROM ingest_job WHERE job_id = ?", (job_id,)).fetchone()
+        return _to_dict(row) if row else None
+
+
+def get_recent_jobs(limit: int = RECENT_JOBS):
+    with get_conn(readonly=True) as c:
+        rows = c.execute(
+            "SELECT * FROM ingest_job ORDER BY created_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [_to_dict(row) for row in rows]
@@ -7,13 +7,13 @@ import sqlite3
 
 
 def get_meetings(value: str | None = None):
-    with get_conn() as c:
+    with get_conn(readonly=True) as c:
         row = c.execute("SELECT * FROM meeting WHERE crn=?", (value,)).fetchall()
         return [dict(r) for r in row] if row else []
     
 
 def get_all_meetings():
-    with get_conn() as c:
+    with get_conn(readonly=True) as c:
         table = c.execute("SELECT * FROM meeting")
         rows = table.fetchall()
 
@@ -1,23 +1,23 @@
 from db import get_conn
-import pandas as pd
-import numpy as np
+from crud import open_classes_mat_crud
 import sqlite3
 
-def convert_days_of_week(df: list[dict]):
-    days = {
-        1: "Mon",
-        2: "Tue",
-        3: "Wed",
-        4: "Thur",
-        5: "Fri",
-        6: "Sat",
-        7: "Sun",
-        -1: "TBA"  
-    }
+DAY_LABELS = {
+    1: "Mon",
+    2: "Tue",
+    3: "Wed",
+    4: "Thur",
+    5: "Fri",
+    6: "Sat",
+    7: "Sun",
+    -1: "TBA"
+}
+DAY_NUMS = {label: num for num, label in DAY_LABELS.items()}
 
+def convert_days_of_week(df: list[dict]):
     for row in df:
         value = row["day_of_week"]
-        row["day_of_week"] = days.get(value, None)
+        row["day_of_week"] = DAY_LABELS.get(value, None)
 
     return df
 
@@ -33,81 +33,134 @@ def min_to_hour(df: list[dict]):
     for row in df:
         row["start_min"] = min_to_hour_help(row["start_min"])
         row["end_min"] = min_to_hour_help(row["end_min"])
-    
+
     return df
 
-def group_meetings(df: list[dict]):
-    df = pd.DataFrame(df)
-
-    # FAST vectorized tuple creation
-    df["meeting"] = list(zip(
-        df["day_of_week"].to_numpy(),
-        df["start_min"].to_numpy(),
-        df["end_min"].to_numpy(),
-        df["room"].to_numpy()
-    ))
-
-    # Group by schedule key
-    grouped = (
-        df.groupby(
-            ["term", "crn", "course_id", "title", "units", "section", "professor", "status"],
-            sort=False,
-            as_index=False
-        ).agg(meetings=("meeting", list))
-    )
-
-    result = []
-    append = result.append
-
-    for row in grouped.itertuples(index=False):
-        # Convert meeting tuples → dicts
-        meeting_list = [
-            {
-                "day": int(d) if isinstance(d, (np.integer,)) else d,
-                "start": int(s) if isinstance(s, (np.integer,)) else s,
-                "end": int(e) if isinstance(e, (np.integer,)) else e,
-                "room": r
+
+# Column order stream_groups unpacks; keep both in sync
+GROUP_COLUMNS = """
+    term, crn, course_id, subject, number, title, units, prereq, coreq,
+    section, professor, status, day_of_week, start_min, end_min, room
+"""
+GROUP_ORDER = "ORDER BY term, crn, day_of_week"
+
+def add_meeting_facts(facts: dict, day, start, end, room):
+    """
+    Fold one meeting into the section level facts, same rules as
+    section_facts in open_classes_mat.sql: day_mask bit 0 = Monday,
+    first_start/last_end over scheduled days, modality flags from the room.
+    """
+    room_uc = (room or "").upper()
+    if 1 <= (day or 0) <= 7:
+        facts["day_mask"] |= 1 << (day - 1)
+        if facts["first_start"] is None or start < facts["first_start"]:
+            facts["first_start"] = start
+        if facts["last_end"] is None or end > facts["last_end"]:
+            facts["last_end"] = end
+    elif day == -1:
+        facts["is_tba"] = True
+    if "ONLINE" in room_uc:
+        facts["is_online"] = True
+    elif room_uc.strip(" ") not in ("", "TBA"):
+        facts["is_in_person"] = True
+
+
+def meeting_facts(meetings) -> dict:
+    """
+    Section level facts of a group's meetings (as stream_groups builds
+    them). Kept out of the group dicts, which are served as they are;
+    build_columns in services/open_query_service.py holds them per version.
+    """
+    facts = {"day_mask": 0, "first_start": None, "last_end": None,
+             "is_online": False, "is_in_person": False, "is_tba": False}
+    for m in meetings:
+        add_meeting_facts(facts, DAY_NUMS.get(m["day"]), m["start"], m["end"], m["room"])
+    return facts
+
+
+def stream_groups(rows):
+    """
+    Single pass grouper. rows must come ordered by (term, crn) so every
+    section's meetings are adjacent; a group is emitted as soon as the key changes.
+    """
+    key = None
+    group = None
+    days = DAY_LABELS
+
+    for (term, crn, course_id, subject, number, title, units, prereq, coreq,
+         section, professor, status, day, start, end, room) in rows:
+        if (term, crn) != key:
+            if group is not None:
+                yield group
+            key = (term, crn)
+            group = {
+                "term": term,
+                "crn": crn,
+                "course_id": course_id,
+                "subject": subject,
+                "number": number,
+                "title": title,
+                "units": units,
+                "prereq": prereq,
+                "coreq": coreq,
+                "section": section,
+                "professor": professor,
+                "status": status,
+                "meetings": [],
             }
-            for (d, s, e, r) in row.meetings
-        ]
-
-        append({
-            "term": row.term,
-            "crn": int(row.crn) if isinstance(row.crn, (np.integer,)) else row.crn,
-            "course_id": row.course_id,
-            "title" : row.title,
-            "units" : row.units,
-            "section": row.section,
-            "professor": row.professor,
-            "status": row.status,
-            "meetings": meeting_list
-        })
-
-    return result
-
-    # grouped = (
-    #     df.groupby(["term","crn","course_id","section","professor","status","room"])
-    #     .apply(lambda g:
-    #         g.drop(columns=["term","crn","course_id","section","professor","status","room"])
-    #         [["day_of_week","start_min","end_min"]]
-    #         .rename(columns={"day_of_week":"day","start_min":"start","end_min":"end"})
-    #         .to_dict(orient="records")
-    #     )
-    #     .reset_index(name="meetings")
-    # )
-
-    # records = grouped.to_dict(orient="records")
-    # return records
+        group["meetings"].append({"day": days.get(day), "start": start, "end": end, "room": room})
+
+    if group is not None:
+        yield group
+
+
+# SQLite caps bound parameters per statement, so key lookups go in chunks
+KEY_CHUNK = 500
 
-def get_open_class_list():
-    with get_conn() as c:
-        rows = c.execute("SELECT * FROM open_classes").fetchall()
-        if not rows:
-            return{"data": [], "message": "No open classes found."}
 
-        rows = [dict(row) for row in rows]
-        rows = convert_days_of_week(rows)
+def _plain_cursor(c):
+    # plain tuples are enough here and skip building sqlite3.Row objects
+    cur = c.cursor()
+    cur.row_factory = None
+    return cur
 
-        rows = group_meetings(rows)
 
-        return rows
+def _group_cursors(c, keys):
+    src = open_classes_mat_crud.source()
+    if keys is None:
+        yield _plain_cursor(c).execute(f"SELECT {GROUP_COLUMNS} FROM {src} {GROUP_ORDER}")
+        return
+
+    crns_by_term: dict[str, list[str]] = {}
+    for term, crn in keys:
+        crns_by_term.setdefault(term, []).append(crn)
+
+    for term, crns in crns_by_term.items():
+        crns.sort()
+        for i in range(0, len(crns), KEY_CHUNK):
+            chunk = crns[i:i + KEY_CHUNK]
+            ph = ",".join("?" for _ in chunk)
+            yield _plain_cursor(c).execute(
+                f"SELECT {GROUP_COLUMNS} FROM {src} WHERE term = ? AND crn IN ({ph}) {GROUP_ORDER}",
+                (term, *chunk),
+            )
+
+
+def get_open_class_groups(keys=None):
+    """
+    Grouped open classes, one dict per (term, crn).
+    keys: optional iterable of (term, crn) pairs to limit the lookup.
+    Always returns a list (empty if nothing matched).
+    """
+    with get_conn(readonly=True) as c:
+        result = []
+        for cur in _group_cursors(c, keys):
+            result.extend(stream_groups(cur))
+        return result
+
+
+def get_open_class_list():
+    rows = get_open_class_groups()
+    if not rows:
+        return{"data": [], "message": "No open classes found."}
+    return rows
@@ -0,0 +1,205 @@
+from typing import Any, Dict, List, Tuple
+from db import get_conn
+from crud import open_classes_mat_crud
+from schemas import OpenQueryFilters
+
+# Query planner for /open/query.
+# One statement: a CTE picks the qualifying (term, crn) keys, then joins back
+# for every meeting of those keys. With the materialized tables the keys come
+# from section_facts (integer bit tests, one row per section); otherwise the
+# meeting rows are aggregated per key.
+
+RESULT_COLUMNS = [
+    "term", "crn", "course_id", "subject", "number", "units", "prereq", "coreq",
+    "section", "professor", "status", "day_of_week", "start_min", "end_min", "room",
+]
+
+
+def day_mask(days: List[int]) -> int:
+    """[1, 3] -> 0b101 (bit 0 = Monday)"""
+    mask = 0
+    for d in days:
+        if 1 <= d <= 7:
+            mask |= 1 << (d - 1)
+    return mask
+
+
+def time_condition(time_start, time_end) -> Tuple[str, List[Any]]:
+    """Per-meeting time check, or ("", []) when there is no time filter."""
+    if time_start is not None and time_end is not None:
+        return "(end_min > ? AND start_min < ?)", [time_start, time_end]
+    if time_start is not None:
+        return "(start_min >= ?)", [time_start]
+    if time_end is not None:
+        return "(end_min <= ?)", [time_end]
+    return "", []
+
+
+def _section_where(f: OpenQueryFilters, col: dict, alias: str = "") -> Tuple[List[str], List[Any]]:
+    """Filters that are the same on every meeting of a section."""
+    where: List[str] = []
+    params: List[Any] = []
+
+    if f.term:
+        where.append(f"{alias}{col['term_uc']} = ?")
+        params.append(f.term.strip().upper())
+    if f.subject:
+        where.append(f"{alias}{col['subject_uc']} = ?")
+        params.append(f.subject.strip().upper())
+    if f.course:
+        # substring match like the old LIKE '%course%', but on the upper-cased column
+        where.append(f"instr({alias}{col['course_id_uc']}, ?) > 0")
+        params.append(f.course.strip().upper())
+    if f.crn:
+        where.append(f"{alias}crn = ?")
+        params.append(str(f.crn))
+    if f.only_open:
+        where.append(f"{alias}{col['is_open']} = 1")
+    return where, params
+
+
+def _build_from_facts(f: OpenQueryFilters) -> Tuple[str, List[Any]]:
+    table = open_classes_mat_crud.TABLE
+    where, params = _section_where(f, open_classes_mat_crud.MAT_COLUMNS, alias="f.")
+
+    if f.modality in ("online", "hybrid"):
+        where.append("f.is_online = 1")
+    if f.modality in ("inperson", "hybrid"):
+        where.append("f.is_in_person = 1")
+
+    mask = day_mask(f.days)
+    if mask and f.days_mode == "all":
+        where.append("(f.day_mask & ?) = ?")
+        params.extend([mask, mask])
+    elif mask:
+        where.append("(f.day_mask & ?) <> 0")
+        params.append(mask)
+
+    # The time window is checked per meeting: join the section's own rows
+    # (primary key lookup) instead of a correlated EXISTS.
+    join_sql = ""
+    join_params: List[Any] = []
+    time_sql, time_params = time_condition(f.time_start, f.time_end)
+    if time_sql:
+        time_sql = time_sql.replace("start_min", "t.start_min").replace("end_min", "t.end_min")
+        join_sql = f"JOIN {table} AS t ON t.term_id = f.term_id AND t.crn = f.crn AND {time_sql}"
+        join_params.extend(time_params)
+        if mask and f.days_mode != "all":
+            # in "any" mode the same meeting must be on a requested day
+            join_sql += " AND (t.day_bit & ?) <> 0"
+            join_params.append(mask)
+
+    where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+    select_cols = ", ".join(f"o.{c}" for c in RESULT_COLUMNS)
+
+    sql = f"""
+    WITH keys AS (
+        SELECT DISTINCT f.term_id, f.crn
+        FROM section_facts AS f
+        {join_sql}
+        {where_sql}
+    )
+    SELECT {select_cols}
+    FROM keys
+    JOIN {table} AS o ON o.term_id = keys.term_id AND o.crn = keys.crn
+    ORDER BY o.term, o.course_id, o.crn, o.day_of_week;
+    """
+    return sql, join_params + params
+
+
+def _build_from_rows(f: OpenQueryFilters) -> Tuple[str, List[Any]]:
+    src = open_classes_mat_crud.source()
+    col = open_classes_mat_crud.columns()
+
+    # Section level filters: same on every meeting row, so they go in WHERE
+    where, params = _section_where(f, col)
+
+    # Meeting level filters: aggregated per (term, crn) in HAVING
+    having: List[str] = []
+    having_params: List[Any] = []
+
+    if f.modality in ("online", "hybrid"):
+        having.append(f"MAX({col['is_online']}) = 1")
+    if f.modality in ("inperson", "hybrid"):
+        having.append(f"MAX({col['is_in_person']}) = 1")
+
+    time_sql, time_params = time_condition(f.time_start, f.time_end)
+    mask = day_mask(f.days)
+
+    if mask and f.days_mode == "all":
+        # every requested day present (day_bit is unique per section/day)
+        having.append(f"(SUM(DISTINCT {col['day_bit']}) & ?) = ?")
+        having_params.extend([mask, mask])
+        if time_sql:
+            having.append(f"MAX({time_sql}) = 1")
+            having_params.extend(time_params)
+    elif mask:
+        # one meeting on a requested day that also satisfies the time window
+        cond = f"({col['day_bit']} & ?) <> 0"
+        cond_params: List[Any] = [mask]
+        if time_sql:
+            cond += f" AND {time_sql}"
+            cond_params.extend(time_params)
+        having.append(f"MAX({cond}) = 1")
+        having_params.extend(cond_params)
+    elif time_sql:
+        having.append(f"MAX({time_sql}) = 1")
+        having_params.extend(time_params)
+
+    where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+    having_sql = ("HAVING " + " AND ".join(having)) if having else ""
+    select_cols = ", ".join(f"o.{c}" for c in RESULT_COLUMNS)
+
+    sql = f"""
+    WITH keys AS (
+        SELECT term, crn
+        FROM {src}
+        {where_sql}
+        GROUP BY term, crn
+        {having_sql}
+    )
+    SELECT {select_cols}
+    FROM keys
+    JOIN {src} AS o ON o.term = keys.term AND o.crn = keys.crn
+    ORDER BY o.term, o.course_id, o.crn, o.day_of_week;
+    """
+    return sql, params + having_params
+
+
+def build_open_query(f: OpenQueryFilters) -> Tuple[str, List[Any]]:
+    if open_classes_mat_crud.has_facts():
+        return _build_from_facts(f)
+    return _build_from_rows(f)
+
+
+def run_open_query(f: OpenQueryFilters) -> List[dict]:
+    """Flat meeting rows (one dict per meeting) for the sections that match."""
+    sql, params = build_open_query(f)
+    with get_conn(readonly=True) as c:
+        cur = c.cursor()
+        cur.row_factory = None
+        cur.execute(sql, params)
+        return [dict(zip(RESULT_COLUMNS, row)) for row in cur]
+
+
+def run_open_query_batch(f: OpenQueryFilters, courses: Dict[str, Tuple[str, str]]) -> Dict[str, List[dict]]:
+    """
+    run_open_query for each key -> (subject, course) with the rest of f
+    shared; every lookup goes through one connection.
+    """
+    results: Dict[str, List[dict]] = {}
+    with get_conn(readonly=True) as c:
+        cur = c.cursor()
+        cur.row_factory = None
+        for key, (subject, course) in courses.items():
+            sql, params = build_open_query(f.model_copy(update={"subject": subject, "course": course}))
+            cur.execute(sql, params)
+            results[key] = [dict(zip(RESULT_COLUMNS, row)) for row in cur]
+    return results
+
+
+def explain_open_query(f: OpenQueryFilters) -> List[str]:
+    """EXPLAIN QUERY PLAN detail lines, used by the plan regression check."""
+    sql, params = build_open_query(f)
+    with get_conn(readonly=True) as c:
+        return [row[3] for row in c.execute("EXPLAIN QUERY PLAN " + sql, params)]
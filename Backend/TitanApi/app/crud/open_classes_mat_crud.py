@@ -0,0 +1,85 @@
+import os
+from db import get_conn, ROOT
+
+# Materialized copy of the open_classes view (see TitanSchedulerDatabase/open_classes_mat.sql).
+# Triggers keep it in sync with section/meeting/course/term; readers call source()
+# to get whichever relation is ready. Set TITAN_OPEN_CLASSES_MAT=0 to stay on the view.
+
+MAT_SQL = ROOT / "TitanSchedulerDatabase" / "open_classes_mat.sql"
+ENABLED = os.getenv("TITAN_OPEN_CLASSES_MAT", "1") != "0"
+
+VIEW = "open_classes"
+TABLE = "open_classes_mat"
+
+_READY = False
+
+REBUILD_QUERY = f"INSERT INTO {TABLE} SELECT * FROM open_classes_src"
+
+# Precomputed columns the query layer filters on. On the view they are
+# computed per row instead, which is correct but cannot use an index.
+MAT_COLUMNS = {
+    "term_uc": "term_uc",
+    "subject_uc": "subject_uc",
+    "course_id_uc": "course_id_uc",
+    "is_open": "is_open",
+    "day_bit": "day_bit",
+    "is_online": "is_online",
+    "is_in_person": "is_in_person",
+}
+VIEW_COLUMNS = {
+    "term_uc": "UPPER(term)",
+    "subject_uc": "UPPER(subject)",
+    "course_id_uc": "UPPER(course_id)",
+    "is_open": "(UPPER(IFNULL(status, '')) LIKE 'OPEN%')",
+    "day_bit": "(CASE WHEN day_of_week BETWEEN 1 AND 7 THEN 1 << (day_of_week - 1) ELSE 0 END)",
+    "is_online": "(UPPER(IFNULL(room, '')) LIKE '%ONLINE%')",
+    "is_in_person": "(TRIM(IFNULL(room, '')) <> '' AND UPPER(IFNULL(room, '')) NOT LIKE '%ONLINE%' AND UPPER(TRIM(IFNULL(room, ''))) <> 'TBA')",
+}
+
+
+def source() -> str:
+    """Relation open class reads should use: the table once it is built, else the view."""
+    return TABLE if _READY else VIEW
+
+
+def has_facts() -> bool:
+    """section_facts (one row per section) is built alongside the table."""
+    return _READY
+
+
+def columns() -> dict:
+    """SQL expressions for the normalized columns of source()."""
+    return MAT_COLUMNS if _READY else VIEW_COLUMNS
+
+
+def rebuild_open_classes_mat() -> int:
+    """
+    Refill the table (and, through its triggers, section_facts) from the
+    base tables in one transaction. Returns the meeting row count.
+    """
+    with get_conn() as c:
+        c.execute(f"DELETE FROM {TABLE}")
+        c.execute(REBUILD_QUERY)
+        # fresh stats so the planner picks the most selective index
+        c.execute(f"ANALYZE {TABLE}")
+        c.execute("ANALYZE section_facts")
+        return c.execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()[0]
+
+
+def ensure_open_classes_mat() -> bool:
+    """
+    (Re)create the table, indexes and triggers, then fill it so it also
+    covers writes made while the triggers were not installed.
+    """
+    global _READY
+    if not ENABLED:
+        _READY = False
+        return False
+
+    with get_conn() as c:
+        c.executescript(MAT_SQL.read_text())
+    rows = rebuild_open_classes_mat()
+
+    _READY = True
+    print(f"Materialized {rows} rows into {TABLE}.")
+    return True
@@ -0,0 +1,13 @@
+from db import get_conn, ROOT
+
+# section_digest table and its invalidation triggers
+# (see TitanSchedulerDatabase/section_digest.sql)
+
+DIGEST_SQL = ROOT / "TitanSchedulerDatabase" / "section_digest.sql"
+
+
+def ensure_section_digest():
+    """Create the table if needed and (re)install the triggers. Stored digests are kept."""
+    with get_conn() as c:
+        c.executescript(DIGEST_SQL.read_text())
+
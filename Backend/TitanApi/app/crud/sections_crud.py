@@ -7,13 +7,13 @@ import sqlite3
 
 
 def get_sections(value: str | None = None):
-    with get_conn() as c:
+    with get_conn(readonly=True) as c:
         row = c.execute("SELECT * FROM section WHERE crn=?", (value,)).fetchone()
         return dict(row) if row else None
     
 
 def get_all_sections():
-    with get_conn() as c:
+    with get_conn(readonly=True) as c:
         table = c.execute("SELECT * FROM section")
         rows = table.fetchall()
 
@@ -0,0 +1,70 @@
+import json
+import os
+import time
+from pathlib import Path
+
+import db
+from db import ROOT
+
+# tda_cache rows (see TitanSchedulerDatabase/tda_cache.sql), in their own
+# database file with a small pool of its own
+
+CACHE_SQL = ROOT / "TitanSchedulerDatabase" / "tda_cache.sql"
+CACHE_PATH = Path(os.getenv("TITAN_TDA_CACHE_PATH", ROOT / "TitanSchedulerDatabase" / "tda_cache.db"))
+
+_POOL = db.ConnectionPool(readonly=False, size=2, path=CACHE_PATH)
+
+
+def ensure_tda_cache():
+    with db.pooled_conn(_POOL) as c:
+        c.executescript(CACHE_SQL.read_text())
+
+
+def get_entry(pdf_sha256: str, version: str, fresh_after: float):
+    """The cached result, or None. A hit moves the entry to the back of the LRU order."""
+    with db.pooled_conn(_POOL) as c:
+        row = c.execute(
+            "UPDATE tda_cache SET last_used_at = ?, hits = hits + 1 "
+            "WHERE pdf_sha256 = ? AND version = ? AND created_at > ? RETURNING result",
+            (time.time(), pdf_sha256, version, fresh_after),
+        ).fetchone()
+        return json.loads(row["result"]) if row else None
+
+
+def put_entry(pdf_sha256: str, version: str, result: dict, fresh_after: float, max_entries: int) -> int:
+    """Store a result, then drop expired entries and the least recently used beyond max_entries. Returns how many were dropped."""
+    blob = json.dumps(result)
+    now = time.time()
+    with db.pooled_conn(_POOL) as c:
+        c.execute(
+            "INSERT OR REPLACE INTO tda_cache(pdf_sha256, version, result, size_bytes, created_at, last_used_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (pdf_sha256, version, blob, len(blob), now, now),
+        )
+        dropped = c.execute("DELETE FROM tda_cache WHERE created_at <= ?", (fresh_after,)).rowcount
+        dropped += c.execute(
+            "DELETE FROM tda_cache WHERE rowid IN ("
+            "  SELECT rowid FROM tda_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+            (max_entries,),
+        ).rowcount
+        return dropped
+
+
+def delete_entries(keep_version=None) -> int:
+    """Delete every entry, or every entry of another version than keep_version."""
+    with db.pooled_conn(_POOL) as c:
+        if keep_version is None:
+            return c.execute("DELETE FROM tda_cache").rowcount
+        return c.execute("DELETE FROM tda_cache WHERE version != ?", (keep_version,)).rowcount
+
+
+def get_totals() -> dict:
+    with db.pooled_conn(_POOL) as c:
+        row = c.execute(
+            "SELECT COUNT(*) AS entries, COALESCE(SUM(size_bytes), 0) AS size_bytes FROM tda_cache"
+        ).fetchone()
+        return dict(row)
+
+
+def close_pool():
+    _POOL.close_all()
@@ -2,7 +2,7 @@ from db import get_conn
 import sqlite3
 
 def get_terms(value : str):
-    with get_conn() as c:
+    with get_conn(readonly=True) as c:
         if isinstance(value, str):
             row = c.execute("SELECT * FROM term WHERE term=?" , (value,)).fetchone()
         else:
@@ -28,7 +28,7 @@ def create_terms(value: str):
         return dict(row) 
     
 def get_all_terms():
-    with get_conn() as c:
+    with get_conn(readonly=True) as c:
         table = c.execute("SELECT * FROM term")
         rows = table.fetchall()
 
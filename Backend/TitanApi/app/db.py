@@ -1,22 +1,162 @@
+import queue
 import sqlite3
+import threading
 from contextlib import contextmanager
 from pathlib import Path
 
 HERE = Path(__file__).resolve()
 ROOT = HERE.parents[2]
-DB_PATH = ROOT / "TitanSchedulerDatabase" / "openclasslist.db" 
+DB_PATH = ROOT / "TitanSchedulerDatabase" / "openclasslist.db"
+
+# Pool sizing. SQLite only ever has one writer, so the write pool stays small;
+# WAL lets the read pool run alongside it.
+WRITE_POOL_SIZE = 4
+READ_POOL_SIZE = 8
+POOL_TIMEOUT = 30        # seconds to wait for a free connection
+BUSY_TIMEOUT_MS = 5000
+
+CACHE_SIZE_KIB = 16 * 1024           # page cache per connection
+MMAP_SIZE = 64 * 1024 * 1024         # bytes
+
+
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections.
+    Connections are created lazily up to `size`; once they are all checked out
+    callers wait for one to come back (counted in `waits`).
+    `path` defaults to DB_PATH (read when a connection opens).
+    """
+
+    def __init__(self, readonly: bool, size: int, path=None):
+        self.readonly = readonly
+        self.size = size
+        self.path = path
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self.open = 0
+        self.in_use = 0
+        self.checkouts = 0
+        self.waits = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        path = self.path or DB_PATH
+        if self.readonly:
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            conn.execute("PRAGMA query_only = ON;")
+        else:
+            conn = sqlite3.connect(path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL;")
+            conn.execute("PRAGMA synchronous = NORMAL;")
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS};")
+        conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB};")
+        conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE};")
+        conn.execute("PRAGMA foreign_keys = ON;")
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        with self._lock:
+            self.checkouts += 1
+            create = self._idle.empty() and self.open < self.size
+            if create:
+                self.open += 1
+            elif self._idle.empty():
+                self.waits += 1
+
+        if create:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._lock:
+                    self.open -= 1
+                raise
+        else:
+            try:
+                conn = self._idle.get(timeout=POOL_TIMEOUT)
+            except queue.Empty:
+                raise RuntimeError(
+                    f"No database connection available after {POOL_TIMEOUT}s "
+                    f"({'read' if self.readonly else 'write'} pool size {self.size})"
+                )
+
+        conn.row_factory = sqlite3.Row
+        with self._lock:
+            self.in_use += 1
+        return conn
+
+    def release(self, conn: sqlite3.Connection):
+        with self._lock:
+            self.in_use -= 1
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            # Broken connection: drop it, the next acquire opens a fresh one
+            self._discard(conn)
+            return
+        self._idle.put(conn)
+
+    def _discard(self, conn: sqlite3.Connection):
+        with self._lock:
+            self.open -= 1
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def close_all(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(conn)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": self.size,
+                "open": self.open,
+                "in_use": self.in_use,
+                "idle": self._idle.qsize(),
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+            }
+
+
+_WRITE_POOL = ConnectionPool(readonly=False, size=WRITE_POOL_SIZE)
+_READ_POOL = ConnectionPool(readonly=True, size=READ_POOL_SIZE)
+
 
 @contextmanager
-def get_conn():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON;")
+def pooled_conn(pool: ConnectionPool):
+    """get_conn for a pool of your own (e.g. another database file)."""
+    conn = pool.acquire()
     try:
         yield conn
-        conn.commit()
+        if not pool.readonly:
+            conn.commit()
     except Exception:
         conn.rollback()
         raise
     finally:
-        conn.close()
-    
\ No newline at end of file
+        pool.release(conn)
+
+
+@contextmanager
+def get_conn(readonly: bool = False):
+    """
+    Borrow a pooled connection. Commits on success, rolls back on error.
+    readonly=True hands out a query_only connection from the read pool (GET paths).
+    """
+    with pooled_conn(_READ_POOL if readonly else _WRITE_POOL) as conn:
+        yield conn
+
+
+def pool_stats() -> dict:
+    return {"write": _WRITE_POOL.stats(), "read": _READ_POOL.stats()}
+
+
+def close_pools():
+    _WRITE_POOL.close_all()
+    _READ_POOL.close_all()
+
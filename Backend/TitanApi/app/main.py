@@ -1,9 +1,13 @@
 import sqlite3
 from fastapi import FastAPI, APIRouter, HTTPException
-from routers import terms_router, courses_router, sections_router, meetings_router, csv_upload_router, scheduler_router, professor_router
+from routers import terms_router, courses_router, sections_router, meetings_router, csv_upload_router, scheduler_router, professor_router, ingest_router
 from fastapi.middleware.cors import CORSMiddleware
-from crud import open_class_list_crud, courses_crud
+from fastapi.responses import JSONResponse
+from crud import courses_crud, open_classes_mat_crud, ingest_jobs_crud, section_digest_crud
+from services import csv_stream, executors, ingest_jobs_service, tda_cache_service
+from parser import PDF_parser
 import cache
+import db
 
 
 app = FastAPI()
@@ -13,20 +17,29 @@ app = FastAPI()
 def load_open_cache():
     """
     Runs when FastAPI starts.
-    Loads the open classes *once* into memory for instant response.
+    Builds the first open class snapshot; uploads refresh it incrementally after that.
     """
-    # global OPEN_CACHE
+    open_classes_mat_crud.ensure_open_classes_mat()
+    ingest_jobs_crud.ensure_ingest_jobs()
+    section_digest_crud.ensure_section_digest()
+    tda_cache_service.ensure(PDF_parser.PARSER_VERSION)
+
     print("Loading open class list into memory...")
-    cache.OPEN_CACHE.clear()
-    cache.OPEN_CACHE.update({
-        "data" : open_class_list_crud.get_open_class_list()
-    })
+    snapshot = cache.rebuild_open_cache()
     cache.COURSE_CACHE.clear()
     cache.COURSE_CACHE.update({"data" : courses_crud.get_all_courses()})
 
-    print(f"Loaded {len(cache.OPEN_CACHE)} open class rows into memory.")
-    print(f"Loaded {len(cache.COURSE_CACHE)} course rows into memory.")
+    print(f"Loaded {len(snapshot.data)} open class sections into memory (v{snapshot.version}).")
+    print(f"Loaded {len(cache.COURSE_CACHE['data'])} course rows into memory.")
+
 
+@app.on_event("shutdown")
+def close_db_pools():
+    # the running ingest job commits first, queued ones are dropped
+    ingest_jobs_service.shutdown()
+    executors.shutdown()
+    tda_cache_service.close()
+    db.close_pools()
 
 
 app.include_router(terms_router.router)
@@ -36,6 +49,7 @@ app.include_router(meetings_router.router)
 app.include_router(csv_upload_router.router)
 app.include_router(scheduler_router.router)
 app.include_router(professor_router.router)
+app.include_router(ingest_router.router)
 
 
 
@@ -48,5 +62,34 @@ app.add_middleware(
 
 @app.get('/')
 def root():
-    print("Main sees:", len(cache.OPEN_CACHE))
-    return {"message" : "hello wRodl!"}
\ No newline at end of file
+    print("Main sees:", len(cache.get_open_snapshot().data))
+    return {"message" : "hello wRodl!"}
+
+@app.get('/metrics/db')
+def db_metrics():
+    return db.pool_stats()
+
+@app.get('/metrics/uploads')
+def upload_metrics():
+    # progress counters of CSV uploads in flight, plus the last few finished ones
+    return csv_stream.progress_snapshot()
+
+@app.get('/metrics/executors')
+def executor_metrics():
+    # running/waiting calls per lane and pending CPU batches (services/executors.py)
+    return executors.stats()
+
+@app.get('/metrics/tda_cache')
+def tda_cache_metrics():
+    # hits/misses/evictions of parsed TDAs (services/tda_cache_service.py)
+    return tda_cache_service.stats()
+
+@app.get('/metrics/tda_backend')
+def tda_backend_metrics():
+    # calls/retries/in-flight of the TDA parser backend (parser/tda_backends.py)
+    return PDF_parser.BACKEND.stats()
+
+
+@app.exception_handler(executors.LaneFull)
+def lane_full(request, exc: executors.LaneFull):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
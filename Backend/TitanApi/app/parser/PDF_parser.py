@@ -1,37 +1,19 @@
 from dotenv import load_dotenv
 import os
-from openai import OpenAI
-import json
 import pandas as pd
 import requests
-from parser import match_open_classes
+from parser import match_open_classes, tda_backends, tda_local
 from pypdf import PdfReader
 import time
-from pathlib import Path
 import cache
+from services import tda_cache_service
 
+# OPENAI_API_KEY is read when the first audit needs OpenAI (parser/tda_backends.py)
 load_dotenv()
-api_key = os.getenv("OPENAI_API_KEY")
 
-if not api_key:
-    raise RuntimeError("OPENAI_API_KEY not found in .env")
+MODEL = "gpt-4.1-mini"
 
-client = OpenAI(api_key=api_key)
-
-
-def parse_tda(file_bytes: bytes, filename: str):
-  try: 
-
-    start = time.time()
-
-    uploaded_file = client.files.create(
-      file=(filename, file_bytes),
-      purpose="assistants"
-    )
-
-    file_id = uploaded_file.id    
-
-    prompt_text = """
+PROMPT_TEXT = """
     You are parsing a Titan Degree Audit (TDA).
 
     Your ONLY task is to extract a STRICT JSON list of all courses the student is allowed to take next.
@@ -147,58 +129,102 @@ def parse_tda(file_bytes: bytes, filename: str):
 
     """
 
-    response = client.responses.create(
-        model="gpt-4.1-mini",
-        input=[
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "input_text",
-                        "text": prompt_text,
-                    },
-                    {
-                        "type": "input_file",
-                        "file_id": file_id,
-                    },
-                ],
-            }
-        ],
-    )
-    print("SUCCESS RESPONSE CLINET")
-    raw_text = response.output[0].content[0].text
-
-    parsed_json = json.loads(raw_text)
-    output_path = Path(__file__).parent / "debug_output.json"
-    
-    end = time.time()
-    print(f"OpenAI response time: {end - start:.2f} seconds")
-    return parsed_json
+# Cached parses are keyed by this (services/tda_cache_service.py): editing
+# MODEL or PROMPT_TEXT starts a fresh cache; bump the revision when the
+# code below or parser/tda_local.py changes what a parse returns.
+# Asked when the local rules are not sure (TITAN_TDA_BACKEND: openai, local, fixture)
+BACKEND = tda_backends.get_backend(os.getenv("TITAN_TDA_BACKEND", "openai"), MODEL, PROMPT_TEXT)
+
+PARSER_VERSION = tda_cache_service.parser_version(BACKEND.cache_model, PROMPT_TEXT, revision=2)
+
+# The rule-based parser (parser/tda_local.py) answers when it is at least
+# this sure; otherwise the audit goes to BACKEND. TITAN_TDA_LOCAL=0 always asks BACKEND.
+LOCAL_PARSER = os.getenv("TITAN_TDA_LOCAL", "1") != "0"
+LOCAL_MIN_CONFIDENCE = float(os.getenv("TITAN_TDA_LOCAL_MIN_CONFIDENCE", "0.9"))
 
+
+def parse_tda(file_bytes: bytes, filename: str):
+  # Same PDF as before (by SHA-256): the stored result, no parsing at all
+  return tda_cache_service.cached_parse(file_bytes, PARSER_VERSION, lambda: _parse_tda(file_bytes, filename))
+
+
+def _parse_tda(file_bytes: bytes, filename: str):
+  if LOCAL_PARSER and BACKEND.name != "local":
+    start = time.time()
+    local = tda_local.parse_tda_local(file_bytes)
+    if local["confidence"] >= LOCAL_MIN_CONFIDENCE:
+      print(f"Local TDA parse: {len(local['courses_allowed'])} courses in {time.time() - start:.3f} seconds")
+      return {"courses_allowed": local["courses_allowed"], "parser": "local"}
+    print(f"Local TDA parse not confident ({local['confidence']:.2f}): {local['issues'][:3]}")
+  return BACKEND.parse(file_bytes, filename)
+
+
+def parse_tda_events(file_bytes: bytes, filename: str):
+  """
+  parse_tda as it happens, for POST /tda/upload/stream: yields (stage, data)
+  with stages received, text_extracted, course (one per course id, as soon
+  as it is known), courses_identified, and last result (the parse_tda dict).
+  Goes through the same cache, but does not wait for a parse of the same
+  PDF already running; both just store the same result.
+  """
+  yield "received", {"filename": filename, "bytes": len(file_bytes)}
+
+  cached = tda_cache_service.lookup(file_bytes, PARSER_VERSION)
+  if cached is not None:
+    yield from _known_courses("cache", cached)
+    return
+
+  start = time.time()
+  try:
+    pages = tda_local.extract_pages(file_bytes)
+    yield "text_extracted", {"pages": len(pages), "chars": sum(map(len, pages)),
+                             "ms": round((time.time() - start) * 1000, 1)}
   except Exception as e:
-    return {"status" : "error", "errors": [str(e)]}
-  
+    # no text layer: the backend may still read the file
+    print("TDA text extraction failed:", e)
+
+  if LOCAL_PARSER and BACKEND.name != "local":
+    local = tda_local.parse_tda_local(file_bytes)
+    if local["confidence"] >= LOCAL_MIN_CONFIDENCE:
+      result = {"courses_allowed": local["courses_allowed"], "parser": "local"}
+      tda_cache_service.store(file_bytes, PARSER_VERSION, result)
+      yield from _known_courses("local", result)
+      return
+    print(f"Local TDA parse not confident ({local['confidence']:.2f}): {local['issues'][:3]}")
+
+  result = None
+  for kind, value in BACKEND.parse_stream(file_bytes, filename):
+    if kind == "course":
+      yield "course", value
+    else:
+      result = value
+  if result.get("status") != "error":
+    tda_cache_service.store(file_bytes, PARSER_VERSION, result)
+    yield "courses_identified", {"source": BACKEND.name, "count": len(result.get("courses_allowed") or [])}
+  yield "result", result
+
+
+def _known_courses(source: str, result: dict):
+  courses = result.get("courses_allowed") or []
+  yield "courses_identified", {"source": source, "count": len(courses)}
+  for course in courses:
+    yield "course", course
+  yield "result", result
 
 
 def match_open_classes(courses_allowed):
     """
-    Compare courses_allowed[] against OPEN_CACHE and return
+    Compare courses_allowed[] against the open class snapshot and return
     all open sections the student is eligible to take.
+    Uses the per-course index, so cost follows len(courses_allowed), not catalog size.
     """
 
-    open_data = cache.OPEN_CACHE["data"]  # list of open class dicts
+    by_course = cache.get_open_snapshot().by_course
     eligible = []
 
-    allowed_set = set(courses_allowed or [])
-
-    for section in open_data:
-        if not isinstance(section, dict):
-            continue
-
-        course_id = section.get("course_id", "").strip()
-
-        if course_id in allowed_set:
-            eligible.append(section)
+    # dict.fromkeys keeps the order while dropping duplicates
+    for course_id in dict.fromkeys(cache.normalize_course_id(c) for c in courses_allowed or []):
+        eligible.extend(by_course.get(course_id, ()))
 
     return {
         "eligible_classes": eligible,
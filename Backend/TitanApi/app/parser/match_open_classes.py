@@ -8,28 +8,7 @@ def get_open_class_user(audit: dict):
 
     requirements = audit.get("requirements", [])
 
-    open_data = cache.OPEN_CACHE["data"]
-
-    def get_course_code(section):
-        course = section.get("course_id")
-        if course:
-            return course.strip()
-        return None
-
-    sections_by_course = {}
-
-    for sec in open_data:
-        if not isinstance(sec, dict):
-            continue
-
-        code = get_course_code(sec)
-        if not code:
-            continue
-
-        if code not in sections_by_course:
-            sections_by_course[code] = []
-
-        sections_by_course[code].append(sec)
+    sections_by_course = cache.get_open_snapshot().by_course
 
     plan_requirements = []
 
@@ -38,9 +17,7 @@ def get_open_class_user(audit: dict):
         matches = []
 
         for code in courses_allowed:
-            normalized = code.strip()
-            if normalized in sections_by_course:
-                matches.extend(sections_by_course[normalized])
+            matches.extend(sections_by_course.get(cache.normalize_course_id(code), ()))
 
         plan_requirements.append({
             "requirement_id": req.get("requirement_id"),
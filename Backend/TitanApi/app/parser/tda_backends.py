@@ -0,0 +1,364 @@
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from parser import tda_local
+
+# What parse_tda asks when the local rules are not sure (TITAN_TDA_BACKEND):
+#   openai  - run MODEL with PROMPT_TEXT (default) on the audit's text,
+#             compacted by tda_local.compact_pages and sent inline
+#             (TITAN_OPENAI_INPUT=file uploads the whole PDF instead, as
+#             before; scans and unrecognized layouts always go as files)
+#   local   - the rule-based parser only, never the network
+#   fixture - recorded responses from TITAN_TDA_FIXTURES (default
+#             parser/fixtures, which holds the hand-checked answer for
+#             TDA_Example.pdf), for offline latency/load runs;
+#             TITAN_TDA_FIXTURE_LATENCY_MS fakes the model's wait
+# The OpenAI client is built on first use, so the app starts without
+# OPENAI_API_KEY; a parse then fails with a normal error result.
+# OPENAI_BASE_URL points the client at a stand-in such as
+# benchmarks/openai_stub_server.py.
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+# Put between the prompt and the compacted text; bump TEXT_INPUT_VERSION
+# with it or with compact_pages so cached parses are redone
+TEXT_NOTE = """
+    The audit is given below as extracted text instead of a file.
+    Satisfied (+) requirement blocks, boilerplate pages and layout lines were
+    removed. Each remaining block lists its TAKE==> lines and course rows
+    BEFORE its "- " header line. COMPLETED and IN PROGRESS list every course
+    row of the full audit.
+
+    AUDIT TEXT:
+"""
+TEXT_INPUT_VERSION = 1
+CHARS_PER_TOKEN = 4  # rough, for the saved-token estimate
+
+# a finished course id string in a partial JSON answer: "CPSC 131",
+COURSE_IN_JSON_RE = re.compile(r'"([A-Za-z]{2,5} ?\d{3}[A-Za-z]?)"')
+
+
+class TdaBackend:
+    """
+    parse(file_bytes, filename) -> parsed audit dict or {"status": "error", ...}.
+    parse_stream yields ("course", id) as ids become known, then ("result", dict);
+    backends that cannot stream name all courses once the result is in.
+    Both count calls.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "ok": 0, "errors": 0, "retries": 0, "in_flight": 0, "total_ms": 0.0}
+
+    @property
+    def cache_model(self) -> str:
+        """What identifies this backend's answers in the TDA cache version."""
+        return self.name
+
+    def parse(self, file_bytes: bytes, filename: str) -> Dict:
+        return self._counted(lambda: self._parse(file_bytes, filename))
+
+    def parse_stream(self, file_bytes: bytes, filename: str) -> Iterator[Tuple[str, object]]:
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["in_flight"] += 1
+        start = time.perf_counter()
+        result = None
+        try:
+            for kind, value in self._parse_stream(file_bytes, filename):
+                if kind == "result":
+                    result = value
+                else:
+                    yield kind, value
+        except Exception as e:
+            result = {"status": "error", "errors": [str(e)]}
+        finally:
+            self._finish(start, result)
+        yield "result", result
+
+    def _counted(self, parse) -> Dict:
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["in_flight"] += 1
+        start = time.perf_counter()
+        result = None
+        try:
+            result = parse()
+        except Exception as e:
+            result = {"status": "error", "errors": [str(e)]}
+        finally:
+            self._finish(start, result)
+        return result
+
+    def _finish(self, start: float, result: Optional[Dict]):
+        with self._lock:
+            self._stats["in_flight"] -= 1
+            self._stats["total_ms"] += (time.perf_counter() - start) * 1000
+            self._stats["errors" if result is None or result.get("status") == "error" else "ok"] += 1
+
+    def _parse(self, file_bytes: bytes, filename: str) -> Dict:
+        raise NotImplementedError
+
+    def _parse_stream(self, file_bytes: bytes, filename: str):
+        result = self._parse(file_bytes, filename)
+        for course in result.get("courses_allowed") or []:
+            yield "course", course
+        yield "result", result
+
+    def _count_retry(self):
+        with self._lock:
+            self._stats["retries"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._stats)
+        total_ms = counters.pop("total_ms")
+        done = counters["ok"] + counters["errors"]
+        return {"backend": self.name, **counters, "avg_ms": round(total_ms / done, 1) if done else None}
+
+
+class OpenAIBackend(TdaBackend):
+    name = "openai"
+
+    TIMEOUT = float(os.getenv("TITAN_OPENAI_TIMEOUT", "60"))       # seconds per request
+    RETRIES = int(os.getenv("TITAN_OPENAI_RETRIES", "2"))          # after the first try
+    BACKOFF = float(os.getenv("TITAN_OPENAI_BACKOFF", "0.5"))      # seconds, doubled per retry
+    CONCURRENCY = int(os.getenv("TITAN_OPENAI_CONCURRENCY", "4"))  # requests in flight at once
+    RECORD_DIR = os.getenv("TITAN_TDA_RECORD_DIR")                 # save responses as fixtures
+    INPUT = os.getenv("TITAN_OPENAI_INPUT", "text")                # "text" or "file"
+
+    def __init__(self, model: str, prompt: str):
+        super().__init__()
+        self.model = model
+        self.prompt = prompt
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.CONCURRENCY)
+        self._inputs = {"text": 0, "file": 0, "tokens_saved_est": 0, "prep_ms": 0.0,
+                        "upload_ms": 0.0, "input_tokens": 0}
+        self.last_input = None
+
+    @property
+    def cache_model(self) -> str:
+        if self.INPUT == "file":
+            return self.model
+        return f"{self.model}/text{TEXT_INPUT_VERSION}"
+
+    def client(self):
+        with self._client_lock:
+            if self._client is None:
+                from openai import OpenAI
+
+                api_key = os.getenv("OPENAI_API_KEY")
+                if not api_key:
+                    raise RuntimeError("OPENAI_API_KEY not found in .env")
+                # retries are ours (with jitter), not the SDK's
+                self._client = OpenAI(api_key=api_key, timeout=self.TIMEOUT, max_retries=0)
+            return self._client
+
+    def _retrying(self, call):
+        import openai
+
+        retryable = (openai.APITimeoutError, openai.APIConnectionError,
+                     openai.RateLimitError, openai.InternalServerError)
+        for attempt in range(self.RETRIES + 1):
+            try:
+                return call()
+            except retryable:
+                if attempt == self.RETRIES:
+                    raise
+                self._count_retry()
+                # full jitter: uploads retried together do not retry together
+                time.sleep(random.uniform(0, self.BACKOFF * 2 ** attempt))
+
+    def _compact(self, file_bytes: bytes):
+        """(compacted audit text, report) or None to send the PDF."""
+        start = time.perf_counter()
+        try:
+            compacted = tda_local.compact_pages(tda_local.extract_pages(file_bytes))
+        except Exception as e:
+            print("TDA text extraction failed, sending the PDF:", e)
+            return None
+        if compacted is None:
+            return None
+        text, report = compacted
+        report["prep_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        # lower bound: a PDF input is also billed for page images
+        report["tokens_saved_est"] = (report["chars_full"] - report["chars_sent"]) // CHARS_PER_TOKEN
+        return text, report
+
+    def _request_input(self, client, compacted, file_bytes: bytes, filename: str):
+        """(input messages, report); uploads the PDF unless there is compacted text."""
+        if compacted:
+            # no upload round trip before inference starts
+            text, report = compacted
+            content = [{"type": "input_text", "text": self.prompt + TEXT_NOTE + text}]
+        else:
+            start = time.time()
+            report = {"input": "file"}
+            uploaded_file = self._retrying(lambda: client.files.create(
+                file=(filename, file_bytes),
+                purpose="assistants",
+            ))
+            report["upload_ms"] = round((time.time() - start) * 1000, 1)
+            content = [
+                {"type": "input_text", "text": self.prompt},
+                {"type": "input_file", "file_id": uploaded_file.id},
+            ]
+        return [{"role": "user", "content": content}], report
+
+    def _acquire_slot(self):
+        if not self._slots.acquire(timeout=self.TIMEOUT):
+            raise RuntimeError(f"No OpenAI slot free after {self.TIMEOUT:.0f}s")
+
+    def _finish_response(self, file_bytes: bytes, filename: str, raw_text: str, usage, report: dict) -> Dict:
+        report["input_tokens"] = getattr(usage, "input_tokens", None)
+        self._count_input(report)
+        parsed_json = json.loads(raw_text)
+        if self.RECORD_DIR:
+            record_fixture(Path(self.RECORD_DIR), file_bytes, filename, parsed_json)
+        return parsed_json
+
+    def _parse(self, file_bytes: bytes, filename: str) -> Dict:
+        client = self.client()
+        compacted = self._compact(file_bytes) if self.INPUT == "text" else None
+        self._acquire_slot()
+        try:
+            start = time.time()
+            messages, report = self._request_input(client, compacted, file_bytes, filename)
+            response = self._retrying(lambda: client.responses.create(model=self.model, input=messages))
+            raw_text = response.output[0].content[0].text
+            print(f"OpenAI response time: {time.time() - start:.2f} seconds")
+        finally:
+            self._slots.release()
+        return self._finish_response(file_bytes, filename, raw_text, getattr(response, "usage", None), report)
+
+    def _parse_stream(self, file_bytes: bytes, filename: str):
+        """Streams the answer and yields each course id as soon as its string closes."""
+        client = self.client()
+        compacted = self._compact(file_bytes) if self.INPUT == "text" else None
+        self._acquire_slot()
+        try:
+            start = time.time()
+            messages, report = self._request_input(client, compacted, file_bytes, filename)
+            stream = self._retrying(lambda: client.responses.create(model=self.model, input=messages, stream=True))
+            raw_text, usage, seen = "", None, 0
+            for event in stream:
+                if event.type == "response.output_text.delta":
+                    raw_text += event.delta
+                    found = COURSE_IN_JSON_RE.findall(raw_text)
+                    for course in found[seen:]:
+                        yield "course", course
+                    seen = len(found)
+                elif event.type == "response.completed":
+                    usage = getattr(event.response, "usage", None)
+                elif event.type in ("response.failed", "error"):
+                    raise RuntimeError(f"OpenAI stream failed: {event}")
+            print(f"OpenAI response time: {time.time() - start:.2f} seconds (streamed)")
+        finally:
+            self._slots.release()
+        yield "result", self._finish_response(file_bytes, filename, raw_text, usage, report)
+
+
+    def _count_input(self, report: dict):
+        with self._lock:
+            if report.get("input") == "file":
+                self._inputs["file"] += 1
+                self._inputs["upload_ms"] += report["upload_ms"]
+            else:
+                report["input"] = "text"
+                self._inputs["text"] += 1
+                self._inputs["tokens_saved_est"] += report["tokens_saved_est"]
+                self._inputs["prep_ms"] += report["prep_ms"]
+            self._inputs["input_tokens"] += report["input_tokens"] or 0
+            self.last_input = report
+        if report["input"] == "text":
+            upload = self.stats()["inputs"]["upload_ms_avg"]
+            print(f"TDA text input: {report['chars_full']} -> {report['chars_sent']} chars "
+                  f"(~{report['tokens_saved_est']} tokens saved), prep {report['prep_ms']:.0f} ms, "
+                  f"no upload" + (f" (~{upload:.0f} ms each when sent as a file)" if upload else ""))
+
+    def stats(self) -> dict:
+        base = super().stats()
+        with self._lock:
+            inputs = dict(self._inputs)
+            last = self.last_input
+        text, files = inputs["text"], inputs["file"]
+        base["inputs"] = {
+            "mode": self.INPUT,
+            "text": text,
+            "file": files,
+            "tokens_saved_est": inputs["tokens_saved_est"],
+            "prep_ms_avg": round(inputs["prep_ms"] / text, 1) if text else None,
+            "upload_ms_avg": round(inputs["upload_ms"] / files, 1) if files else None,
+            "input_tokens": inputs["input_tokens"],
+            "last": last,
+        }
+        return base
+
+
+class LocalBackend(TdaBackend):
+    name = "local"
+
+    def _parse(self, file_bytes: bytes, filename: str) -> Dict:
+        local = tda_local.parse_tda_local(file_bytes)
+        if local["confidence"] == 0:
+            return {"status": "error", "errors": local["issues"]}
+        return {"courses_allowed": local["courses_allowed"], "parser": "local"}
+
+
+class FixtureBackend(TdaBackend):
+    """
+    Answers from <dir>/<name>.<sha256 of the PDF>.json (what
+    TITAN_TDA_RECORD_DIR writes), else <dir>/default.json, else an error.
+    """
+
+    name = "fixture"
+
+    def __init__(self, directory: Path, latency_ms: float):
+        super().__init__()
+        self.directory = directory
+        self.latency_ms = latency_ms
+
+    def _find(self, digest: str) -> Optional[Path]:
+        for path in self.directory.glob(f"*{digest}.json"):
+            return path
+        default = self.directory / "default.json"
+        return default if default.exists() else None
+
+    def _parse(self, file_bytes: bytes, filename: str) -> Dict:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        path = self._find(hashlib.sha256(file_bytes).hexdigest())
+        if path is None:
+            return {"status": "error", "errors": [f"No recorded TDA response for {filename} in {self.directory}"]}
+        return json.loads(path.read_text())
+
+
+def record_fixture(directory: Path, file_bytes: bytes, filename: str, result: Dict):
+    directory.mkdir(parents=True, exist_ok=True)
+    stem = Path(filename or "tda").stem
+    path = directory / f"{stem}.{hashlib.sha256(file_bytes).hexdigest()}.json"
+    path.write_text(json.dumps(result, indent=2) + "\n")
+
+
+def get_backend(name: str, model: str, prompt: str) -> TdaBackend:
+    if name == "openai":
+        return OpenAIBackend(model, prompt)
+    if name == "local":
+        return LocalBackend()
+    if name == "fixture":
+        return FixtureBackend(
+            Path(os.getenv("TITAN_TDA_FIXTURES", FIXTURES_DIR)),
+            float(os.getenv("TITAN_TDA_FIXTURE_LATENCY_MS", "0")),
+        )
+    raise ValueError(f"Unknown TITAN_TDA_BACKEND {name!r} (openai, local, fixture)")
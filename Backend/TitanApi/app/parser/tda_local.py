@@ -0,0 +1,230 @@
+import io
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from pypdf import PdfReader
+
+# Rule-based Titan Degree Audit parser: the fast path of parse_tda.
+# Reads the text layer with pypdf and applies the same rules the OpenAI
+# prompt spells out:
+#   - courses_allowed come from the "TAKE==>" lists, which the audit prints
+#     only under unfulfilled requirements ("-" blocks)
+#   - a course is completed when a row has a term and a passing grade,
+#     in progress when a row has a term and "IP" or no grade yet; both are
+#     dropped (rows without a grade are also an issue: the next token is
+#     the title, which the rules cannot tell from a grade for sure)
+# Anything it does not fully understand lowers `confidence`, and parse_tda
+# sends those audits to OpenAI instead.
+# compact_pages trims the same text for the model (parser/tda_backends.py):
+# satisfied blocks, boilerplate pages and layout lines go, the course rows
+# are summed up in two lines.
+
+TAKE_RE = re.compile(r"^\s*TAKE\s*==>\s*(.*)$")
+# FA25 CPSC 362 0.0 IP Software Engineering; the grade may be missing
+ROW_RE = re.compile(r"^(?:FA|SP|SS|SU|WI)\d{2}\s+([A-Z]{2,5})\s+(\d{3}[A-Z]?)\s+\d+\.\d+(?:\s+(\S+))?")
+# CPSC 471 / ,315 / OR 315 / AND 315; annotations like "(FA06  or after)" are dropped first
+LIST_TOKEN_RE = re.compile(r"(?!(?:OR|AND)\b)([A-Z]{2,5})\s+(\d{3}[A-Z]?)\b|(\d{3}[A-Z]?)\b|(,|\b(?:OR|AND)\b)|(\S+)")
+NOTE_RE = re.compile(r"\([^)]*\)")
+HEADER_RE = re.compile(r"^([-+])\s+\S")
+# constructs of other audit formats this parser does not read
+UNSUPPORTED_RE = re.compile(r"^\s*NEEDS:|SELECT\s+FROM|TAKE\s+\d+\s+COURSES?", re.IGNORECASE)
+
+# A TAKE list still names a course the student finished with a D or worse
+# (major courses need C-), so only these grades count as completed
+PASSING_GRADE_RE = re.compile(r"\+?(?:[ABC][+-]?|CR|P|TR)")
+IN_PROGRESS_GRADE = "IP"
+# Anything else after the credits is the start of the title: no grade yet
+GRADE_RE = re.compile(r"\+?(?:[A-D][+-]?|F|CR|NC|P|NP|TR|W|WU|I|IC|RD|RP|AU|IP)")
+
+
+# Lines with nothing for the model: page numbers, table headings, transfer
+# mappings, banner/notice lines
+NOISE_RE = re.compile(r"^\s*(?:Page \d+ of \d+|Term Course Credits Grade Title|FullColl:.*|Matched As:.*|[*=-]{3,}.*)\s*$")
+
+
+# parse_tda reads a PDF twice when the local parse is not sure (rules, then
+# the model's text), so the last few extractions are kept
+@lru_cache(maxsize=4)
+def extract_pages(file_bytes: bytes) -> Tuple[str, ...]:
+    reader = PdfReader(io.BytesIO(file_bytes))
+    return tuple(page.extract_text() or "" for page in reader.pages)
+
+
+def extract_text(file_bytes: bytes) -> str:
+    return "\n".join(extract_pages(file_bytes))
+
+
+def _parse_course_list(text: str):
+    """'CPSC 471(FA06 or after),315  EGGN 495' -> (['CPSC 471', 'CPSC 315', 'EGGN 495'], unparsed tokens)"""
+    courses, unparsed = [], []
+    subject: Optional[str] = None
+    for m in LIST_TOKEN_RE.finditer(NOTE_RE.sub("", text)):
+        subj, number, bare, _sep, other = m.groups()
+        if subj:
+            subject = subj
+            courses.append(f"{subj} {number}")
+        elif bare and subject:
+            courses.append(f"{subject} {bare}")
+        elif bare or other:
+            unparsed.append(m.group(0))
+    return courses, unparsed
+
+
+def _is_list_continuation(line: str) -> bool:
+    """A wrapped TAKE list line: starts with a course and holds nothing else."""
+    courses, unparsed = _parse_course_list(line)
+    return bool(courses) and not unparsed and re.match(r"\s*[A-Z]{2,5}\s+\d{3}", line) is not None
+
+
+def _course_rows(lines):
+    """(completed, in_progress, ungraded) course ids from the term rows, in order."""
+    completed, in_progress, ungraded = {}, {}, {}
+    for line in lines:
+        m = ROW_RE.match(line.strip())
+        if not m:
+            continue
+        course, grade = f"{m.group(1)} {m.group(2)}", m.group(3)
+        if grade is None or not GRADE_RE.fullmatch(grade):
+            in_progress[course] = True
+            ungraded[course] = True
+        elif grade == IN_PROGRESS_GRADE:
+            in_progress[course] = True
+        elif PASSING_GRADE_RE.fullmatch(grade):
+            completed[course] = True
+    return list(completed), list(in_progress), list(ungraded)
+
+
+def parse_text(text: str) -> Dict:
+    lines = text.splitlines()
+    issues: List[str] = []
+    if "TITAN Degree Audit" not in text and "END OF ANALYSIS" not in text:
+        return {"courses_allowed": [], "completed": [], "in_progress": [],
+                "confidence": 0.0, "issues": ["not a Titan Degree Audit (or no text layer)"]}
+    if "END OF ANALYSIS" not in text:
+        issues.append("audit is incomplete (no END OF ANALYSIS)")
+
+    completed, in_progress, ungraded = _course_rows(lines)
+    if ungraded:
+        issues.append(f"term rows without a grade (taken as in progress): {', '.join(ungraded)}")
+
+    # TAKE lists, with wrapped lines joined; each belongs to the next block header
+    take_lists = []
+    i = 0
+    while i < len(lines):
+        m = TAKE_RE.match(lines[i])
+        if UNSUPPORTED_RE.search(lines[i]):
+            issues.append(f"unsupported requirement format: {lines[i].strip()!r}")
+        if not m:
+            i += 1
+            continue
+        text_parts = [m.group(1)]
+        i += 1
+        while i < len(lines) and (text_parts[-1].rstrip().endswith(",") or _is_list_continuation(lines[i])):
+            text_parts.append(lines[i])
+            i += 1
+        sign = None
+        for j in range(i, len(lines)):
+            header = HEADER_RE.match(lines[j])
+            if header:
+                sign = header.group(1)
+                break
+        courses, unparsed = _parse_course_list(" ".join(text_parts))
+        if unparsed:
+            issues.append(f"could not read TAKE list: {' '.join(text_parts).strip()!r}")
+        take_lists.append((sign, courses))
+
+    if not take_lists and "NOT BEEN SATISFIED" in text:
+        issues.append("requirements are unfulfilled but no TAKE lists were found")
+
+    taken = set(completed) | set(in_progress)
+    allowed = {}
+    for sign, courses in take_lists:
+        if sign == "+":
+            continue  # satisfied block
+        for course in courses:
+            if course not in taken:
+                allowed[course] = True
+
+    return {
+        "courses_allowed": list(allowed),
+        "completed": completed,
+        "in_progress": in_progress,
+        "confidence": 0.5 ** len(issues),
+        "issues": issues,
+    }
+
+
+def parse_tda_local(file_bytes: bytes) -> Dict:
+    """parse_text on the PDF's text layer; an unreadable PDF gets confidence 0."""
+    try:
+        text = extract_text(file_bytes)
+    except Exception as e:
+        return {"courses_allowed": [], "completed": [], "in_progress": [],
+                "confidence": 0.0, "issues": [f"could not read PDF: {e}"]}
+    return parse_text(text)
+
+
+def _take_lines(block, rows: bool):
+    """The TAKE lists of a block (with wrapped lines), and with rows=True its course rows if it has a list."""
+    lines, in_take, has_take = [], False, False
+    for line in block:
+        in_take = bool(TAKE_RE.match(line)) or (in_take and _is_list_continuation(line))
+        has_take = has_take or in_take
+        if in_take or (rows and ROW_RE.match(line.strip())):
+            lines.append(line)
+    return lines if has_take else []
+
+
+def compact_pages(pages) -> Optional[Tuple[str, Dict]]:
+    """
+    The audit text the model needs: the unfulfilled ("-") requirement blocks
+    with their TAKE lists and rows, plus COMPLETED / IN PROGRESS lines for
+    every course row. None when the text does not look like a TDA with
+    TAKE lists (send the whole thing instead). Returns (text, counts).
+    """
+    text = "\n".join(pages)
+    if "TAKE" not in text or not any(HEADER_RE.match(line) for line in text.splitlines()):
+        return None
+
+    # pages with no requirement header, TAKE list or course row: intro, legend, totals
+    kept_pages = [
+        page for page in pages
+        if any(HEADER_RE.match(line) or TAKE_RE.match(line) or ROW_RE.match(line.strip())
+               for line in page.splitlines())
+    ]
+
+    # The text layer prints a block's rows and TAKE lists before its
+    # "-"/"+" header line, so a block runs up to and including its header.
+    # Satisfied blocks go; unfulfilled ones keep their TAKE lists and course
+    # rows (unit/GPA counters keep just the header). The transcript after
+    # the last header is covered by the COMPLETED / IN PROGRESS lines.
+    kept, block = [], []
+    blocks_kept = blocks_dropped = 0
+    for line in "\n".join(kept_pages).splitlines():
+        if NOISE_RE.match(line) or not line.strip():
+            continue
+        block.append(line.rstrip())
+        header = HEADER_RE.match(line)
+        if header:
+            if header.group(1) == "-":
+                kept.extend(_take_lines(block, rows=True))
+                kept.append(line.rstrip())
+                blocks_kept += 1
+            else:
+                blocks_dropped += 1
+            block = []
+    kept.extend(_take_lines(block, rows=False))
+
+    completed, in_progress, _ = _course_rows(text.splitlines())
+    kept.append("COMPLETED: " + (", ".join(completed) or "none"))
+    kept.append("IN PROGRESS: " + (", ".join(in_progress) or "none"))
+    compacted = "\n".join(kept)
+    return compacted, {
+        "pages": len(pages),
+        "pages_dropped": len(pages) - len(kept_pages),
+        "blocks_kept": blocks_kept,
+        "blocks_dropped": blocks_dropped,
+        "chars_full": len(text),
+        "chars_sent": len(compacted),
+    }
@@ -1,12 +1,15 @@
+from typing import Optional
+
 from fastapi import FastAPI, APIRouter, HTTPException, File, UploadFile
-from services import courses_csv, courses_service
+from services import courses_csv, csv_stream, executors, courses_service
 from crud import courses_crud
+import cache
 
 router = APIRouter()
 
 
 @router.post("/courses/upload")
-async def upload_courses_csv(file: UploadFile = File(...)):
+async def upload_courses_csv(file: UploadFile = File(...), parallel: Optional[bool] = None):
     # Check if CSV file
     if file.content_type != "text/csv":
         raise HTTPException(
@@ -14,13 +17,26 @@ async def upload_courses_csv(file: UploadFile = File(...)):
             detail=f"Invalid file type: {file.content_type}. Only CSV files are allowed!"
         )
 
-    contents = await file.read()
+    # The load writes SQLite, so it waits its turn on the db_write lane (services/executors.py);
+    # the CPU pool checks the chunks of big files (parallel=true/false to choose)
+    return await executors.run_blocking("db_write", load_courses_csv, file, executors.use_cpu_pool(parallel, file.size))
+
 
-    rows_inserted = courses_csv.scrape_courses_csv(contents, table_name="course")
+def load_courses_csv(file: UploadFile, parallel: bool):
+    # Streamed from the spooled upload in chunks (see services/csv_stream.py)
+    progress = csv_stream.start_progress("courses", file.filename, file.size)
+    status = "error"
+    try:
+        rows_inserted = courses_csv.scrape_courses_csv(file.file, table_name="course", progress=progress, parallel=parallel)
+        status = rows_inserted["status"]
+    finally:
+        csv_stream.finish_progress(progress, status)
     if rows_inserted["status"] == "error":
         return rows_inserted
     else:
         rows_inserted.pop("status")
+        # /open/query reads the snapshot, so republish it
+        cache.rebuild_open_cache()
         return{"message": f"Inserted {rows_inserted} rows into the  'course' table."}
 
 
@@ -52,4 +68,5 @@ def delete_courses(course_id):
             status_code=404,
             detail="course_id Not Found"
         )
+    cache.rebuild_open_cache()
     return {f"Successfully Deleted {course_id}!"}
\ No newline at end of file
@@ -1,12 +1,13 @@
 # app/routers/openclasses_router.py
 import re
 from fastapi import APIRouter, HTTPException, File, UploadFile
+from fastapi.responses import StreamingResponse
 from typing import Optional, List, Dict, Any
 from collections import OrderedDict
 
-from services import csv_scraper_service
-from crud import open_class_list_crud
-from db import get_conn
+from services import executors, ingest_jobs_service, open_query_service, sse, tda_cache_service, tda_stream_service
+from crud import open_class_list_crud, open_class_query_crud
+from schemas import OpenQueryFilters, OpenQueryBatch
 from parser import PDF_parser
 import cache
 
@@ -15,33 +16,35 @@ router = APIRouter()
 # -----------------------
 # Upload / simple get
 # -----------------------
-@router.post("/open/upload")
-async def upload_csv(file: UploadFile = File(...)):
+@router.post("/open/upload", status_code=202)
+async def upload_csv(file: UploadFile = File(...), prune: bool = False, parallel: Optional[bool] = None):
+    # Queues a background ingest (services/ingest_jobs_service.py) and returns
+    # right away; poll GET /ingest/jobs/{job_id} for stage, rows and errors.
+    # prune=true also deletes sections of the file's (term, subject) pairs
+    # that the file no longer lists, for full scraper runs
+    # parallel=true checks each term's rows in worker processes (multi-term files);
+    # left out, files of executors.PARALLEL_MIN_BYTES or more do
     if file.content_type != "text/csv":
         raise HTTPException(
             status_code=400,
             detail=f"Invalid file type: {file.content_type}. Only CSV files are allowed!"
         )
-    try:
-        contents = await file.read()
-        results = csv_scraper_service.scrape_csv(contents)
-        if results.get("status") == "error":
-            raise HTTPException(status_code=400, detail=results.get("errors", ["Unknown error"]))
-        return {
-            "message": "CSV Update Completed.",
-            "inserted": results.get("inserted", []),
-            "errors": results.get("errors", []),
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Upload failed: {e}")
+    # copying the upload aside is disk I/O: upload lane (services/executors.py)
+    job = await executors.run_blocking(
+        "upload", ingest_jobs_service.submit_open_upload,
+        file.file, file.filename, file.size, prune=prune, parallel=parallel,
+    )
+    return {
+        "message": "CSV Upload Queued.",
+        "job_id": job["job_id"],
+        "status_url": f"/ingest/jobs/{job['job_id']}",
+        "job": job,
+    }
 
 
 @router.get("/open")
 def get_all_open_classes():
-    # print("Router sees:", len(OPEN_CACHE))
-    return cache.OPEN_CACHE
+    return cache.get_open_cache()
 
 
 # -----------------------
@@ -173,17 +176,32 @@ def group_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     return list(grouped.values())
 
 
-def overlaps_time_condition_sql(has_start_end: bool, has_start_only: bool, has_end_only: bool) -> str:
-    """
-    SQL snippet using view columns start_min/end_min (no table alias).
-    """
-    if has_start_end:
-        return "(end_min > ? AND start_min < ?)"
-    if has_start_only:
-        return "(start_min >= ?)"
-    if has_end_only:
-        return "(end_min <= ?)"
-    return ""
+def normalize_modality(modality: Optional[str]) -> Optional[str]:
+    """Map the accepted spellings to 'online', 'inperson', 'hybrid' (None = no filter)."""
+    mod = modality.strip().lower() if modality and isinstance(modality, str) else None
+    if mod in ("online", "fully_online", "fully-online", "online-only"):
+        return "online"
+    if mod in ("inperson", "in-person", "in_person", "in_person_only"):
+        return "inperson"
+    if mod in ("hybrid", "mixed"):
+        return "hybrid"
+    return None
+
+
+def build_filters(term, subject, course, crn, only_open, time_start, time_end,
+                  days, days_mode, modality) -> OpenQueryFilters:
+    return OpenQueryFilters(
+        term=term,
+        subject=subject,
+        course=course,
+        crn=str(crn) if crn else None,
+        only_open=only_open,
+        time_start=time_start,
+        time_end=time_end,
+        days=normalize_days_param(days),
+        days_mode="all" if (days_mode or "").lower() == "all" else "any",
+        modality=normalize_modality(modality),
+    )
 
 
 # -----------------------
@@ -208,171 +226,62 @@ def openclasses_query(
 ):
     """
     Query open_classes and return all meetings for classes (term+crn) that match provided filters.
-    New: modality can be 'online', 'inperson', or 'hybrid'.
+    modality can be 'online', 'inperson', or 'hybrid'.
+    Served from the cache snapshot (open_query_service) once it is loaded,
+    otherwise from SQLite (open_class_query_crud); both return the same rows.
     """
     try:
-        outer_where: List[str] = []
-        params: List[Any] = []
-
-        # Basic outer filters (term/subject/course/crn/status)
-        if term:
-            outer_where.append("UPPER(term) = UPPER(?)")
-            params.append(term)
-
-        if subject:
-            outer_where.append("UPPER(subject) = UPPER(?)")
-            params.append(subject)
-
-        if course:
-            outer_where.append("UPPER(course_id) LIKE UPPER(?)")
-            params.append(f"%{course}%")
-
-        if crn:
-            outer_where.append("crn = ?")
-            params.append(str(crn))
-
-        if only_open:
-            outer_where.append("LOWER(status) LIKE 'open%'")
-
-        # Modality handling (we add correlated EXISTS checks so that we still return ALL meetings for a matched CRN)
-        mod = modality.strip().lower() if modality and isinstance(modality, str) else None
-        if mod in ("online", "fully_online", "fully-online", "online-only"):
-            # class must have at least one meeting whose room contains 'online'
-            outer_where.append(
-                "EXISTS (SELECT 1 FROM open_classes mmod WHERE mmod.term = open_classes.term AND mmod.crn = open_classes.crn AND UPPER(IFNULL(mmod.room,'')) LIKE '%ONLINE%')"
-            )
-        elif mod in ("inperson", "in-person", "in_person", "in_person_only"):
-            # class must have at least one meeting whose room does NOT contain 'online' and is not empty/TBA
-            outer_where.append(
-                "EXISTS (SELECT 1 FROM open_classes mmod WHERE mmod.term = open_classes.term AND mmod.crn = open_classes.crn AND TRIM(IFNULL(mmod.room,'')) <> '' AND UPPER(IFNULL(mmod.room,'')) NOT LIKE '%ONLINE%' AND UPPER(TRIM(IFNULL(mmod.room,''))) NOT IN ('TBA'))"
-            )
-        elif mod in ("hybrid", "mixed"):
-            # require both an online meeting and an in-person meeting
-            outer_where.append(
-                "EXISTS (SELECT 1 FROM open_classes mmod WHERE mmod.term = open_classes.term AND mmod.crn = open_classes.crn AND UPPER(IFNULL(mmod.room,'')) LIKE '%ONLINE%')"
-            )
-            outer_where.append(
-                "EXISTS (SELECT 1 FROM open_classes mmod2 WHERE mmod2.term = open_classes.term AND mmod2.crn = open_classes.crn AND TRIM(IFNULL(mmod2.room,'')) <> '' AND UPPER(IFNULL(mmod2.room,'')) NOT LIKE '%ONLINE%' AND UPPER(TRIM(IFNULL(mmod2.room,''))) NOT IN ('TBA'))"
-            )
-        # else: no modality filter
-
-        # Determine time filter flags
-        has_start_end = (time_start is not None and time_end is not None)
-        has_start_only = (time_start is not None and time_end is None)
-        has_end_only = (time_end is not None and time_start is None)
-
-        # Build time condition snippet for correlated subquery (operand uses view columns)
-        oc2_time_cond = overlaps_time_condition_sql(has_start_end, has_start_only, has_end_only)
-        # oc2_time_cond contains placeholders "?" if present; we'll append its params where needed.
-
-        # Days normalization -> list[int]
-        required_days = normalize_days_param(days)
-
-        # Build correlated existence clauses (to ensure class has at least one meeting matching day/time when needed)
-        existence_clauses: List[str] = []
-        existence_params: List[Any] = []
-
-        # days_mode == 'all' will be handled using aggregate EXISTS below
-        if required_days and days_mode.lower() == "any":
-            # oc2.day_of_week IN (?, ?, ?)
-            ph = ",".join("?" for _ in required_days)
-            existence_clauses.append(f"oc2.day_of_week IN ({ph})")
-            existence_params.extend(required_days)
-
-        # append time condition to existence clauses (if present)
-        if oc2_time_cond:
-            existence_clauses.append(oc2_time_cond)
-            if has_start_end:
-                existence_params.append(time_start); existence_params.append(time_end)
-            elif has_start_only:
-                existence_params.append(time_start)
-            elif has_end_only:
-                existence_params.append(time_end)
-
-        # Compose correlated subqueries and attach to outer_where
-        if required_days and days_mode.lower() == "all":
-            # aggregated check: class must have (distinct) required days count >= n_required
-            ph_days = ",".join("?" for _ in required_days)
-            agg_sql = f"""
-            EXISTS (
-              SELECT 1 FROM (
-                SELECT term, crn
-                FROM open_classes
-                WHERE day_of_week IN ({ph_days})
-                GROUP BY term, crn
-                HAVING COUNT(DISTINCT day_of_week) >= ?
-              ) AS sub
-              WHERE sub.term = open_classes.term AND sub.crn = open_classes.crn
-            )
-            """
-            outer_where.append(agg_sql)
-            params.extend(required_days)
-            params.append(len(required_days))
-
-            # if time constraints also present, require at least one meeting matching the time
-            if oc2_time_cond:
-                exists_time_sql = f"""
-                EXISTS (
-                  SELECT 1 FROM open_classes oc2
-                  WHERE oc2.term = open_classes.term AND oc2.crn = open_classes.crn
-                    AND {oc2_time_cond}
-                )
-                """
-                outer_where.append(exists_time_sql)
-                params.extend([time_start, time_end] if has_start_end else ([time_start] if has_start_only else ([time_end] if has_end_only else [])))
+        filters = build_filters(term, subject, course, crn, only_open,
+                                time_start, time_end, days, days_mode, modality)
+        snapshot = cache.get_open_snapshot()
+        if snapshot.version:
+            rows = open_query_service.run_open_query(snapshot.columns, filters)
         else:
-            # days_mode == 'any' or no days: combine existence_clauses into one correlated EXISTS
-            if existence_clauses:
-                exists_sql = "EXISTS (SELECT 1 FROM open_classes oc2 WHERE oc2.term = open_classes.term AND oc2.crn = open_classes.crn AND " + " AND ".join(existence_clauses) + ")"
-                outer_where.append(exists_sql)
-                params.extend(existence_params)
-
-        # Final WHERE
-        where_sql = ("WHERE " + " AND ".join(outer_where)) if outer_where else ""
-
-        sql = f"""
-        SELECT term, crn, course_id, subject, number, units, prereq, coreq,
-               section, professor, status, day_of_week, start_min, end_min, room
-        FROM open_classes
-        {where_sql}
-        ORDER BY term, course_id, crn;
-        """
-
-        with get_conn() as conn:
-            cur = conn.execute(sql, params)
-            cols = [c[0] for c in cur.description]
-            rows = [dict(zip(cols, row)) for row in cur.fetchall()]
-
-        grouped = group_rows(rows)
-
-        # Note: for days_mode=='all' we enforced via aggregated EXISTS above.
-        # As a safety double-check (optional), you could post-filter by numeric day_num or time overlap here.
-
-        # Final safety for time window if not already enforced in EXISTS (rare)
-        if (has_start_end or has_start_only or has_end_only) and not oc2_time_cond:
-            def meeting_overlaps(meet):
-                s = meet.get("start", -1) if meet.get("start") is not None else -1
-                e = meet.get("end", -1) if meet.get("end") is not None else -1
-                if s < 0 or e < 0:
-                    return True
-                if has_start_end:
-                    return not (e <= time_start or s >= time_end)
-                if has_start_only:
-                    return s >= time_start
-                if has_end_only:
-                    return e <= time_end
-                return True
-            final = []
-            for g in grouped:
-                if any(meeting_overlaps(m) for m in g.get("meetings", [])):
-                    final.append(g)
-            grouped = final
-
-        return grouped
+            rows = open_class_query_crud.run_open_query(filters)
+        return group_rows(rows)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def split_course_id(course_id: str) -> Optional[tuple]:
+    """'CPSC 131' -> ('CPSC', '131'), the same split script.js does per course."""
+    parts = (course_id or "").split()
+    if len(parts) < 2:
+        return None
+    return parts[0], " ".join(parts[1:])
+
+
+@router.post("/open/query/batch")
+def openclasses_query_batch(body: OpenQueryBatch):
+    """
+    /open/query for many courses in one call. Each course id is matched like
+    subject=<first word>&course=<rest>; the other filters apply to all of them.
+    Returns {course_id: [classes...]} in request order, [] for ids that do not parse.
+    """
+    try:
+        filters = build_filters(body.term, None, None, None, body.only_open,
+                                body.time_start, body.time_end, body.days,
+                                body.days_mode, body.modality)
+        courses = {}
+        for course_id in dict.fromkeys(body.courses):
+            parsed = split_course_id(course_id)
+            if parsed:
+                courses[course_id] = parsed
+
+        snapshot = cache.get_open_snapshot()
+        if snapshot.version:
+            rows = open_query_service.run_open_query_batch(snapshot.columns, filters, courses)
+        else:
+            rows = open_class_query_crud.run_open_query_batch(filters, courses)
+        return {
+            course_id: group_rows(rows[course_id]) if course_id in rows else []
+            for course_id in dict.fromkeys(body.courses)
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/tda/upload")
 async def prase_tda(file: UploadFile = File(...)):
     if file.content_type not in ["application/pdf", "application/octet-stream"]:
@@ -383,8 +292,9 @@ async def prase_tda(file: UploadFile = File(...)):
     try:
         contents = await file.read()
         
-        # Parse the TDA to get courses the student is allowed to take
-        audit_data = PDF_parser.parse_tda(contents, file.filename)
+        # Parse the TDA to get courses the student is allowed to take.
+        # The OpenAI call takes seconds, so it runs on the tda lane, off the event loop
+        audit_data = await executors.run_blocking("tda", PDF_parser.parse_tda, contents, file.filename)
         if audit_data.get("status") == "error":
             raise HTTPException(status_code=400, detail=audit_data.get("errors", ["Unknown error"]))
         
@@ -395,7 +305,28 @@ async def prase_tda(file: UploadFile = File(...)):
         return {
             "Open Classes:": eligible_classes
         }
-    except HTTPException:
+    except (HTTPException, executors.LaneFull):
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Upload failed: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Upload failed: {e}")
+
+
+@router.post("/tda/upload/stream")
+async def parse_tda_stream(file: UploadFile = File(...)):
+    # /tda/upload as server-sent events (services/tda_stream_service.py):
+    # stage events, then each course's open sections as soon as the course is known
+    if file.content_type not in ["application/pdf", "application/octet-stream"]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid file type: {file.content_type}. Only PDF files are allowed!"
+        )
+    contents = await file.read()
+    body = tda_stream_service.start(contents, file.filename)
+    return StreamingResponse(body, media_type="text/event-stream", headers=sse.SSE_HEADERS)
+
+
+@router.delete("/tda/cache")
+def clear_tda_cache():
+    # Drops every cached TDA parse, e.g. after a change to the parsing code
+    # (prompt or model changes already start a fresh cache)
+    return {"removed": tda_cache_service.invalidate()}
@@ -0,0 +1,17 @@
+## ingest_router.py
+from fastapi import APIRouter, HTTPException
+from services import ingest_jobs_service
+
+router = APIRouter()
+
+@router.get("/ingest/jobs")
+def get_ingest_jobs():
+    # queued/running jobs with live counters, then the latest finished ones
+    return ingest_jobs_service.recent_jobs()
+
+@router.get("/ingest/jobs/{job_id}")
+def get_ingest_job(job_id: str):
+    job = ingest_jobs_service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingest job not found!")
+    return job
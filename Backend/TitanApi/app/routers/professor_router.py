@@ -99,3 +99,14 @@ def get_professor_rating(professor_name: str = Query(..., description="Professor
         }
 
         return data
+
+
+def cached_ratings() -> dict:
+    """{professor name: overall_rating} of the fresh cache entries that found one (no scraping)."""
+    now = time.time()
+    ratings = {}
+    for name, cached in list(RMP_CACHE.items()):
+        data = cached["data"]
+        if now - cached["timestamp"] < CACHE_TTL and data.get("found") and data.get("overall_rating") is not None:
+            ratings[name] = data["overall_rating"]
+    return ratings
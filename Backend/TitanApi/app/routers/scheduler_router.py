@@ -1,21 +1,108 @@
 from fastapi import APIRouter, HTTPException
-from services import scheduler_service
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi.responses import StreamingResponse
+from services import executors, schedule_engine, scheduler_service, sse
+from routers.professor_router import cached_ratings
+from pydantic import BaseModel, Field, field_validator
+from typing import Dict, List, Optional
 
 router = APIRouter()
 
 class CompletedModel(BaseModel):
     completed: List[str] = []
     max_units: Optional[int] = 15
+    courses: List[str] = Field([], max_length=schedule_engine.MAX_COURSES)  # e.g. a TDA's courses_allowed
+    term: Optional[str] = None              # default: the latest term in the snapshot
+    top_k: Optional[int] = Field(None, ge=1, le=schedule_engine.MAX_TOP_K)
+    time_budget_ms: Optional[float] = Field(None, gt=0, le=schedule_engine.MAX_TIME_BUDGET_MS)
 
 @router.post("/schedule/next-semester")
-def generate_schedule(payload: CompletedModel):
+async def generate_schedule(payload: CompletedModel):
     try:
-        result = scheduler_service.generate_next_semester_schedule(
-            payload.completed, 
-            max_units=payload.max_units or 15
+        result = await executors.run_blocking(
+            "schedule",
+            scheduler_service.generate_next_semester_schedule,
+            payload.completed,
+            max_units=payload.max_units or 15,
+            courses=payload.courses,
+            term=payload.term,
+            top_k=payload.top_k,
+            time_budget_ms=payload.time_budget_ms,
         )
         return {"data": result}
+    except executors.LaneFull:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+class EnumerateModel(BaseModel):
+    courses: List[str] = Field(max_length=schedule_engine.MAX_COURSES)  # e.g. a TDA's courses_allowed
+    required: List[str] = Field([], max_length=schedule_engine.MAX_COURSES)  # counted first in the score
+    max_units: float = 15
+    term: Optional[str] = None              # default: the latest term in the snapshot
+    top_k: Optional[int] = Field(None, ge=1, le=schedule_engine.MAX_TOP_K)
+    time_budget_ms: Optional[float] = Field(None, gt=0, le=schedule_engine.MAX_TIME_BUDGET_MS)
+    # preferences, as on the generate page
+    preferred_days: List[str] = []          # "Mon", "Wed", ... ([] = any day)
+    preferred_times_by_day: Dict[str, List[str]] = {}  # {"Mon": ["09:00", "13:00-15:00"]}
+    professor_ratings: Dict[str, float] = {}  # on top of the Rate My Professor cache
+    hard_preferences: bool = False          # drop sections outside the days/times instead of penalizing them
+
+    @field_validator("preferred_times_by_day")
+    def check_times(cls, v):
+        for day, times in v.items():
+            for t in times:
+                try:
+                    schedule_engine.time_window(t)
+                except ValueError as e:
+                    raise ValueError(f"{day}: {e} (expected HH:MM or HH:MM-HH:MM)")
+        return v
+
+
+@router.post("/schedule/enumerate")
+async def enumerate_schedules(payload: EnumerateModel, stream: bool = False):
+    """
+    Best top_k conflict-free schedules by a branch and bound search
+    (services/schedule_engine.py). stream=true answers with server-sent
+    events: "improved" with each new best schedule as the search finds it,
+    then "done" with the same body the JSON answer has under "data".
+    """
+    try:
+        prefs = schedule_engine.preferences(
+            days=payload.preferred_days,
+            times_by_day=payload.preferred_times_by_day,
+            ratings={**cached_ratings(), **payload.professor_ratings},
+            hard=payload.hard_preferences,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid preferences: {e}")
+    args = (payload.courses, payload.required, payload.max_units, payload.term,
+            payload.top_k, payload.time_budget_ms, prefs)
+
+    if not stream:
+        try:
+            result = await executors.run_blocking("schedule", scheduler_service.enumerate_schedules, *args)
+            return {"data": result}
+        except executors.LaneFull:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    def produce(emit):
+        try:
+            result = scheduler_service.enumerate_schedules(*args, on_improve=lambda s: emit(("improved", s)))
+            emit(("done", result))
+        except executors.StreamClosed:
+            raise
+        except Exception as e:
+            emit(("error", {"detail": str(e)}))
+
+    async def body(items):
+        try:
+            async for item in items:
+                yield sse.KEEPALIVE if item is None else sse.event(*item)
+        finally:
+            await items.aclose()  # ends the search if the client went away
+
+    items = executors.stream("schedule", produce, idle_seconds=15.0)
+    return StreamingResponse(body(items), media_type="text/event-stream", headers=sse.SSE_HEADERS)
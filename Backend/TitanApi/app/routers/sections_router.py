@@ -1,11 +1,14 @@
+from typing import Optional
+
 from fastapi import FastAPI, APIRouter, HTTPException, File, UploadFile
-from services import sections_csv, sections_service
+from services import sections_csv, csv_stream, executors, sections_service
 from crud import sections_crud
+import cache
 
 router = APIRouter()
 
 @router.post("/sections/upload")
-async def upload_sections_csv(file: UploadFile = File(...)):
+async def upload_sections_csv(file: UploadFile = File(...), parallel: Optional[bool] = None):
     # Check if CSV file
     if file.content_type != "text/csv":
         raise HTTPException(
@@ -13,13 +16,26 @@ async def upload_sections_csv(file: UploadFile = File(...)):
             detail=f"Invalid file type: {file.content_type}. Only CSV files are allowed!"
         )
 
-    contents = await file.read()
+    # The load writes SQLite, so it waits its turn on the db_write lane (services/executors.py);
+    # the CPU pool checks the chunks of big files (parallel=true/false to choose)
+    return await executors.run_blocking("db_write", load_sections_csv, file, executors.use_cpu_pool(parallel, file.size))
+
 
-    rows_inserted = sections_csv.scrape_sections_csv(contents, table_name="section")
+def load_sections_csv(file: UploadFile, parallel: bool):
+    # Streamed from the spooled upload in chunks (see services/csv_stream.py)
+    progress = csv_stream.start_progress("sections", file.filename, file.size)
+    status = "error"
+    try:
+        rows_inserted = sections_csv.scrape_sections_csv(file.file, table_name="section", progress=progress, parallel=parallel)
+        status = rows_inserted["status"]
+    finally:
+        csv_stream.finish_progress(progress, status)
     if rows_inserted["status"] == "error":
         return rows_inserted
     else:
         rows_inserted.pop("status")
+        # /open/query reads the snapshot, so republish it
+        cache.rebuild_open_cache()
         return{"message": f"Inserted {rows_inserted} rows into the  'section' table."}
     
 
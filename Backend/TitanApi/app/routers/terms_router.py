@@ -1,6 +1,7 @@
 ## terms_router.python
 from fastapi import FastAPI, APIRouter, HTTPException
 from crud import terms_crud
+import cache
 
 router = APIRouter()
 
@@ -21,6 +22,8 @@ def delete_terms(term_id: int | None = None, term: str | None = None):
     ok = terms_crud.delete_terms(term_id=term_id, term=term)
     if not ok:
          raise HTTPException(status_code=404, detail="Term not found")
+    # sections of the term went with it (ON DELETE CASCADE)
+    cache.rebuild_open_cache()
     return None
 
 @router.post("/terms/{term}")
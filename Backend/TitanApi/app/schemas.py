@@ -1,4 +1,4 @@
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List
 
 def _coerce_int(v, field):
@@ -64,7 +64,7 @@ class MeetingIn(BaseModel):
     # meeting_id : int
     term_id: int
     crn: str
-    day_of_week: int
+    day_of_week: int = Field(ge=-1, le=7)  # -1 = no set day (online/TBA), as meeting's CHECK
     start_min: int
     end_min: int
     room: str
@@ -77,9 +77,43 @@ class MeetingIn(BaseModel):
     @field_validator("term_id", "day_of_week", "start_min", "end_min", mode="before")
     def to_int_fields(cls, v, info):
         return _coerce_int(v, info.field_name)
+
+    @field_validator("end_min")
+    def end_after_start(cls, v, info):
+        # Meetings on a day must end after they start; day -1 rows carry -1/-1
+        day, start = info.data.get("day_of_week"), info.data.get("start_min")
+        if day is not None and day != -1 and start is not None and v <= start:
+            raise ValueError(f"end_min must be after start_min ({start})")
+        return v
     
     # @field_validator("section",mode="before")
     # def to_str(cls, v):
     #     if v is None:
     #         raise ValueError("section is a required field!")
     #     return str(v).strip()
+
+class OpenQueryFilters(BaseModel):
+    # Filters accepted by /open/query, already normalized by the router
+    term: Optional[str] = None
+    subject: Optional[str] = None
+    course: Optional[str] = None
+    crn: Optional[str] = None
+    only_open: bool = True
+    time_start: Optional[int] = None
+    time_end: Optional[int] = None
+    days: List[int] = []          # 1..7
+    days_mode: str = "any"        # "any" or "all"
+    modality: Optional[str] = None  # "online", "inperson", "hybrid" or None
+
+
+class OpenQueryBatch(BaseModel):
+    # POST /open/query/batch: course ids ("CPSC 131") plus the /open/query
+    # filters shared by all of them, in the same raw form as the query params
+    courses: List[str]
+    term: Optional[str] = None
+    only_open: bool = True
+    time_start: Optional[int] = None
+    time_end: Optional[int] = None
+    days: Optional[str] = None
+    days_mode: str = "any"
+    modality: Optional[str] = None
@@ -1,24 +1,358 @@
 import pandas as pd
+import numpy as np
+import hashlib
 import io
+import json
 import sqlite3
+import time
 from db import get_conn
 from schemas import SectionIn, MeetingIn, CourseIn
+from services import csv_stream, executors, meetings_csv, sections_csv, table_loader
 from pydantic import ValidationError
-from typing import Any, Dict, List
-
-# Helper function to convert term -> term_id (create if missing)
-def get_or_create_term_id(term_input: str) -> int:
-    with get_conn() as c:
-        row = c.execute(
-            "SELECT term_id FROM term WHERE term = ?",
-            (term_input,)
-        ).fetchone()
-
-        if row:
-            return row[0]
+from typing import Any, Dict, List, Optional
+
+# Ingest runs in one transaction and never holds more than one chunk of rows:
+#   1) the CSV is read chunk by chunk into TEMP stage_raw with executemany
+#   2) terms, then sections (last row per (term, crn)), then meetings are read
+#      back from stage_raw in batches and checked column by column against
+#      the SectionIn/MeetingIn specs (services/table_loader.py); only rows
+#      that fail a check are built into the model, so rejected rows get the
+#      same per-row messages as before
+#      (parallel=True: the batches are cut per term and checked in the CPU
+#      pool of services/executors.py; this connection stays the only writer)
+#   3) accepted rows go into stage_section / stage_meeting
+#   4) delta: each staged (term_id, crn) gets a digest of its section fields
+#      and meetings, compared with section_digest (computed from the tables
+#      when missing) -> new / changed / unchanged, plus removed when pruning
+#   5) INSERT ... SELECT ... ON CONFLICT per table writes only new and
+#      changed sections and their meetings; unchanged ones are not touched
+# Any error result rolls the whole file back.
+
+RAW_COLUMNS = [
+    "term", "course_id", "crn", "section", "day_of_week", "start_min", "end_min",
+    "room", "instruction_mode", "professor", "status",
+]
+
+STAGING_TABLES = {
+    # untyped columns keep the parsed Python values (str/int/None) as they are
+    "stage_raw": "row INTEGER PRIMARY KEY, " + ", ".join(RAW_COLUMNS),
+    "stage_section": """
+        row INTEGER NOT NULL, crn TEXT, course_id TEXT, term_id INTEGER, section TEXT,
+        instruction_mode TEXT, professor TEXT, status TEXT
+    """,
+    "stage_meeting": """
+        row INTEGER NOT NULL, term_id INTEGER, crn TEXT, day_of_week INTEGER,
+        start_min INTEGER, end_min INTEGER, room TEXT
+    """,
+    # keys with at least one rejected meeting row: their other meetings are
+    # upserted but never deleted, since the file does not say what they are
+    "stage_meeting_rejected": "term_id INTEGER, crn TEXT, PRIMARY KEY (term_id, crn)",
+    # what the file says each section should look like (first row per key, as
+    # ON CONFLICT DO NOTHING used to keep)
+    "stage_next_section": """
+        term_id INTEGER NOT NULL, crn TEXT NOT NULL, row INTEGER NOT NULL, course_id TEXT,
+        section TEXT, instruction_mode TEXT, professor TEXT, status TEXT,
+        PRIMARY KEY (term_id, crn)
+    """,
+    "stage_next_meeting": """
+        term_id INTEGER NOT NULL, crn TEXT NOT NULL, day_of_week INTEGER NOT NULL,
+        row INTEGER NOT NULL, start_min INTEGER, end_min INTEGER, room TEXT,
+        PRIMARY KEY (term_id, crn, day_of_week)
+    """,
+    # kind: new / changed / unchanged / removed
+    "stage_delta": "term_id INTEGER NOT NULL, crn TEXT NOT NULL, kind TEXT, digest TEXT, PRIMARY KEY (term_id, crn)",
+    # every (term_id, crn) the file mentions, valid or not; pruning spares them
+    "stage_file_key": "term_id INTEGER NOT NULL, crn TEXT NOT NULL, PRIMARY KEY (term_id, crn)",
+    # sections that only got meetings added through APPLY_EXTRA_MEETINGS
+    "stage_extra_key": "term_id INTEGER NOT NULL, crn TEXT NOT NULL, PRIMARY KEY (term_id, crn)",
+}
+STAGING_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS temp.idx_stage_raw_key ON stage_raw(term, crn)",
+    "CREATE INDEX IF NOT EXISTS temp.idx_stage_section_key ON stage_section(term_id, crn)",
+]
+
+STAGE_RAW = (
+    f"INSERT INTO temp.stage_raw (row, {', '.join(RAW_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in range(len(RAW_COLUMNS) + 1))})"
+)
+# Distinct terms in order of their last row, like drop_duplicates(keep="last")
+APPLY_TERMS = """
+    INSERT INTO term (term)
+    SELECT CAST(term AS TEXT) FROM temp.stage_raw
+    WHERE term IS NOT NULL
+    GROUP BY term ORDER BY MAX(row)
+    ON CONFLICT(term) DO NOTHING
+"""
+# One section per (crn, term): the last row wins
+SECTION_ROWS = f"""
+    SELECT row, {', '.join(RAW_COLUMNS)} FROM temp.stage_raw
+    WHERE row IN (SELECT MAX(row) FROM temp.stage_raw GROUP BY term, crn)
+    ORDER BY row
+"""
+MEETING_ROWS = f"SELECT row, {', '.join(RAW_COLUMNS)} FROM temp.stage_raw ORDER BY row"
+
+# Same rows, one term (partition) at a time, for parallel=True
+RAW_TERMS = "SELECT term FROM temp.stage_raw GROUP BY term ORDER BY MIN(row)"
+TERM_SECTION_ROWS = f"""
+    SELECT row, {', '.join(RAW_COLUMNS)} FROM temp.stage_raw
+    WHERE row IN (SELECT MAX(row) FROM temp.stage_raw WHERE term IS ? GROUP BY crn)
+    ORDER BY row
+"""
+TERM_MEETING_ROWS = f"SELECT row, {', '.join(RAW_COLUMNS)} FROM temp.stage_raw WHERE term IS ? ORDER BY row"
+# Sections a meeting of the term can belong to: stored or staged from this file
+TERM_SECTIONS = """
+    SELECT term_id, crn FROM section WHERE term_id = ?
+    UNION SELECT term_id, crn FROM temp.stage_section WHERE term_id = ?
+"""
+
+# -----------------------
+# Delta
+# -----------------------
+NEXT_SECTIONS = """
+    INSERT INTO temp.stage_next_section
+    SELECT term_id, crn, MIN(row), course_id, section, instruction_mode, professor, status
+    FROM temp.stage_section GROUP BY term_id, crn
+"""
+# First row per day, like ON CONFLICT(term_id, crn, day_of_week) DO NOTHING
+NEXT_MEETINGS = """
+    INSERT INTO temp.stage_next_meeting
+    SELECT m.term_id, m.crn, m.day_of_week, MIN(m.row), m.start_min, m.end_min, m.room
+    FROM temp.stage_meeting m
+    WHERE EXISTS (
+        SELECT 1 FROM temp.stage_next_section n WHERE n.term_id = m.term_id AND n.crn = m.crn
+    )
+    GROUP BY m.term_id, m.crn, m.day_of_week
+"""
+# Section fields + meetings by day; DIGEST_STATE reads the file's version,
+# TABLE_STATE the current one for keys that have no stored digest yet
+_STATE = """
+    SELECT s.term_id, s.crn, s.course_id, s.section, s.instruction_mode, s.professor, s.status,
+        (SELECT json_group_array(json_array(day_of_week, start_min, end_min, room)) FROM (
+            SELECT day_of_week, start_min, end_min, room FROM {meetings} m
+            WHERE m.term_id = s.term_id AND m.crn = s.crn ORDER BY day_of_week
+        ))
+"""
+DIGEST_STATE = _STATE.format(meetings="temp.stage_next_meeting") + "FROM temp.stage_next_section s"
+TABLE_STATE = _STATE.format(meetings="meeting") + """
+    FROM temp.stage_delta d JOIN section s ON s.term_id = d.term_id AND s.crn = d.crn
+    WHERE d.kind IS NULL
+"""
+STORE_DIGEST = """
+    INSERT INTO section_digest (term_id, crn, digest) VALUES (?, ?, ?)
+    ON CONFLICT(term_id, crn) DO UPDATE SET digest = excluded.digest
+"""
+# Leaves kind NULL for sections that exist but have no stored digest
+CLASSIFY = """
+    UPDATE temp.stage_delta SET kind = CASE
+        WHEN NOT EXISTS (
+            SELECT 1 FROM section s WHERE s.term_id = stage_delta.term_id AND s.crn = stage_delta.crn
+        ) THEN 'new'
+        ELSE (
+            SELECT CASE WHEN g.digest = stage_delta.digest THEN 'unchanged' ELSE 'changed' END
+            FROM section_digest g WHERE g.term_id = stage_delta.term_id AND g.crn = stage_delta.crn
+        )
+    END
+    WHERE kind IS NULL
+"""
+FILE_KEYS = """
+    INSERT OR IGNORE INTO temp.stage_file_key
+    SELECT t.term_id, TRIM(r.crn) FROM temp.stage_raw r JOIN term t ON t.term = CAST(r.term AS TEXT)
+    WHERE r.crn IS NOT NULL
+    UNION ALL
+    SELECT term_id, crn FROM temp.stage_next_section
+"""
+# Sections of the (term, subject) pairs in the file that the file no longer lists
+REMOVED = """
+    INSERT INTO temp.stage_delta (term_id, crn, kind)
+    SELECT s.term_id, s.crn, 'removed'
+    FROM section s JOIN course c ON c.course_id = s.course_id
+    WHERE (s.term_id, c.subject) IN (
+        SELECT DISTINCT n.term_id, nc.subject
+        FROM temp.stage_next_section n JOIN course nc ON nc.course_id = n.course_id
+    )
+    AND NOT EXISTS (
+        SELECT 1 FROM temp.stage_file_key k WHERE k.term_id = s.term_id AND k.crn = s.crn
+    )
+"""
+DELTA_COUNTS = "SELECT kind, COUNT(*) FROM temp.stage_delta GROUP BY kind"
 
-        c.execute("INSERT INTO term (term) VALUES (?)", (term_input,))
-        return c.lastrowid
+APPLY_SECTIONS = """
+    INSERT INTO section (
+        crn, course_id, term_id, section,
+        instruction_mode, professor, status
+    )
+    SELECT n.crn, n.course_id, n.term_id, n.section, n.instruction_mode, n.professor, n.status
+    FROM temp.stage_next_section n
+    JOIN temp.stage_delta d ON d.term_id = n.term_id AND d.crn = n.crn
+    WHERE d.kind IN ('new', 'changed') ORDER BY n.row
+    ON CONFLICT(term_id, crn) DO UPDATE SET
+        course_id = excluded.course_id,
+        section = excluded.section,
+        instruction_mode = excluded.instruction_mode,
+        professor = excluded.professor,
+        status = excluded.status
+    WHERE course_id IS NOT excluded.course_id
+       OR section IS NOT excluded.section
+       OR instruction_mode IS NOT excluded.instruction_mode
+       OR professor IS NOT excluded.professor
+       OR status IS NOT excluded.status
+"""
+# Days a changed section no longer meets on (skipped when a row of it was rejected)
+DROP_MEETINGS = """
+    DELETE FROM meeting
+    WHERE (term_id, crn) IN (
+        SELECT term_id, crn FROM temp.stage_delta WHERE kind = 'changed'
+        EXCEPT SELECT term_id, crn FROM temp.stage_meeting_rejected
+    )
+    AND NOT EXISTS (
+        SELECT 1 FROM temp.stage_next_meeting n
+        WHERE n.term_id = meeting.term_id AND n.crn = meeting.crn AND n.day_of_week = meeting.day_of_week
+    )
+"""
+APPLY_MEETINGS = """
+    INSERT INTO meeting (
+        term_id, crn, day_of_week, start_min, end_min, room
+    )
+    SELECT n.term_id, n.crn, n.day_of_week, n.start_min, n.end_min, n.room
+    FROM temp.stage_next_meeting n
+    JOIN temp.stage_delta d ON d.term_id = n.term_id AND d.crn = n.crn
+    WHERE d.kind = ? ORDER BY n.row
+    ON CONFLICT(term_id, crn, day_of_week) DO UPDATE SET
+        start_min = excluded.start_min,
+        end_min = excluded.end_min,
+        room = excluded.room
+    WHERE start_min IS NOT excluded.start_min
+       OR end_min IS NOT excluded.end_min
+       OR room IS NOT excluded.room
+"""
+# Meetings whose own section row was rejected but whose section is already in
+# the table: added as before, never overwriting
+APPLY_EXTRA_MEETINGS = """
+    INSERT INTO meeting (
+        term_id, crn, day_of_week, start_min, end_min, room
+    )
+    SELECT term_id, crn, day_of_week, start_min, end_min, room
+    FROM temp.stage_meeting m
+    WHERE NOT EXISTS (
+        SELECT 1 FROM temp.stage_next_section n WHERE n.term_id = m.term_id AND n.crn = m.crn
+    )
+    ORDER BY row
+    ON CONFLICT(term_id, crn, day_of_week) DO NOTHING
+    RETURNING term_id, crn
+"""
+REMOVED_MEETINGS = """
+    SELECT COUNT(*) FROM meeting
+    WHERE (term_id, crn) IN (SELECT term_id, crn FROM temp.stage_delta WHERE kind = 'removed')
+"""
+APPLY_REMOVED = """
+    DELETE FROM section
+    WHERE (term_id, crn) IN (SELECT term_id, crn FROM temp.stage_delta WHERE kind = 'removed')
+"""
+# Digests of sections now stored exactly as the file has them
+STORE_DIGESTS = """
+    INSERT INTO section_digest (term_id, crn, digest)
+    SELECT d.term_id, d.crn, d.digest FROM temp.stage_delta d
+    WHERE d.kind IN ('new', 'changed')
+    AND NOT EXISTS (
+        SELECT 1 FROM temp.stage_meeting_rejected r WHERE r.term_id = d.term_id AND r.crn = d.crn
+    )
+    ON CONFLICT(term_id, crn) DO UPDATE SET digest = excluded.digest
+"""
+# (term, crn) groups the open class cache has to re-read
+TOUCHED_KEYS = """
+    SELECT t.term, d.crn FROM temp.stage_delta d JOIN term t ON t.term_id = d.term_id
+    WHERE d.kind != 'unchanged'
+    UNION
+    SELECT t.term, k.crn FROM temp.stage_extra_key k JOIN term t ON t.term_id = k.term_id
+"""
+DELTA_KINDS = ("new", "changed", "unchanged", "removed")
+
+# SQLite caps bound parameters per statement, so section lookups go in chunks
+KEY_CHUNK = 400
+
+
+class IngestAborted(Exception):
+    """Carries an error result out of the transaction so get_conn rolls it back."""
+
+    def __init__(self, result: Dict[str, Any]):
+        super().__init__(result.get("errors"))
+        self.result = result
+
+
+def _lap(timings: Dict[str, float], stage: str, since: float) -> float:
+    # add the time since `since` to a stage (ms) and restart the clock
+    now = time.perf_counter()
+    timings[stage] = timings.get(stage, 0.0) + (now - since) * 1000
+    return now
+
+
+def _create_staging(c):
+    for name, cols in STAGING_TABLES.items():
+        c.execute(f"CREATE TEMP TABLE IF NOT EXISTS {name} ({cols})")
+        c.execute(f"DELETE FROM temp.{name}")
+    for ddl in STAGING_INDEXES:
+        c.execute(ddl)
+
+
+def _clear_staging(c):
+    for name in STAGING_TABLES:
+        c.execute(f"DELETE FROM temp.{name}")
+
+
+def _raw_batches(c, query: str, batch_rows: int, params=()):
+    """stage_raw rows as DataFrames indexed by source row, batch_rows at a time."""
+    cur = c.cursor()
+    cur.row_factory = None
+    cur.execute(query, params)
+    while True:
+        rows = cur.fetchmany(batch_rows)
+        if not rows:
+            return
+        # dtype=object keeps None as None (no NaN/NA inference)
+        yield pd.DataFrame(
+            [r[1:] for r in rows],
+            index=[r[0] for r in rows],
+            columns=RAW_COLUMNS,
+            dtype=object,
+        )
+
+
+def _error_row(message: str) -> int:
+    # every check message starts with "row <n>"
+    return int(message.split(None, 2)[1].rstrip(":"))
+
+
+def get_term_ids(c) -> Dict[str, int]:
+    """term name -> term_id, one query for the whole file."""
+    return {term: term_id for term, term_id in c.execute("SELECT term, term_id FROM term").fetchall()}
+
+
+def _term_id_column(terms: pd.Series, term_ids: Dict[str, int]) -> List[Any]:
+    return [None if t is None else term_ids.get(str(t)) for t in terms]
+
+
+def _existing_sections(c, pairs) -> set:
+    """The (term_id, crn) pairs among `pairs` that are in the section table or staged to be."""
+    crns_by_term: Dict[int, set] = {}
+    for term_id, crn in pairs:
+        if term_id is not None and crn is not None:
+            crns_by_term.setdefault(term_id, set()).add(crn)
+
+    found = set()
+    for term_id, crns in crns_by_term.items():
+        crns = list(crns)
+        for i in range(0, len(crns), KEY_CHUNK):
+            chunk = crns[i:i + KEY_CHUNK]
+            ph = ",".join("?" for _ in chunk)
+            found.update(
+                (row[0], row[1])
+                for row in c.execute(
+                    f"SELECT term_id, crn FROM section WHERE term_id = ? AND crn IN ({ph}) "
+                    f"UNION SELECT term_id, crn FROM temp.stage_section WHERE term_id = ? AND crn IN ({ph})",
+                    (term_id, *chunk, term_id, *chunk),
+                )
+            )
+    return found
 
 
 REQUIRED_HEADERS = {
@@ -27,271 +361,358 @@ REQUIRED_HEADERS = {
     "room", "instruction_mode", "professor", "status"
 }
 
+READ_CSV_OPTIONS = dict(
+    dtype={
+        "term": "string",
+        "course_id": "string",
+        "crn": "string",
+        "section": "string",
+        "instruction_mode": "string",
+        "professor": "string",
+        "status": "string",
+        "room": "string",
+    },
+    converters={
+        # Safely parse numeric meeting fields if present; keep missing as NA
+        "day_of_week": lambda x: None if x == "" or pd.isna(x) else int(float(x)),
+        "start_min":   lambda x: None if x == "" or pd.isna(x) else int(float(x)),
+        "end_min":     lambda x: None if x == "" or pd.isna(x) else int(float(x)),
+    },
+    keep_default_na=True,  # keep NaN for truly missing
+)
+
+
+def scrape_csv(file_bytes: bytes, prune: bool = False, parallel: bool = False):
+    return scrape_csv_stream(io.BytesIO(file_bytes), prune=prune, parallel=parallel)
+
+
+def scrape_csv_stream(stream, progress: Optional[dict] = None, chunk_rows: int = csv_stream.CHUNK_ROWS,
+                      prune: bool = False, parallel: bool = False):
+    """
+    Ingest an open-classes CSV from a binary file object without reading it
+    all into memory. `progress` (see csv_stream.start_progress) is updated
+    after every chunk/batch. With prune=True, sections of the file's
+    (term, subject) pairs that the file no longer lists are deleted.
+    With parallel=True the rows are checked per term in worker processes;
+    the result is the same.
+    """
+    progress = progress if progress is not None else {}
+    timings: Dict[str, float] = {}
+    started = clock = time.perf_counter()
 
-def scrape_csv(file_bytes: bytes):
-    # 1) Load file into df and normalize
-    df = pd.read_csv(
-        io.BytesIO(file_bytes),
-        dtype={
-            "term": "string",
-            "course_id": "string",
-            "crn": "string",
-            "section": "string",
-            "instruction_mode": "string",
-            "professor": "string",
-            "status": "string",
-            "room": "string",
-        },
-        converters={
-            # Safely parse numeric meeting fields if present; keep missing as NA
-            "day_of_week": lambda x: None if x == "" or pd.isna(x) else int(float(x)),
-            "start_min":   lambda x: None if x == "" or pd.isna(x) else int(float(x)),
-            "end_min":     lambda x: None if x == "" or pd.isna(x) else int(float(x)),
-        },
-        keep_default_na=True,  # keep NaN for truly missing
-    )
-
-    # Normalize column names
-    df.columns = df.columns.str.strip().str.lower()
-
-    # 2) Validate headers
-    missing = [c for c in REQUIRED_HEADERS if c not in df.columns]
+    # 1) Validate headers
+    columns = csv_stream.read_header(stream)
+    missing = [c for c in REQUIRED_HEADERS if c not in columns]
     if missing:
         return {"status": "error", "errors": [f"Missing columns: {missing}"]}
 
-    # NaN -> None
-    df = df.where(pd.notna(df), None)
-
-    terms_table = ["term"]
-    meetings_table = ["term", "crn", "day_of_week", "start_min", "end_min", "room"]
-    sections_table = ["crn", "course_id", "term", "section", "instruction_mode", "professor", "status"]
-
-    # Insert terms
-    term_status = scrape_term(df, terms_table)
-    if term_status.get("status") == "error":
-        return term_status
-
-    # Insert sections (may skip some)
-    section_status = scrape_sections(df, sections_table)
-    if section_status.get("status") == "error":
-        return section_status
-
-    # Insert meetings (may skip some)
-    meeting_status = scrape_meetings(df, meetings_table)
-    if meeting_status.get("status") == "error":
-        return meeting_status
+    try:
+        with get_conn() as c:
+            _create_staging(c)
+
+            # 2) Load file into stage_raw, one chunk at a time
+            progress["phase"] = "reading"
+            for chunk in csv_stream.iter_chunks(stream, progress, chunk_rows, **READ_CSV_OPTIONS):
+                c.executemany(STAGE_RAW, zip(chunk.index.tolist(), *(chunk[col] for col in RAW_COLUMNS)))
+            clock = _lap(timings, "read_ms", clock)
+
+            # Insert terms
+            progress["phase"] = "terms"
+            term_status = scrape_term(c, timings)
+
+            if parallel:
+                progress["workers"] = executors.CPU_WORKERS
+
+            # Check and stage sections (may skip some)
+            progress["phase"] = "sections"
+            section_status = scrape_sections(c, timings, progress, chunk_rows, parallel)
+            if section_status.get("status") == "error":
+                raise IngestAborted(section_status)
+
+            # Check and stage meetings (may skip some)
+            progress["phase"] = "meetings"
+            meeting_status = scrape_meetings(c, timings, progress, chunk_rows, parallel)
+            if meeting_status.get("status") == "error":
+                raise IngestAborted(meeting_status)
+
+            # Compare with what is stored, then write only the difference
+            progress["phase"] = "delta"
+            delta = scrape_delta(c, timings, chunk_rows, prune)
+            progress["delta"] = delta
+            progress["phase"] = "applying"
+            try:
+                applied = apply_delta(c, timings, delta)
+            except sqlite3.Error as e:
+                raise IngestAborted({"status": "error", "errors": [f"DB error:: {e}"]})
+
+            # (term, crn) groups this file changed, so the open class cache can refresh just those
+            keys = {(str(term), str(crn).strip()) for term, crn in c.execute(TOUCHED_KEYS)}
+            _clear_staging(c)
+    except IngestAborted as e:
+        return e.result
+
+    _lap(timings, "total_ms", started)
 
     return {
         "status": "ok",
+        "keys": keys,
         "inserted": {
             "terms": term_status.get("inserted_terms", 0),
-            "sections": section_status.get("inserted", 0),
-            "meetings": meeting_status.get("inserted", 0),
+            "sections": applied["sections_inserted"],
+            "meetings": applied["meetings_inserted"],
+        },
+        "updated": {
+            "sections": applied["sections_updated"],
+            "meetings": applied["meetings_updated"],
         },
+        "deleted": {
+            "sections": applied["sections_deleted"],
+            "meetings": applied["meetings_deleted"],
+        },
+        "delta": delta,
         "errors": section_status.get("errors", []) + meeting_status.get("errors", []),
+        "timings": {stage: round(ms, 2) for stage, ms in timings.items()},
     }
 
 
-def scrape_term(df: pd.DataFrame, keep_terms):
-    # Only unique terms
-    df = df.drop_duplicates(subset=["term"], keep="last")
-
-    insert_query = """
-        INSERT OR IGNORE INTO term (term) VALUES (?)
-    """
-    inserted_count = 0
-    with get_conn() as c:
-        before = c.total_changes
-        for term in df["term"].dropna():
-            c.execute(insert_query, (str(term),))
-        inserted_count = c.total_changes - before  # new rows
+def scrape_term(c, timings: Dict[str, float]):
+    clock = time.perf_counter()
+    inserted_count = c.execute(APPLY_TERMS).rowcount  # new rows
+    _lap(timings, "apply_ms", clock)
 
     return {"status": "ok", "inserted_terms": inserted_count}
 
 
-def scrape_sections(df: pd.DataFrame, keep_sections: List[str]):
-    # One section per (crn, term)
-    df = df.drop_duplicates(subset=["crn", "term"], keep="last")
+def check_sections(df: pd.DataFrame, term_ids: Dict[str, int], existing_course_ids: set):
+    """
+    (rows to stage, error messages) for one batch of deduplicated rows.
+    Staged rows are (row, crn, course_id, term_id, section, instruction_mode, professor, status).
+    """
+    term_id = _term_id_column(df["term"], term_ids)
+    has_course = df["course_id"].isin(existing_course_ids).to_numpy()
+    values, ok = table_loader.check_columns(sections_csv.SPEC, df.assign(term_id=term_id))
+    ok &= has_course
 
-    valid: List[SectionIn] = []
+    # Rows that pass every check, already in SectionIn's form
+    staged = list(zip(df.index[ok].tolist(), *(values[name][ok].tolist() for name in sections_csv.SPEC.names)))
     errors: List[str] = []
 
-    # Cache: term_name -> term_id
-    term_cache: dict[str, int] = {}
-    for term_name in df["term"].dropna().unique():
-        term_cache[term_name] = get_or_create_term_id(term_name)
-
-    # Cache: existing course_ids (so we can skip unknown courses)
-    with get_conn() as c:
-        rows = c.execute("SELECT course_id FROM course").fetchall()
-    existing_course_ids = {row[0] for row in rows}
-
-    # Build and validate section models
-    for i, row in df.iterrows():
-        cleaned_values = dict(row)
-
-        # Ensure expected keys exist
-        for k in keep_sections:
-            cleaned_values.setdefault(k, None)
-
-        # Convert term -> term_id
-        term_name = cleaned_values.pop("term", None)
-        if term_name is not None:
-            tid = term_cache.get(term_name)
-            if tid is None:
-                tid = get_or_create_term_id(term_name)
-                term_cache[term_name] = tid
-            cleaned_values["term_id"] = tid
-        else:
-            cleaned_values["term_id"] = None
-
-        # Skip rows whose course_id is not in the course table
+    # The rest: skip unknown courses, let Pydantic judge the others
+    fields = ["crn", "course_id", "section", "instruction_mode", "professor", "status"]
+    for pos in np.flatnonzero(~ok):
+        i = int(df.index[pos])
+        cleaned_values = {k: df[k].iat[pos] for k in fields}
+        cleaned_values["term_id"] = term_id[pos]
+
         course_id = cleaned_values.get("course_id")
-        if course_id is None or course_id not in existing_course_ids:
+        if not has_course[pos]:
             errors.append(
                 f"row {i+2}: Skipped section because course_id '{course_id}' does not exist in course table."
             )
             continue
 
-        # Validate with Pydantic
         try:
-            model = SectionIn(**cleaned_values)
-            valid.append(model)
+            m = SectionIn(**cleaned_values)
+            staged.append((i, m.crn, m.course_id, m.term_id, m.section, m.instruction_mode, m.professor, m.status))
         except ValidationError as e:
-            for err in e.errors():
-                field = ".".join(str(p) for p in err.get("loc", [])) or "<unknown>"
-                msg = err.get("msg", "Invalid value")
-                bad_val = cleaned_values.get(field, "<missing>")
-                errors.append(f"row {i+2} (field '{field}', value={bad_val!r}): {msg}")
+            errors.extend(table_loader.field_errors(i, cleaned_values, e))
 
-    if not valid:
-        return {"status": "error", "errors": errors or ["No valid section rows."]}
+    staged.sort(key=lambda r: r[0])
+    return staged, errors
+
+
+def scrape_sections(c, timings: Dict[str, float], progress: dict, batch_rows: int, parallel: bool = False):
+    clock = time.perf_counter()
+    term_ids = get_term_ids(c)
+    existing_course_ids = {row[0] for row in c.execute("SELECT course_id FROM course").fetchall()}
 
-    # Insert into DB
-    rows_inserted = 0
+    if not parallel:
+        batches = _raw_batches(c, SECTION_ROWS, batch_rows)
+    else:
+        terms = [row[0] for row in c.execute(RAW_TERMS).fetchall()]
+        batches = (df for term in terms for df in _raw_batches(c, TERM_SECTION_ROWS, batch_rows, (term,)))
+    tasks = ((df, term_ids, existing_course_ids) for df in batches)
+
+    staged_count = 0
+    errors: List[str] = []
     try:
-        with get_conn() as c:
-            before = c.total_changes
-            insert_query = """
-                INSERT OR IGNORE INTO section (
-                    crn, course_id, term_id, section,
-                    instruction_mode, professor, status
-                )
-                VALUES (?,?,?,?,?,?,?)
-            """
-            for m in valid:
-                c.execute(
-                    insert_query,
-                    (
-                        m.crn,
-                        m.course_id,
-                        m.term_id,
-                        m.section,
-                        m.instruction_mode,
-                        m.professor,
-                        m.status,
-                    ),
-                )
-            rows_inserted = c.total_changes - before
-    except Exception as e:
+        for rows, (staged, batch_errors) in executors.run_checks(check_sections, tasks, parallel):
+            errors.extend(batch_errors)
+            clock = _lap(timings, "validate_ms", clock)
+
+            c.executemany("INSERT INTO temp.stage_section VALUES (?,?,?,?,?,?,?,?)", staged)
+            staged_count += len(staged)
+            progress["sections_checked"] = progress.get("sections_checked", 0) + rows
+            progress["errors"] = progress.get("errors", 0) + len(batch_errors)
+            clock = _lap(timings, "stage_ms", clock)
+    except sqlite3.Error as e:
         return {"status": "error", "errors": [f"DB error:: {e}"]}
+    if parallel:
+        errors.sort(key=_error_row)  # batches came term by term
 
-    return {
-        "status": "ok",
-        "inserted": rows_inserted,
-        "ignored": len(valid) - rows_inserted,
-        "errors": errors,
-    }
+    if not staged_count:
+        return {"status": "error", "errors": errors or ["No valid section rows."]}
+
+    return {"status": "ok", "staged": staged_count, "errors": errors}
 
 
-def scrape_meetings(df: pd.DataFrame, keep_meetings: List[str]):
-    valid: List[MeetingIn] = []
+def check_meetings(df: pd.DataFrame, term_ids: Dict[str, int], existing_sections: set):
+    """
+    (rows to stage, error messages, rejected keys) for one batch of rows.
+    existing_sections holds the (term_id, crn) pairs the rows may belong to.
+    Staged rows are (row, term_id, crn, day_of_week, start_min, end_min, room);
+    rejected keys are the (term_id, crn) of sections that have a meeting row
+    the model turned down.
+    """
+    term_id = _term_id_column(df["term"], term_ids)
+
+    # Skip meetings whose section does not exist (sections of this file are staged by now)
+    in_section = np.fromiter(
+        ((t, crn) in existing_sections for t, crn in zip(term_id, df["crn"])),
+        dtype=bool, count=len(df),
+    )
+    values, ok = table_loader.check_columns(meetings_csv.SPEC, df.assign(term_id=term_id))
+    ok &= in_section
+
+    # Rows that pass every check, already in MeetingIn's form
+    staged = list(zip(df.index[ok].tolist(), *(values[name][ok].tolist() for name in meetings_csv.SPEC.names)))
     errors: List[str] = []
+    rejected = []
 
-    # Cache: term_name -> term_id
-    term_cache: dict[str, int] = {}
-    for term_name in df["term"].dropna().unique():
-        term_cache[term_name] = get_or_create_term_id(term_name)
-
-    # Cache: existing (term_id, crn) pairs from section
-    with get_conn() as c:
-        rows = c.execute("SELECT term_id, crn FROM section").fetchall()
-    existing_sections = {(row[0], row[1]) for row in rows}
-
-    # Build and validate meeting models
-    for i, row in df.iterrows():
-        cleaned_values = dict(row)
-
-        # Ensure expected keys exist
-        for k in keep_meetings:
-            cleaned_values.setdefault(k, None)
-
-        # Convert term -> term_id
-        term_name = cleaned_values.pop("term", None)
-        if term_name is not None:
-            tid = term_cache.get(term_name)
-            if tid is None:
-                tid = get_or_create_term_id(term_name)
-                term_cache[term_name] = tid
-            cleaned_values["term_id"] = tid
-        else:
-            cleaned_values["term_id"] = None
-
-        term_id = cleaned_values.get("term_id")
-        crn = cleaned_values.get("crn")
-
-        # Skip meetings whose section does not exist
-        if term_id is None or crn is None or (term_id, crn) not in existing_sections:
+    # The rest: report missing sections, let Pydantic judge the others
+    fields = ["crn", "day_of_week", "start_min", "end_min", "room"]
+    for pos in np.flatnonzero(~ok):
+        i = int(df.index[pos])
+        cleaned_values = {k: df[k].iat[pos] for k in fields}
+        cleaned_values["term_id"] = term_id[pos]
+
+        if not in_section[pos]:
             errors.append(
-                f"row {i+2}: Skipped meeting because section (term_id={term_id}, crn='{crn}') does not exist."
+                f"row {i+2}: Skipped meeting because section (term_id={term_id[pos]}, crn='{cleaned_values['crn']}') does not exist."
             )
             continue
 
-        # Validate with Pydantic
         try:
-            model = MeetingIn(**cleaned_values)
-            valid.append(model)
+            m = MeetingIn(**cleaned_values)
+            staged.append((i, m.term_id, m.crn, m.day_of_week, m.start_min, m.end_min, m.room))
         except ValidationError as e:
-            for err in e.errors():
-                field = ".".join(str(p) for p in err.get("loc", [])) or "<unknown>"
-                msg = err.get("msg", "Invalid value")
-                bad_val = cleaned_values.get(field, "<missing>")
-                errors.append(f"row {i+2} (field '{field}', value={bad_val!r}): {msg}")
+            errors.extend(table_loader.field_errors(i, cleaned_values, e))
+            rejected.append((term_id[pos], str(cleaned_values["crn"]).strip()))
 
-    if not valid:
-        return {"status": "error", "errors": errors or ["No valid rows."]}
+    staged.sort(key=lambda r: r[0])
+    return staged, errors, rejected
+
+
+def _term_meeting_tasks(c, term_ids: Dict[str, int], batch_rows: int):
+    # one term at a time: its sections are looked up once for all its batches
+    for (term,) in c.execute(RAW_TERMS).fetchall():
+        term_id = term_ids.get(str(term)) if term is not None else None
+        sections = {tuple(row) for row in c.execute(TERM_SECTIONS, (term_id, term_id))}
+        for df in _raw_batches(c, TERM_MEETING_ROWS, batch_rows, (term,)):
+            yield df, term_ids, sections
 
-    # Insert into DB
-    rows_inserted = 0
+
+def scrape_meetings(c, timings: Dict[str, float], progress: dict, batch_rows: int, parallel: bool = False):
+    clock = time.perf_counter()
+    term_ids = get_term_ids(c)
+
+    if not parallel:
+        tasks = (
+            (df, term_ids, _existing_sections(c, zip(_term_id_column(df["term"], term_ids), df["crn"])))
+            for df in _raw_batches(c, MEETING_ROWS, batch_rows)
+        )
+    else:
+        tasks = _term_meeting_tasks(c, term_ids, batch_rows)
+
+    staged_count = 0
+    errors: List[str] = []
     try:
-        with get_conn() as c:
-            before = c.total_changes
-            insert_query = """
-                INSERT INTO meeting (
-                    term_id, crn, day_of_week, start_min, end_min, room
-                )
-                VALUES (?,?,?,?,?,?)
-                ON CONFLICT(term_id, crn, day_of_week) DO NOTHING;
-            """
-            for m in valid:
-                c.execute(
-                    insert_query,
-                    (
-                        m.term_id,
-                        m.crn,
-                        m.day_of_week,
-                        m.start_min,
-                        m.end_min,
-                        m.room,
-                    ),
-                )
-            rows_inserted = c.total_changes - before
-    except Exception as e:
+        for rows, (staged, batch_errors, rejected) in executors.run_checks(check_meetings, tasks, parallel):
+            errors.extend(batch_errors)
+            clock = _lap(timings, "validate_ms", clock)
+
+            c.executemany("INSERT INTO temp.stage_meeting VALUES (?,?,?,?,?,?,?)", staged)
+            c.executemany("INSERT OR IGNORE INTO temp.stage_meeting_rejected VALUES (?,?)", rejected)
+            staged_count += len(staged)
+            progress["meetings_checked"] = progress.get("meetings_checked", 0) + rows
+            progress["errors"] = progress.get("errors", 0) + len(batch_errors)
+            clock = _lap(timings, "stage_ms", clock)
+    except sqlite3.Error as e:
         return {"status": "error", "errors": [f"DB error:: {e}"]}
+    if parallel:
+        errors.sort(key=_error_row)
+
+    if not staged_count:
+        return {"status": "error", "errors": errors or ["No valid rows."]}
+
+    return {"status": "ok", "staged": staged_count, "errors": errors}
+
+
+def _digest(state) -> str:
+    # section fields + meetings JSON, as selected by DIGEST_STATE / TABLE_STATE
+    return hashlib.sha1(json.dumps(state, separators=(",", ":")).encode()).hexdigest()
+
+
+def scrape_delta(c, timings: Dict[str, float], batch_rows: int, prune: bool) -> Dict[str, int]:
+    """
+    Classify every staged (term_id, crn) into temp.stage_delta as new,
+    changed or unchanged (and removed ones when pruning). Returns the counts.
+    """
+    clock = time.perf_counter()
+    c.execute(NEXT_SECTIONS)
+    c.execute(NEXT_MEETINGS)
+
+    cur = c.cursor()
+    cur.row_factory = None
+    cur.execute(DIGEST_STATE)
+    while rows := cur.fetchmany(batch_rows):
+        c.executemany(
+            "INSERT INTO temp.stage_delta (term_id, crn, digest) VALUES (?, ?, ?)",
+            [(r[0], r[1], _digest(r[2:])) for r in rows],
+        )
+    c.execute(CLASSIFY)
+
+    # Sections never digested (or written by something else since): hash what
+    # the tables hold now, store it and classify against that
+    cur.execute(TABLE_STATE)
+    while rows := cur.fetchmany(batch_rows):
+        c.executemany(STORE_DIGEST, [(r[0], r[1], _digest(r[2:])) for r in rows])
+    c.execute(CLASSIFY)
+
+    if prune:
+        c.execute(FILE_KEYS)
+        c.execute(REMOVED)
+
+    counts = dict.fromkeys(DELTA_KINDS, 0)
+    counts.update(c.execute(DELTA_COUNTS).fetchall())
+    _lap(timings, "delta_ms", clock)
+    return counts
+
+
+def apply_delta(c, timings: Dict[str, float], delta: Dict[str, int]) -> Dict[str, int]:
+    """
+    Write new/changed sections and meetings, delete removed ones (their
+    meetings go with them through ON DELETE CASCADE), store digests.
+    meetings_updated counts meeting rows written for changed sections.
+    """
+    clock = time.perf_counter()
+    removed_meetings = c.execute(REMOVED_MEETINGS).fetchone()[0]
+    sections_deleted = c.execute(APPLY_REMOVED).rowcount
+    sections_written = c.execute(APPLY_SECTIONS).rowcount
+    meetings_deleted = c.execute(DROP_MEETINGS).rowcount
+    meetings_inserted = c.execute(APPLY_MEETINGS, ("new",)).rowcount
+    meetings_updated = c.execute(APPLY_MEETINGS, ("changed",)).rowcount
+    extra = c.execute(APPLY_EXTRA_MEETINGS).fetchall()
+    c.executemany("INSERT OR IGNORE INTO temp.stage_extra_key VALUES (?, ?)", extra)
+    meetings_inserted += len(extra)
+    c.execute(STORE_DIGESTS)
+    _lap(timings, "apply_ms", clock)
 
     return {
-        "status": "ok",
-        "inserted": rows_inserted,
-        "ignored": len(valid) - rows_inserted,
-        "errors": errors,
+        "sections_inserted": delta["new"],
+        "sections_updated": sections_written - delta["new"],
+        "sections_deleted": sections_deleted,
+        "meetings_inserted": meetings_inserted,
+        "meetings_updated": meetings_updated,
+        "meetings_deleted": meetings_deleted + removed_meetings,
     }
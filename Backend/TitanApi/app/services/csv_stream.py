@@ -0,0 +1,97 @@
+import io
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+# Chunked CSV reading for the upload endpoints.
+# The routers hand over UploadFile.file (spooled to disk by Starlette for big
+# uploads) instead of `await file.read()`, and the loaders walk it
+# CHUNK_ROWS rows at a time, so memory stays bounded by the chunk, not the file.
+# Progress counters for every upload live in a registry served by /metrics/uploads.
+
+CHUNK_ROWS = 5000
+RECENT_UPLOADS = 20
+
+_LOCK = threading.Lock()
+_ACTIVE: Dict[str, dict] = {}
+_RECENT: deque = deque(maxlen=RECENT_UPLOADS)
+
+
+def as_stream(source):
+    """bytes -> BytesIO; file objects are used as they are."""
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    return source
+
+
+def normalize_columns(columns) -> List[str]:
+    return [str(c).strip().lower() for c in columns]
+
+
+def read_header(stream) -> List[str]:
+    """Normalized header names; rewinds so the chunks start from the top again."""
+    start = stream.tell()
+    columns = normalize_columns(pd.read_csv(stream, nrows=0).columns)
+    stream.seek(start)
+    return columns
+
+
+def iter_chunks(stream, progress: Optional[dict] = None, chunk_rows: int = CHUNK_ROWS,
+                **read_csv_kwargs) -> Iterator[pd.DataFrame]:
+    """
+    DataFrames of at most chunk_rows rows with normalized column names and
+    NaN/NA turned into None. The index keeps counting across chunks, so
+    `index + 2` is still the CSV line number used in error messages.
+    """
+    progress = progress if progress is not None else {}
+    with pd.read_csv(stream, chunksize=chunk_rows, **read_csv_kwargs) as reader:
+        for chunk in reader:
+            chunk.columns = normalize_columns(chunk.columns)
+            chunk = chunk.astype(object).where(pd.notna(chunk), None)
+            progress["rows_read"] = progress.get("rows_read", 0) + len(chunk)
+            progress["chunks"] = progress.get("chunks", 0) + 1
+            progress["bytes_read"] = stream.tell()
+            yield chunk
+
+
+# -----------------------
+# Progress registry
+# -----------------------
+def start_progress(kind: str, filename: Optional[str] = None, total_bytes: Optional[int] = None) -> dict:
+    """Register an upload; the loader updates the returned dict in place."""
+    progress = {
+        "id": uuid.uuid4().hex,
+        "kind": kind,
+        "filename": filename,
+        "phase": "reading",
+        "total_bytes": total_bytes,
+        "bytes_read": 0,
+        "rows_read": 0,
+        "chunks": 0,
+        "started_at": time.time(),
+    }
+    with _LOCK:
+        _ACTIVE[progress["id"]] = progress
+    return progress
+
+
+def finish_progress(progress: dict, status: str) -> dict:
+    progress["phase"] = "done"
+    progress["status"] = status
+    progress["elapsed_ms"] = round((time.time() - progress["started_at"]) * 1000, 1)
+    with _LOCK:
+        _ACTIVE.pop(progress["id"], None)
+        _RECENT.append(progress)
+    return progress
+
+
+def progress_snapshot() -> Dict[str, Any]:
+    with _LOCK:
+        return {
+            "active": [dict(p) for p in _ACTIVE.values()],
+            "recent": [dict(p) for p in _RECENT],
+        }
@@ -0,0 +1,286 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import AsyncIterator, Dict, Optional
+
+# Where blocking work runs, so no handler stalls the event loop:
+#   - lanes: one thread pool per kind of blocking call, each with its own
+#     worker limit and a cap on calls waiting for a worker. A full lane
+#     raises LaneFull (503 in main.py) instead of piling up requests.
+#       await run_blocking("tda", fn, ...)   from async handlers
+#       submit("db_write", fn, ...).result() from threads
+#       submit_waiting(...)                  same, waits for queue room (ingest jobs)
+#       stream("schedule", produce, ...)     results as they come (SSE)
+#   - the CPU pool: worker processes for the pandas checks of CSV loads
+#     (run_checks; csv_scraper_service, table_loader). Uploads use it by
+#     default only for files of PARALLEL_MIN_BYTES or more on a machine with
+#     more than one worker (use_cpu_pool): the pool spawns fresh interpreters
+#     that import pandas (~2 s the first time) and ships every batch to
+#     them, which costs more than checking a typical single-term upload
+#     inline on its db_write thread. ?parallel=true/false overrides.
+# stats() is served by /metrics/executors.
+
+LANES = {
+    # name: (workers, max waiting)
+    "tda": (int(os.getenv("TITAN_TDA_WORKERS", "4")), 32),  # OpenAI calls, seconds each
+    "db_write": (1, 16),   # bulk SQLite writes (CSV loads, ingest jobs); one writer anyway
+    "upload": (4, 64),     # copying /open/upload files aside
+    # schedule searches: CPU for up to their time budget each
+    "schedule": (int(os.getenv("TITAN_SCHEDULE_WORKERS", "2")), 16),
+}
+
+# Worker processes for parallel checks (default: one per core) and how
+# many batches may be queued ahead of the writer
+CPU_WORKERS = int(os.getenv("TITAN_INGEST_WORKERS", "0")) or os.cpu_count() or 1
+BATCHES_AHEAD = 2 * CPU_WORKERS
+# Uploads this big get the CPU pool unless they ask otherwise (see above);
+# smaller ones are checked inline, where the spawn cost would dominate
+PARALLEL_MIN_BYTES = int(os.getenv("TITAN_PARALLEL_MIN_MB", "8")) * 1024 * 1024
+
+
+class LaneFull(Exception):
+    """Too many calls already waiting on a lane."""
+
+    def __init__(self, lane: str):
+        super().__init__(f"Server busy: too many '{lane}' requests queued, try again shortly.")
+        self.lane = lane
+
+
+class StreamClosed(Exception):
+    """The reader of a stream() went away; raised from emit() to stop the producer."""
+
+
+class Lane:
+    """A bounded thread pool plus counters."""
+
+    def __init__(self, name: str, workers: int, max_waiting: int):
+        self.name = name
+        self.workers = workers
+        self.max_waiting = max_waiting
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix=f"lane-{name}")
+        self._lock = threading.Lock()
+        self._room = threading.Condition(self._lock)  # a waiting call started
+        self.waiting = 0
+        self.running = 0
+        self.peak_waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.wait_ms = 0.0
+        self.run_ms = 0.0
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        return self._submit(fn, args, kwargs, block=False)
+
+    def submit_waiting(self, fn, *args, **kwargs) -> Future:
+        return self._submit(fn, args, kwargs, block=True)
+
+    def _submit(self, fn, args, kwargs, block: bool) -> Future:
+        with self._lock:
+            while self.waiting >= self.max_waiting:
+                if not block:
+                    self.rejected += 1
+                    raise LaneFull(self.name)
+                self._room.wait()
+            self.waiting += 1
+            self.peak_waiting = max(self.peak_waiting, self.waiting)
+        queued_at = time.perf_counter()
+
+        def call():
+            started = time.perf_counter()
+            with self._lock:
+                self.waiting -= 1
+                self.running += 1
+                self.wait_ms += (started - queued_at) * 1000
+                self._room.notify()
+            ok = False
+            try:
+                result = fn(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.run_ms += (time.perf_counter() - started) * 1000
+                    if ok:
+                        self.completed += 1
+                    else:
+                        self.failed += 1
+
+        return self._pool.submit(call)
+
+    def stats(self) -> dict:
+        with self._lock:
+            done = self.completed + self.failed
+            return {
+                "workers": self.workers,
+                "max_waiting": self.max_waiting,
+                "running": self.running,
+                "waiting": self.waiting,
+                "peak_waiting": self.peak_waiting,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.wait_ms / done, 2) if done else None,
+                "avg_run_ms": round(self.run_ms / done, 2) if done else None,
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+
+_LANES: Dict[str, Lane] = {name: Lane(name, *limits) for name, limits in LANES.items()}
+
+
+def submit(lane: str, fn, *args, **kwargs) -> Future:
+    """Queue fn on a lane; raises LaneFull when too many calls are waiting."""
+    return _LANES[lane].submit(fn, *args, **kwargs)
+
+
+def submit_waiting(lane: str, fn, *args, **kwargs) -> Future:
+    """Like submit(), but blocks until the lane has room instead of raising LaneFull (work already accepted)."""
+    return _LANES[lane].submit_waiting(fn, *args, **kwargs)
+
+
+async def run_blocking(lane: str, fn, *args, **kwargs):
+    """Await fn(*args) on a lane's threads; the event loop keeps serving."""
+    return await asyncio.wrap_future(submit(lane, fn, *args, **kwargs))
+
+
+_END = object()
+
+
+def stream(lane: str, produce, *args, idle_seconds: Optional[float] = None) -> AsyncIterator:
+    """
+    Run produce(emit, *args) on a lane; every emit(item) comes out of the
+    returned async iterator (None after idle_seconds without one, for
+    keep-alives). An exception in produce is raised there too. Closing the
+    iterator makes the next emit() raise StreamClosed. Call it from the
+    handler, before the response starts: LaneFull is raised right away.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    closed = threading.Event()
+
+    def put(item):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            closed.set()  # loop is gone (shutdown)
+
+    def emit(item):
+        if closed.is_set():
+            raise StreamClosed()
+        put((None, item))
+
+    def run():
+        try:
+            produce(emit, *args)
+        except StreamClosed:
+            pass
+        except Exception as e:
+            put((e, None))
+        finally:
+            put((None, _END))
+
+    submit(lane, run)
+    return _drain(queue, closed, idle_seconds)
+
+
+async def _drain(queue: asyncio.Queue, closed: threading.Event, idle_seconds: Optional[float]):
+    try:
+        while True:
+            try:
+                error, item = await asyncio.wait_for(queue.get(), idle_seconds)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            if error is not None:
+                raise error
+            if item is _END:
+                return
+            yield item
+    finally:
+        closed.set()
+
+
+# -----------------------
+# CPU pool
+# -----------------------
+_CPU_POOL: Optional[ProcessPoolExecutor] = None
+_CPU_LOCK = threading.Lock()
+_CPU_STATS = {"submitted": 0, "pending": 0, "completed": 0, "failed": 0}
+
+
+def cpu_pool() -> ProcessPoolExecutor:
+    global _CPU_POOL
+    with _CPU_LOCK:
+        if _CPU_POOL is None:
+            # spawn, not fork: the server has threads and open SQLite connections
+            _CPU_POOL = ProcessPoolExecutor(CPU_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _CPU_POOL
+
+
+def _cpu_done(future: Future):
+    with _CPU_LOCK:
+        _CPU_STATS["pending"] -= 1
+        _CPU_STATS["failed" if future.cancelled() or future.exception() else "completed"] += 1
+
+
+def _submit_cpu(check, args) -> Future:
+    pool = cpu_pool()
+    with _CPU_LOCK:
+        _CPU_STATS["submitted"] += 1
+        _CPU_STATS["pending"] += 1
+    future = pool.submit(check, *args)
+    future.add_done_callback(_cpu_done)
+    return future
+
+
+def use_cpu_pool(parallel: Optional[bool], size_bytes: Optional[int]) -> bool:
+    """An upload's ?parallel= as given, or (None) whether its size makes the CPU pool worth starting."""
+    if parallel is not None:
+        return parallel
+    return CPU_WORKERS > 1 and size_bytes is not None and size_bytes >= PARALLEL_MIN_BYTES
+
+
+def run_checks(check, tasks, parallel: bool):
+    """
+    (rows in the batch, check(*args)) for every args in `tasks`, in task
+    order; args[0] is the batch DataFrame. With parallel=True up to
+    BATCHES_AHEAD tasks run in the CPU pool while the caller writes.
+    """
+    if not parallel:
+        for args in tasks:
+            yield len(args[0]), check(*args)
+        return
+    pending = deque()
+    for args in tasks:
+        pending.append((len(args[0]), _submit_cpu(check, args)))
+        if len(pending) >= BATCHES_AHEAD:
+            rows, future = pending.popleft()
+            yield rows, future.result()
+    while pending:
+        rows, future = pending.popleft()
+        yield rows, future.result()
+
+
+def stats() -> dict:
+    with _CPU_LOCK:
+        cpu = {"workers": CPU_WORKERS, "started": _CPU_POOL is not None, **_CPU_STATS}
+    return {"lanes": {name: lane.stats() for name, lane in _LANES.items()}, "cpu": cpu}
+
+
+def shutdown():
+    """Finish running calls, drop waiting ones, stop the CPU workers."""
+    global _CPU_POOL
+    for lane in _LANES.values():
+        lane.shutdown()
+    with _CPU_LOCK:
+        pool, _CPU_POOL = _CPU_POOL, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
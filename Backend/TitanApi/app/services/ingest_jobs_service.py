@@ -0,0 +1,212 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from crud import ingest_jobs_crud
+from services import csv_scraper_service, csv_stream, executors
+import cache
+
+# Background CSV ingest for POST /open/upload.
+# The request only copies the upload to a temp file and queues a job; one
+# worker thread runs the jobs in order (SQLite has a single writer anyway),
+# so a big scraper upload no longer holds a request open or competes with
+# /open/query for the request threadpool.
+# Queued/running jobs are tracked here with their live progress dict;
+# ingest_job (crud/ingest_jobs_crud.py) keeps the record once they start.
+
+COPY_BUFFER = 1024 * 1024
+# Jobs accepted but not started yet, and their spooled bytes: past either
+# limit /open/upload answers 503 (executors.LaneFull) before copying anything
+MAX_QUEUED_JOBS = int(os.getenv("TITAN_INGEST_MAX_QUEUED", "8"))
+MAX_QUEUED_BYTES = int(os.getenv("TITAN_INGEST_MAX_QUEUED_MB", "1024")) * 1024 * 1024
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest")
+_LOCK = threading.Lock()
+_LIVE: Dict[str, dict] = {}
+_SPOOLING = {"jobs": 0, "bytes": 0}  # room taken by uploads still being copied
+
+
+def submit_open_upload(fileobj, filename: Optional[str], total_bytes: Optional[int], prune: bool = False,
+                       parallel: Optional[bool] = None) -> dict:
+    """
+    Copy the upload aside and queue it. Returns the job status. Raises
+    executors.LaneFull when MAX_QUEUED_JOBS / MAX_QUEUED_BYTES are taken.
+    """
+    claimed = total_bytes or 0
+    _claim(claimed)
+    path = None
+    try:
+        with tempfile.NamedTemporaryFile(prefix="titan-ingest-", suffix=".csv", delete=False) as spool:
+            path = spool.name
+            shutil.copyfileobj(fileobj, spool, COPY_BUFFER)
+    except BaseException:
+        _release(claimed)
+        if path:
+            _remove(path)
+        raise
+    if total_bytes is None:
+        total_bytes = os.path.getsize(path)
+    job = {
+        "job_id": uuid.uuid4().hex,
+        "kind": "open",
+        "filename": filename,
+        "state": "queued",
+        "stage": "queued",
+        "total_bytes": total_bytes,
+        "created_at": time.time(),
+        "started_at": None,
+        "path": path,
+        "prune": prune,
+        "parallel": executors.use_cpu_pool(parallel, total_bytes),
+        "progress": None,
+    }
+    with _LOCK:
+        # from spooling to queued in one step, so _claim never sees it twice or not at all
+        _SPOOLING["jobs"] -= 1
+        _SPOOLING["bytes"] -= claimed
+        _LIVE[job["job_id"]] = job
+    _EXECUTOR.submit(_run, job)
+    return _live_status(job)
+
+
+def _claim(nbytes: int):
+    with _LOCK:
+        queued = [job for job in _LIVE.values() if job["state"] == "queued"]
+        jobs = len(queued) + _SPOOLING["jobs"]
+        queued_bytes = sum(job["total_bytes"] for job in queued) + _SPOOLING["bytes"]
+        # one file over MAX_QUEUED_BYTES still goes through when nothing is queued
+        if jobs >= MAX_QUEUED_JOBS or (jobs and queued_bytes + nbytes > MAX_QUEUED_BYTES):
+            raise executors.LaneFull("ingest")
+        _SPOOLING["jobs"] += 1
+        _SPOOLING["bytes"] += nbytes
+
+
+def _release(nbytes: int):
+    with _LOCK:
+        _SPOOLING["jobs"] -= 1
+        _SPOOLING["bytes"] -= nbytes
+
+
+def _run(job: dict):
+    progress = csv_stream.start_progress(job["kind"], job["filename"], job["total_bytes"])
+    progress["job_id"] = job["job_id"]
+    job.update(progress=progress, state="running", stage=progress["phase"], started_at=time.time())
+
+    final = {"state": "error", "errors": [], "result": None}
+    try:
+        ingest_jobs_crud.create_job(job)
+        with open(job["path"], "rb") as f:
+            # behind any per-table CSV load that is writing (db_write lane)
+            # (waiting for room there: the job was already accepted)
+            results = executors.submit_waiting(
+                "db_write", csv_scraper_service.scrape_csv_stream,
+                f, progress, prune=job["prune"], parallel=job["parallel"],
+            ).result()
+
+        if results.get("status") == "error":
+            final["errors"] = results.get("errors", ["Unknown error"])
+        else:
+            # Only the (term, crn) groups this file changed get rebuilt
+            snapshot = cache.refresh_open_cache(results.get("keys", []))
+            final.update(
+                state="done",
+                errors=results.get("errors", []),
+                result={
+                    "delta": results.get("delta", {}),
+                    "inserted": results.get("inserted", {}),
+                    "updated": results.get("updated", {}),
+                    "deleted": results.get("deleted", {}),
+                    "cache_version": snapshot.version,
+                    "timings": results.get("timings", {}),
+                },
+            )
+    except Exception as e:
+        final["errors"] = [f"Upload failed: {e}"]
+    finally:
+        csv_stream.finish_progress(progress, "ok" if final["state"] == "done" else "error")
+        rows, rate = _rate(progress)
+        try:
+            ingest_jobs_crud.update_job(
+                job["job_id"],
+                state=final["state"],
+                stage=progress["phase"],
+                rows_processed=rows,
+                rows_per_sec=rate,
+                error_count=len(final["errors"]),
+                errors=final["errors"],
+                result=final["result"],
+                finished_at=time.time(),
+            )
+        finally:
+            with _LOCK:
+                _LIVE.pop(job["job_id"], None)
+            _remove(job["path"])
+
+
+def _rate(progress: Optional[dict]):
+    """Rows read from the file so far and rows/sec since the job started."""
+    if not progress:
+        return 0, None
+    rows = progress.get("rows_read", 0)
+    elapsed = time.time() - progress["started_at"]
+    return rows, round(rows / elapsed, 1) if elapsed > 0 else None
+
+
+def _live_status(job: dict) -> dict:
+    progress = job["progress"]
+    rows, rate = _rate(progress)
+    return {
+        "job_id": job["job_id"],
+        "kind": job["kind"],
+        "filename": job["filename"],
+        "state": job["state"],
+        "stage": progress["phase"] if progress else job["stage"],
+        "total_bytes": job["total_bytes"],
+        "rows_processed": rows,
+        "rows_per_sec": rate,
+        "error_count": progress.get("errors", 0) if progress else 0,
+        "errors": [],
+        "result": None,
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": None,
+        "progress": dict(progress) if progress else None,
+    }
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    with _LOCK:
+        job = _LIVE.get(job_id)
+        if job is not None:
+            return _live_status(job)
+    return ingest_jobs_crud.get_job(job_id)
+
+
+def recent_jobs() -> dict:
+    with _LOCK:
+        live = [_live_status(job) for job in _LIVE.values()]
+    ids = {job["job_id"] for job in live}
+    recent = [job for job in ingest_jobs_crud.get_recent_jobs() if job["job_id"] not in ids]
+    return {"active": live, "recent": recent}
+
+
+def shutdown():
+    """Let the running job commit, drop the queued ones."""
+    _EXECUTOR.shutdown(wait=True, cancel_futures=True)
+    with _LOCK:
+        leftover = list(_LIVE.values())
+        _LIVE.clear()
+    for job in leftover:
+        _remove(job["path"])
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
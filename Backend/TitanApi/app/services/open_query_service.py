@@ -0,0 +1,202 @@
+from typing import Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
+from crud.open_class_list_crud import DAY_NUMS, meeting_facts
+from crud.open_class_query_crud import RESULT_COLUMNS, day_mask
+from schemas import OpenQueryFilters
+
+# In-memory /open/query over the cache snapshot.
+# build_columns() turns the snapshot's section dicts into column arrays once
+# per published version; run_open_query() evaluates the same filters as
+# open_class_query_crud with NumPy masks and returns the same flat rows, so
+# the router groups them with group_rows either way.
+
+# RESULT_COLUMNS that are the same on every meeting of a section
+SECTION_COLUMNS = RESULT_COLUMNS[:RESULT_COLUMNS.index("day_of_week")]
+
+
+class OpenColumns(NamedTuple):
+    # sections in snapshot order; index i of every array below is sections[i]
+    sections: Tuple[dict, ...]
+    term_codes: Dict[str, int]       # upper-cased term -> code
+    term_code: np.ndarray
+    subject_codes: Dict[str, int]    # upper-cased subject -> code (-1 = no subject)
+    subject_code: np.ndarray
+    course_id_uc: np.ndarray
+    crn: np.ndarray
+    is_open: np.ndarray
+    day_mask: np.ndarray
+    is_online: np.ndarray
+    is_in_person: np.ndarray
+    # one entry per meeting
+    meeting_section: np.ndarray
+    meeting_bit: np.ndarray
+    meeting_start: np.ndarray
+    meeting_end: np.ndarray
+    # section indexes sorted like the SQL: term, course_id, crn
+    order: np.ndarray
+
+
+def build_columns(data: Tuple[dict, ...]) -> OpenColumns:
+    n = len(data)
+    term_codes: Dict[str, int] = {}
+    subject_codes: Dict[str, int] = {}
+    term_code = np.empty(n, dtype=np.int32)
+    subject_code = np.empty(n, dtype=np.int32)
+    is_open = np.empty(n, dtype=bool)
+    mask = np.empty(n, dtype=np.int16)
+    is_online = np.empty(n, dtype=bool)
+    is_in_person = np.empty(n, dtype=bool)
+    terms, course_ids, course_ids_uc, crns = [], [], [], []
+    m_section, m_bit, m_start, m_end = [], [], [], []
+
+    for i, s in enumerate(data):
+        term = str(s["term"])
+        terms.append(term)
+        term_code[i] = term_codes.setdefault(term.upper(), len(term_codes))
+        subject = s.get("subject")
+        subject_code[i] = subject_codes.setdefault(subject.upper(), len(subject_codes)) if subject else -1
+        course_ids.append(s["course_id"])
+        course_ids_uc.append(str(s["course_id"]).upper())
+        crns.append(str(s["crn"]))
+        is_open[i] = (s.get("status") or "").upper().startswith("OPEN")
+        facts = meeting_facts(s["meetings"])
+        mask[i] = facts["day_mask"]
+        is_online[i] = facts["is_online"]
+        is_in_person[i] = facts["is_in_person"]
+
+        for m in s["meetings"]:
+            day = DAY_NUMS.get(m["day"], 0)
+            m_section.append(i)
+            m_bit.append(1 << (day - 1) if 1 <= day <= 7 else 0)
+            m_start.append(m["start"])
+            m_end.append(m["end"])
+
+    crn = np.array(crns, dtype=str)
+    order = np.lexsort((crn, np.array(course_ids, dtype=str), np.array(terms, dtype=str)))
+
+    return OpenColumns(
+        sections=data,
+        term_codes=term_codes,
+        term_code=term_code,
+        subject_codes=subject_codes,
+        subject_code=subject_code,
+        course_id_uc=np.array(course_ids_uc, dtype=str),
+        crn=crn,
+        is_open=is_open,
+        day_mask=mask,
+        is_online=is_online,
+        is_in_person=is_in_person,
+        meeting_section=np.array(m_section, dtype=np.int32),
+        meeting_bit=np.array(m_bit, dtype=np.int16),
+        meeting_start=np.array(m_start, dtype=np.int32),
+        meeting_end=np.array(m_end, dtype=np.int32),
+        order=order.astype(np.int32),
+    )
+
+
+def _meeting_time_mask(cols: OpenColumns, f: OpenQueryFilters):
+    """Per-meeting time check, None when there is no time filter (see time_condition)."""
+    if f.time_start is not None and f.time_end is not None:
+        return (cols.meeting_end > f.time_start) & (cols.meeting_start < f.time_end)
+    if f.time_start is not None:
+        return cols.meeting_start >= f.time_start
+    if f.time_end is not None:
+        return cols.meeting_end <= f.time_end
+    return None
+
+
+def _shared_mask(cols: OpenColumns, f: OpenQueryFilters) -> np.ndarray:
+    """Every filter except subject/course, which batch lookups vary per course."""
+    n = len(cols.sections)
+    keep = np.ones(n, dtype=bool)
+
+    if f.term:
+        code = cols.term_codes.get(f.term.strip().upper())
+        if code is None:
+            return np.zeros(n, dtype=bool)
+        keep &= cols.term_code == code
+    if f.crn:
+        keep &= cols.crn == str(f.crn)
+    if f.only_open:
+        keep &= cols.is_open
+    if f.modality in ("online", "hybrid"):
+        keep &= cols.is_online
+    if f.modality in ("inperson", "hybrid"):
+        keep &= cols.is_in_person
+
+    mask = day_mask(f.days)
+    if mask and f.days_mode == "all":
+        keep &= (cols.day_mask & mask) == mask
+    elif mask:
+        keep &= (cols.day_mask & mask) != 0
+
+    time_ok = _meeting_time_mask(cols, f)
+    if time_ok is not None:
+        if mask and f.days_mode != "all":
+            # in "any" mode the same meeting must be on a requested day
+            time_ok &= (cols.meeting_bit & mask) != 0
+        hit = np.zeros(n, dtype=bool)
+        hit[cols.meeting_section[time_ok]] = True
+        keep &= hit
+
+    return keep
+
+
+def _course_mask(cols: OpenColumns, keep: np.ndarray, subject, course) -> np.ndarray:
+    if subject:
+        code = cols.subject_codes.get(subject.strip().upper())
+        if code is None:
+            return np.zeros_like(keep)
+        keep = keep & (cols.subject_code == code)
+    if course:
+        # substring test only on the rows still in play
+        keep = keep.copy()
+        idx = np.flatnonzero(keep)
+        found = np.char.find(cols.course_id_uc[idx], course.strip().upper()) >= 0
+        keep[idx[~found]] = False
+    return keep
+
+
+def _ordered(cols: OpenColumns, keep: np.ndarray) -> np.ndarray:
+    return cols.order[keep[cols.order]]
+
+
+def match_sections(cols: OpenColumns, f: OpenQueryFilters) -> np.ndarray:
+    """Indexes into cols.sections that pass every filter, in result order."""
+    keep = _shared_mask(cols, f)
+    return _ordered(cols, _course_mask(cols, keep, f.subject, f.course))
+
+
+def _rows(cols: OpenColumns, indexes: np.ndarray) -> List[dict]:
+    rows = []
+    for i in indexes.tolist():
+        s = cols.sections[i]
+        base = {c: s.get(c) for c in SECTION_COLUMNS}
+        for m in s["meetings"]:
+            row = dict(base)
+            row["day_of_week"] = DAY_NUMS.get(m["day"], 0)
+            row["start_min"] = m["start"]
+            row["end_min"] = m["end"]
+            row["room"] = m["room"]
+            rows.append(row)
+    return rows
+
+
+def run_open_query(cols: OpenColumns, f: OpenQueryFilters) -> List[dict]:
+    """Same flat meeting rows as open_class_query_crud.run_open_query."""
+    return _rows(cols, match_sections(cols, f))
+
+
+def run_open_query_batch(cols: OpenColumns, f: OpenQueryFilters,
+                         courses: Dict[str, Tuple[str, str]]) -> Dict[str, List[dict]]:
+    """
+    One lookup per course sharing the rest of f. courses maps the key to
+    return under -> (subject, course), matched like the single query.
+    """
+    shared = _shared_mask(cols, f)
+    return {
+        key: _rows(cols, _ordered(cols, _course_mask(cols, shared, subject, course)))
+        for key, (subject, course) in courses.items()
+    }
@@ -0,0 +1,418 @@
+import heapq
+import itertools
+import math
+import os
+import re
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import cache
+from services import time_grid
+from services.open_query_service import DAY_NUMS
+
+DAY_LABEL = {num: label for label, num in DAY_NUMS.items()}
+
+# Conflict-free schedules from real sections (the open class snapshot).
+# Each section has a week grid (services/time_grid.py, built with the
+# snapshot), so "does it clash with what is picked so far" is one AND.
+# search() is a branch and bound over the courses (required ones first),
+# taking one section or skipping the course at each step, and keeps the
+# best K complete schedules by score. A branch is cut when even its upper
+# bound cannot beat the K-th best: the remaining courses at their best
+# section, as many as the units left allow (a fractional knapsack by gain
+# per unit, so a dozen required courses do not all count when three fit).
+# The whole search stops at the time budget with the best found so far. Sections of a course that meet at the same times are
+# searched once and reported as alternates. One term is searched at a time
+# (the latest in the snapshot unless asked): grids of different terms do not
+# clash with each other.
+#
+# score = required courses + units + professor ratings
+#         - days on campus - days the student did not want
+#         - hours outside the preferred time windows - idle hours between classes
+# Every term but the idle hours only gets worse as classes are added (or is
+# fixed per section), which is what keeps the bound an upper bound.
+
+DEFAULT_UNITS = 3  # what script.js assumes for a section without units
+TOP_K = int(os.getenv("TITAN_SCHEDULE_TOP_K", "5"))
+TIME_BUDGET_MS = float(os.getenv("TITAN_SCHEDULE_BUDGET_MS", "250"))
+# what a client may ask for: a search holds a "schedule" lane worker throughout
+MAX_TOP_K = int(os.getenv("TITAN_SCHEDULE_MAX_TOP_K", "50"))
+MAX_TIME_BUDGET_MS = float(os.getenv("TITAN_SCHEDULE_MAX_BUDGET_MS", "5000"))
+# courses per request: the search goes one (Python) frame deeper per course
+MAX_COURSES = int(os.getenv("TITAN_SCHEDULE_MAX_COURSES", "200"))
+
+# completed requirements first, then a full load, then the preferences
+REQUIRED_WEIGHT = 100.0
+UNIT_WEIGHT = 10.0
+DAY_PENALTY = 4.0                  # per day on campus (compactness)
+GAP_PENALTY_PER_HOUR = 2.0
+OFF_DAY_PENALTY = 15.0             # per day on campus that is not a preferred day
+OFF_WINDOW_PENALTY_PER_HOUR = 6.0  # in class outside the preferred times of that day
+RATING_WEIGHT = 3.0                # per star above NEUTRAL_RATING (Rate My Professor, 0-5)
+NEUTRAL_RATING = 3.0
+
+ALL_DAYS = 0b1111111
+_SEASONS = {"winter": 0, "spring": 1, "summer": 2, "fall": 3}
+_TERM_RE = re.compile(r"^\s*([A-Za-z]+)\s+(\d{4})\s*$")
+_DAY_PREFIXES = {"mon": 1, "tue": 2, "wed": 3, "thu": 4, "fri": 5, "sat": 6, "sun": 7}
+
+
+class Preferences(NamedTuple):
+    """What the student would like; the defaults prefer nothing."""
+    off_days: int = 0    # day bits (bit 0 = Monday) the student would rather not come in
+    avoid_grid: int = 0  # slots outside the preferred times, on days that have some
+    ratings: Dict[str, float] = {}  # normalized professor name -> rating
+    # hard: sections meeting on an off day, or only outside the preferred
+    # times of a day that has some, are dropped instead of penalized
+    hard: bool = False
+
+
+NO_PREFERENCES = Preferences()
+
+
+def _day_num(day) -> Optional[int]:
+    """1..7 from 3, "3", "Wed", "wednesday", "Thur"."""
+    text = str(day).strip().lower()
+    if text.isdigit():
+        return int(text) if 1 <= int(text) <= 7 else None
+    return _DAY_PREFIXES.get(text[:3])
+
+
+def _minutes(hhmm: str) -> int:
+    hours, _, mins = hhmm.strip().partition(":")
+    if not hours.isdigit() or not (mins or "0").isdigit() or len(mins) > 2:
+        raise ValueError(f"time {hhmm!r} is not HH:MM")
+    minutes = int(hours) * 60 + int(mins or 0)
+    if int(mins or 0) >= 60 or minutes > 24 * 60:
+        raise ValueError(f"time {hhmm!r} is not HH:MM")
+    return minutes
+
+
+def time_window(text: str) -> Tuple[int, int]:
+    """(start, end) minutes from "HH:MM" (the hour from then) or "HH:MM-HH:MM"; ValueError otherwise."""
+    start, _, end = str(text).partition("-")
+    start_min = _minutes(start)
+    end_min = _minutes(end) if end else start_min + 60
+    if end_min <= start_min:
+        raise ValueError(f"time window {text!r} ends before it starts")
+    return start_min, end_min
+
+
+def professor_key(name) -> str:
+    return " ".join(str(name or "").split()).lower()
+
+
+def preferences(days: Optional[Iterable] = None, times_by_day: Optional[Dict[str, Iterable[str]]] = None,
+                ratings: Optional[Dict[str, float]] = None, hard: bool = False) -> Preferences:
+    """
+    Preferences from the generate page's shape: days like ["Mon", "Wed"]
+    (None or [] = any day), times_by_day like {"Mon": ["09:00", "13:00-15:30"]}
+    ("HH:MM" is the hour from then, as script.js reads it; a day without
+    times has no time preference), ratings by professor name. hard=True
+    makes the days and times requirements, as the generate page's own
+    planner treats them.
+    """
+    wanted = 0
+    for day in days or ():
+        num = _day_num(day)
+        if num:
+            wanted |= 1 << (num - 1)
+
+    avoid = 0
+    for day, times in (times_by_day or {}).items():
+        num = _day_num(day)
+        windows = []
+        for t in times or ():
+            start, end = time_window(t)
+            windows.append({"day": num, "start": start, "end": end})
+        if not num or not windows:
+            continue
+        offset = (num - 1) * time_grid.SLOTS_PER_DAY
+        preferred = time_grid.week_grid({**w, "day": DAY_LABEL[num]} for w in windows)
+        avoid |= (time_grid.DAY_SLOTS_MASK << offset) & ~preferred
+
+    scores = {}
+    for name, rating in (ratings or {}).items():
+        try:
+            scores[professor_key(name)] = float(rating)
+        except (TypeError, ValueError):
+            continue
+    return Preferences(off_days=ALL_DAYS & ~wanted if wanted else 0, avoid_grid=avoid, ratings=scores, hard=hard)
+
+
+def term_order(term: str) -> tuple:
+    """Sort key for "Fall 2025" style terms, by year then season; others sort first."""
+    m = _TERM_RE.match(str(term))
+    if not m:
+        return (-1, -1, str(term))
+    return (int(m.group(2)), _SEASONS.get(m.group(1).lower(), -1), str(term))
+
+
+def latest_term(by_course: Optional[Dict[str, Tuple[dict, ...]]] = None) -> Optional[str]:
+    """The latest term with any section, in the snapshot (or by_course); None when empty."""
+    if by_course is None:
+        terms = {term for term, _ in cache.get_open_snapshot().groups}
+    else:
+        terms = {str(s.get("term")) for sections in by_course.values() for s in sections}
+    return max(terms, key=term_order) if terms else None
+
+
+class Option(NamedTuple):
+    """One way to take a course: sections with identical meeting times, best rated first."""
+    grid: int
+    days: int
+    sections: Tuple[dict, ...]
+    value: float  # rating bonus of the first section - time window penalty
+
+
+class Course(NamedTuple):
+    course_id: str
+    units: float
+    required: bool
+    options: Tuple[Option, ...]
+
+
+def build_courses(course_ids: Sequence[str], required: Iterable[str] = (), term: Optional[str] = None,
+                  by_course: Optional[Dict[str, Tuple[dict, ...]]] = None,
+                  grids: Optional[Dict[tuple, int]] = None,
+                  prefs: Preferences = NO_PREFERENCES) -> Tuple[List[Course], List[str]]:
+    """
+    Searchable courses from the snapshot (or by_course, with grids when
+    known) in one term (default: latest_term()), and the ids with no
+    section in it (or none within hard preferences).
+    """
+    if by_course is None:
+        snapshot = cache.get_open_snapshot()
+        by_course, grids = snapshot.by_course, snapshot.grids
+    grids = grids or {}
+    required = {cache.normalize_course_id(c) for c in required}
+    term = term or latest_term(by_course)
+    term_uc = str(term).strip().upper()
+
+    courses, unavailable = [], []
+    for course_id in dict.fromkeys(cache.normalize_course_id(c) for c in course_ids):
+        options: Dict[int, list] = {}
+        units = None
+        for section in by_course.get(course_id, ()):
+            if str(section.get("term", "")).upper() != term_uc:
+                continue
+            grid = grids.get(cache.group_key(section))
+            if grid is None:
+                grid = time_grid.week_grid(section.get("meetings") or ())
+            if prefs.hard and not _within(section, grid, prefs):
+                continue
+            options.setdefault(grid, []).append(section)
+            if units is None:
+                units = section.get("units") or DEFAULT_UNITS
+        if not options:
+            unavailable.append(course_id)
+            continue
+        courses.append(Course(
+            course_id=course_id,
+            units=float(units),
+            required=course_id in required,
+            options=tuple(_option(grid, sections, prefs) for grid, sections in options.items()),
+        ))
+    return courses, unavailable
+
+
+def _within(section: dict, grid: int, prefs: Preferences) -> bool:
+    """No meeting on an off day, and each meeting overlaps the preferred times of its day (if it has some)."""
+    if time_grid.day_bits(grid) & prefs.off_days:
+        return False
+    if not grid & prefs.avoid_grid:
+        return True
+    for meeting in _timed(section.get("meetings") or ()):
+        slots = time_grid.week_grid([meeting])
+        if slots & prefs.avoid_grid and not slots & ~prefs.avoid_grid:
+            return False
+    return True
+
+
+def rating_bonus(section: dict, prefs: Preferences) -> float:
+    rating = prefs.ratings.get(professor_key(section.get("professor")))
+    return 0.0 if rating is None else RATING_WEIGHT * (rating - NEUTRAL_RATING)
+
+
+def off_window_hours(grid: int, prefs: Preferences) -> float:
+    return (grid & prefs.avoid_grid).bit_count() * time_grid.SLOT_MINUTES / 60
+
+
+def _option(grid: int, sections: list, prefs: Preferences) -> Option:
+    sections = sorted(sections, key=lambda s: -rating_bonus(s, prefs))  # stable: catalog order otherwise
+    value = rating_bonus(sections[0], prefs) - OFF_WINDOW_PENALTY_PER_HOUR * off_window_hours(grid, prefs)
+    return Option(grid, time_grid.day_bits(grid), tuple(sections), value)
+
+
+def _timed(meetings):
+    return [m for m in meetings if 1 <= DAY_NUMS.get(m.get("day"), 0) <= 7
+            and m.get("start") is not None and m.get("end") is not None and m["end"] > m["start"]]
+
+
+def day_cost(days: int, prefs: Preferences) -> float:
+    return DAY_PENALTY * days.bit_count() + OFF_DAY_PENALTY * (days & prefs.off_days).bit_count()
+
+
+def score(required: int, units: float, value: float, grid: int, days: int, prefs: Preferences = NO_PREFERENCES) -> float:
+    return (REQUIRED_WEIGHT * required + UNIT_WEIGHT * units + value
+            - day_cost(days, prefs) - GAP_PENALTY_PER_HOUR * time_grid.idle_hours(grid))
+
+
+def search(courses: Sequence[Course], max_units: float, k: int = TOP_K,
+           time_budget_ms: float = TIME_BUDGET_MS, prefs: Preferences = NO_PREFERENCES,
+           on_improve: Optional[Callable[[dict], None]] = None) -> dict:
+    """
+    Best k schedules (highest score first) of at most max_units units.
+    Returns {"schedules": [{"score", "units", "picks": [(Course, Option)]}],
+    "complete": False when the time budget ran out, "nodes", "ms"}.
+    on_improve(schedule) is called from the search each time a better
+    best schedule is found (with "nodes" and "ms" so far); an exception
+    from it stops the search.
+    courses must have been built with the same prefs.
+    """
+    # most a course can add: taken at its best option, day costs ignored
+    def gain(c):
+        return REQUIRED_WEIGHT * c.required + UNIT_WEIGHT * c.units + max(0.0, max(o.value for o in c.options))
+
+    def per_unit(c):
+        return gain(c) / c.units if c.units else math.inf
+
+    start = time.perf_counter()
+    deadline = start + time_budget_ms / 1000
+
+    # required first, then the best gain per unit: good schedules come early
+    # and raise the K-th best score the bound is compared to
+    order = sorted(courses, key=lambda c: (not c.required, -per_unit(c), len(c.options)))
+    n = len(order)
+    n_required = sum(c.required for c in order)
+    # (gain per unit, gain, units) in search order. From the first elective
+    # on, the courses left are already best ratio first; before that, the
+    # required ones left are merged with all the electives.
+    items = [(per_unit(c), gain(c), c.units) for c in order]
+    gains_left = [list(heapq.merge(items[i:n_required], items[n_required:], key=lambda t: t[0], reverse=True))
+                  for i in range(n_required)]
+
+    best: List[tuple] = []  # min-heap of (score, tie, picks, units)
+    top = float("-inf")
+    tie = itertools.count()
+    nodes = 0
+    out_of_time = False
+    picks: List[Tuple[Course, Option]] = []
+
+    def bound(i, units, required, value, days):
+        # day costs only grow with more days; idle time is left out (it can shrink)
+        extra, room = 0.0, max_units - units
+        left = gains_left[i] if i < n_required else itertools.islice(items, i, None)
+        for _, gain, course_units in left:
+            if course_units <= room:
+                extra += gain
+                room -= course_units
+            else:
+                extra += gain * room / course_units
+                break
+        return REQUIRED_WEIGHT * required + UNIT_WEIGHT * units + value + extra - day_cost(days, prefs)
+
+    def record(units, required, value, grid, days):
+        nonlocal top
+        entry = (score(required, units, value, grid, days, prefs), next(tie), list(picks), units)
+        if len(best) < k:
+            heapq.heappush(best, entry)
+        else:
+            heapq.heappushpop(best, entry)
+        if on_improve and entry[0] > top:
+            top = entry[0]
+            on_improve({"score": round(entry[0], 2), "units": units, "picks": entry[2],
+                        "nodes": nodes, "ms": round((time.perf_counter() - start) * 1000, 1)})
+
+    def visit(i, units, required, value, grid, days):
+        nonlocal nodes, out_of_time
+        nodes += 1
+        if nodes & 1023 == 0 and time.perf_counter() > deadline:
+            out_of_time = True
+        if out_of_time:
+            return
+        if len(best) == k and bound(i, units, required, value, days) <= best[0][0]:
+            return
+        if i == n:
+            if picks:
+                record(units, required, value, grid, days)
+            return
+
+        course = order[i]
+        if units + course.units <= max_units:
+            # best local gain first (value minus the cost of new days): good schedules early
+            for option in sorted(course.options, key=lambda o: day_cost(days | o.days, prefs) - o.value):
+                if option.grid & grid:
+                    continue
+                picks.append((course, option))
+                visit(i + 1, units + course.units, required + course.required, value + option.value,
+                      grid | option.grid, days | option.days)
+                picks.pop()
+                if out_of_time:
+                    return
+        visit(i + 1, units, required, value, grid, days)
+
+    visit(0, 0.0, 0, 0.0, 0, 0)
+    return {
+        "schedules": [
+            {"score": round(s, 2), "units": u, "picks": p}
+            for s, _, p, u in sorted(best, key=lambda e: (-e[0], e[1]))
+        ],
+        "complete": not out_of_time,
+        "nodes": nodes,
+        "ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+
+
+def describe(schedule: dict, prefs: Preferences = NO_PREFERENCES) -> dict:
+    """A search() schedule in the planned_courses shape script.js renders, with its score parts."""
+    planned = []
+    grid = day_bits = 0
+    for course, option in schedule["picks"]:
+        grid |= option.grid
+        day_bits |= option.days
+        section = option.sections[0]
+        meetings = section.get("meetings") or []
+        timed = _timed(meetings)
+        labels = sorted({m["day"] for m in timed}, key=DAY_NUMS.get)
+        planned.append({
+            "course_id": course.course_id,
+            "title": section.get("title") or "",
+            "units": course.units,
+            "required": course.required,
+            "meeting": {
+                "days": labels,
+                "time": _format_time(timed[0]["start"], timed[0]["end"]) if timed else "TBA",
+            },
+            "term": section.get("term"),
+            "crn": section.get("crn"),
+            "section": section.get("section"),
+            "professor": section.get("professor"),
+            "professor_rating": prefs.ratings.get(professor_key(section.get("professor"))),
+            "meetings": meetings,
+            # same days and times, other sections
+            "alternate_crns": [s.get("crn") for s in option.sections[1:]],
+        })
+    return {
+        "score": schedule["score"],
+        "term": schedule["picks"][0][1].sections[0].get("term") if schedule["picks"] else None,
+        "score_parts": {
+            "required": sum(c.required for c, _ in schedule["picks"]),
+            "units": schedule["units"],
+            "days_on_campus": day_bits.bit_count(),
+            "off_days": (day_bits & prefs.off_days).bit_count(),
+            "off_window_hours": off_window_hours(grid, prefs),
+            "idle_hours": time_grid.idle_hours(grid),
+            "rating_bonus": round(sum(rating_bonus(o.sections[0], prefs) for _, o in schedule["picks"]), 2),
+        },
+        "planned_units": schedule["units"],
+        "planned_courses": planned,
+    }
+
+
+def _format_time(start: int, end: int) -> str:
+    """660, 710 -> '11:00 AM-11:50 AM' (formatMeetingTime in script.js)."""
+    def fmt(minutes):
+        hours, mins = divmod(minutes, 60)
+        return f"{(hours - 1) % 12 + 1}:{mins:02d} {'PM' if hours >= 12 else 'AM'}"
+    return f"{fmt(start)}-{fmt(end)}"
@@ -1,20 +1,12 @@
 import json
 from pathlib import Path
-from typing import List, Dict
+from typing import Callable, Dict, List, Optional
+
+from services import schedule_engine
 
 BASE_DIR = Path(__file__).resolve().parent
 REQ_FILE = BASE_DIR / "cs_requirements.json"
 
-# A tiny set of time slots we will use to build a weekly calendar.
-TIME_SLOTS = [
-    {"days":["Mon","Wed","Fri"], "time":"09:00-10:00"},
-    {"days":["Mon","Wed","Fri"], "time":"10:00-11:00"},
-    {"days":["Tue","Thu"], "time":"09:30-11:00"},
-    {"days":["Mon","Wed","Fri"], "time":"13:00-14:00"},
-    {"days":["Tue","Thu"], "time":"13:30-15:00"},
-    {"days":["Mon","Wed","Fri"], "time":"15:00-16:00"},
-]
-
 def load_requirements() -> List[Dict]:
     try:
         with open(REQ_FILE) as f:
@@ -33,53 +25,95 @@ def can_take(course: Dict, completed: List[str]) -> bool:
             return False
     return True
 
-def generate_next_semester_schedule(completed: List[str], max_units: int = 15) -> Dict:
+def generate_next_semester_schedule(completed: List[str], max_units: int = 15, courses: Optional[List[str]] = None,
+                                    term: Optional[str] = None, top_k: Optional[int] = None,
+                                    time_budget_ms: Optional[float] = None) -> Dict:
     """
-    Generate a naive schedule for the next semester.
+    Build next semester from the open sections (services/schedule_engine.py).
 
     Parameters:
     - completed: list of course_id strings the student has already finished
     - max_units: maximum units to schedule for the semester (default 15)
+    - courses: other courses the student may take (e.g. a TDA's courses_allowed);
+      cs_requirements.json courses whose prereqs are met come first
+    - term: the term to plan (default: the latest in the snapshot); one term only,
+      so "conflict free" holds
+    - top_k / time_budget_ms: how many schedules to return, how long to search
 
     Returns a dict with:
-    - planned_courses: list of courses scheduled (course_id, title, units, meeting pattern)
-    - remaining_needed: courses still needed after this semester
+    - term: the term searched
+    - planned_courses / planned_units: the best schedule (real sections, conflict free)
+    - schedules: the top_k schedules, best first, each with its score
+    - remaining_needed: every requirement neither completed nor in the best schedule
+      (prereqs met or not)
+    - unavailable: requested courses without an open section
+    - search: nodes visited, ms, and complete=False if the time budget ran out
     """
     reqs = load_requirements()
     completed_set = set(completed or [])
 
-    # Determine needed courses (those in reqs but not completed)
-    needed = [c for c in reqs if c["course_id"] not in completed_set]
+    # Determine needed courses (those in reqs but not completed, prereqs met)
+    required = [c["course_id"] for c in reqs if c["course_id"] not in completed_set and can_take(c, completed)]
+    electives = [c for c in courses or [] if c not in completed_set]
+
+    term = term or schedule_engine.latest_term()
+    candidates, unavailable = schedule_engine.build_courses(required + electives, required=required, term=term)
+    result = schedule_engine.search(
+        candidates, max_units,
+        k=top_k or schedule_engine.TOP_K,
+        time_budget_ms=time_budget_ms or schedule_engine.TIME_BUDGET_MS,
+    )
+    schedules = [schedule_engine.describe(s) for s in result["schedules"]]
+    best = schedules[0] if schedules else {"planned_units": 0, "planned_courses": []}
+    planned_ids = {p["course_id"] for p in best["planned_courses"]}
 
-    planned = []
-    total_units = 0
-    slot_index = 0
+    return {
+        "term": term,
+        "planned_units": best["planned_units"],
+        "planned_courses": best["planned_courses"],
+        "remaining_needed": [c["course_id"] for c in reqs
+                             if c["course_id"] not in completed_set and c["course_id"] not in planned_ids],
+        "schedules": schedules,
+        "unavailable": unavailable,
+        "search": {k: result[k] for k in ("complete", "nodes", "ms")},
+    }
 
-    for course in needed:
-        # don't exceed units
-        if total_units + course.get("units", 3) > max_units:
-            continue
-        # only take course if prereqs satisfied by completed courses
-        if not can_take(course, completed):
-            continue
-        # assign a time slot (wrap around if more courses than slots)
-        slot = TIME_SLOTS[slot_index % len(TIME_SLOTS)]
-        slot_index += 1
-        planned.append({
-            "course_id": course["course_id"],
-            "title": course.get("title", ""),
-            "units": course.get("units", 3),
-            "meeting": {
-                "days": slot["days"],
-                "time": slot["time"]
-            }
-        })
-        total_units += course.get("units", 3)
 
-    remaining_after = [c["course_id"] for c in reqs if c["course_id"] not in completed_set and c["course_id"] not in [p["course_id"] for p in planned]]
+def enumerate_schedules(courses: List[str], required: Optional[List[str]] = None, max_units: float = 15,
+                        term: Optional[str] = None, top_k: Optional[int] = None,
+                        time_budget_ms: Optional[float] = None,
+                        prefs: schedule_engine.Preferences = schedule_engine.NO_PREFERENCES,
+                        on_improve: Optional[Callable[[dict], None]] = None) -> Dict:
+    """
+    The best top_k schedules from courses (required ones count most), scored
+    with prefs (schedule_engine.preferences). on_improve(schedule) gets every
+    new best schedule while the search runs, in the same shape.
+
+    Searches one term (default: the latest in the snapshot). Returns term,
+    schedules (best first), remaining_needed (courses not in the
+    best one), unavailable (no open section) and search stats.
+    """
+    required = required or []
+    term = term or schedule_engine.latest_term()
+    candidates, unavailable = schedule_engine.build_courses(courses + required, required=required,
+                                                            term=term, prefs=prefs)
+    def described(found):
+        on_improve({**schedule_engine.describe(found, prefs), "nodes": found["nodes"], "ms": found["ms"]})
+
+    result = schedule_engine.search(
+        candidates, max_units,
+        k=top_k or schedule_engine.TOP_K,
+        time_budget_ms=time_budget_ms or schedule_engine.TIME_BUDGET_MS,
+        prefs=prefs,
+        on_improve=described if on_improve else None,
+    )
+    schedules = [schedule_engine.describe(s, prefs) for s in result["schedules"]]
+    planned_ids = {p["course_id"] for p in schedules[0]["planned_courses"]} if schedules else set()
 
     return {
-        "planned_units": total_units,
-        "planned_courses": planned,
-        "remaining_needed": remaining_after
+        "term": term,
+        "schedules": schedules,
+        "remaining_needed": [c.course_id for c in candidates if c.course_id not in planned_ids],
+        "unavailable": unavailable,
+        "search": {k: result[k] for k in ("complete", "nodes", "ms")},
     }
@@ -0,0 +1,13 @@
+import json
+
+# Server-sent events framing for the streaming endpoints (StreamingResponse
+# with media_type="text/event-stream"; see SSE_HEADERS).
+
+KEEPALIVE = ": keep-alive\n\n"
+
+# no caching, and no proxy buffering, or the events arrive all at once
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def event(name: str, data: dict) -> str:
+    return f"event: {name}\ndata: {json.dumps(data, default=str)}\n\n"
@@ -0,0 +1,321 @@
+import sqlite3
+import typing
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import annotated_types
+import numpy as np
+import pandas as pd
+from pydantic import ValidationError
+
+from db import get_conn
+from services import csv_stream, executors
+
+# Shared loader behind /courses/upload, /sections/upload and /meetings/upload.
+# Each table is described by a TableSpec derived from its Pydantic model in
+# schemas.py. A chunk is checked column by column: values the model would
+# accept without question are converted with pandas/NumPy, and only the rows
+# that fail a check are built into the model, so rejected rows get the same
+# messages as before. Accepted rows go into a TEMP table; one
+# INSERT OR IGNORE ... SELECT at the end keeps the last row per table key.
+
+# Known before-validators in schemas.py and the column operation that
+# matches them. A field with any other validator is always left to the model.
+STRIP_VALIDATORS = {"to_str", "to_str_fields"}        # str(v).strip(), None is an error
+INT_VALIDATORS = {"to_int_term_id", "to_int_fields"}  # schemas._coerce_int
+
+# Known after-validators and the same check over whole columns. `values` maps
+# column name -> converted values; rows a column check rejected are ignored.
+# (Plain functions, so specs can be sent to the CPU pool.)
+def _end_after_start(values):
+    # MeetingIn: a meeting on a day ends after it starts
+    return (values["day_of_week"] == -1) | (values["end_min"] > values["start_min"])
+
+
+ROW_RULES = {
+    "end_after_start": _end_after_start,
+}
+
+# Number text Pydantic parses the same way as float()/int() in lax mode
+INT_TEXT = r"[+-]?\d+"
+FLOAT_TEXT = r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?"
+
+
+class ColumnSpec(NamedTuple):
+    name: str
+    kind: str          # "str", "int" or "float"
+    required: bool     # no default in the model: the CSV header must be there
+    nullable: bool     # Optional[...]: None is a valid value
+    coerce: str        # "", "strip", "int" or "model"
+    ge: Optional[float] = None  # Field(ge=...) / Field(le=...)
+    le: Optional[float] = None
+
+
+class TableSpec(NamedTuple):
+    table: str
+    model: type
+    columns: Tuple[ColumnSpec, ...]
+    key: Tuple[str, ...]   # unique key of the table; the last row per key is kept
+    row_errors: Callable[[int, Dict[str, Any], ValidationError], List[str]]
+    rules: Tuple[Callable, ...] = ()  # from ROW_RULES
+
+    @property
+    def names(self) -> List[str]:
+        return [col.name for col in self.columns]
+
+    @property
+    def required_headers(self) -> List[str]:
+        return [col.name for col in self.columns if col.required]
+
+
+def _column_kind(annotation) -> Tuple[str, bool]:
+    args = typing.get_args(annotation)
+    nullable = type(None) in args
+    base = next((a for a in args if a is not type(None)), annotation) if args else annotation
+    return {str: "str", int: "int", float: "float"}.get(base, "model"), nullable
+
+
+def spec_from_model(model: type, table: str, key: Tuple[str, ...], row_errors) -> TableSpec:
+    """Column spec for `model`; the columns are the model fields, in order."""
+    validators: Dict[str, List[str]] = {}
+    rules = []
+    for name, decorator in model.__pydantic_decorators__.field_validators.items():
+        if decorator.info.mode == "after" and name in ROW_RULES:
+            rules.append(ROW_RULES[name])
+            continue
+        for field in decorator.info.fields:
+            validators.setdefault(field, []).append(
+                name if decorator.info.mode == "before" else "<after>"
+            )
+
+    columns = []
+    for name, field in model.model_fields.items():
+        kind, nullable = _column_kind(field.annotation)
+        found = validators.get(name, [])
+        bounds = {"ge": None, "le": None}
+        for constraint in field.metadata:
+            if isinstance(constraint, annotated_types.Ge):
+                bounds["ge"] = constraint.ge
+            elif isinstance(constraint, annotated_types.Le):
+                bounds["le"] = constraint.le
+            else:
+                found = found + ["<constraint>"]  # anything else is left to the model
+        if kind == "model" or len(found) > 1:
+            coerce = "model"
+        elif not found:
+            coerce = ""
+        elif found[0] in STRIP_VALIDATORS and kind == "str":
+            coerce = "strip"
+        elif found[0] in INT_VALIDATORS and kind == "int":
+            coerce = "int"
+        else:
+            coerce = "model"
+        columns.append(ColumnSpec(name, kind, field.is_required(), nullable, coerce, **bounds))
+    return TableSpec(table, model, tuple(columns), key, row_errors, tuple(rules))
+
+
+# -----------------------
+# Error formats of the loaders
+# -----------------------
+def first_error(i, cleaned_values: Dict[str, Any], e: ValidationError) -> List[str]:
+    return [f"row {i + 2}: {e.errors()[0]['msg']}"]
+
+
+def field_errors(i, cleaned_values: Dict[str, Any], e: ValidationError) -> List[str]:
+    errors = []
+    for err in e.errors():
+        field = ".".join(str(p) for p in err.get("loc", [])) or "<unknown>"
+        msg = err.get("msg", "Invalid value")
+        bad_val = cleaned_values.get(field, "<missing>")
+        # +2 because CSV header is row 1, DataFrame index starts at 0
+        errors.append(f"row {i+2} (field '{field}', value={bad_val!r}): {msg}")
+    return errors
+
+
+# -----------------------
+# Column checks
+# -----------------------
+def _is_instance(s: pd.Series, types) -> np.ndarray:
+    # whole column at once when pandas already knows it is text
+    if types is str and pd.api.types.infer_dtype(s, skipna=True) in ("string", "empty"):
+        return s.notna().to_numpy()
+    return np.fromiter((isinstance(v, types) and not isinstance(v, bool) for v in s), dtype=bool, count=len(s))
+
+
+def _in_bounds(col: ColumnSpec, num: np.ndarray, ok: np.ndarray) -> np.ndarray:
+    if col.ge is not None:
+        ok &= num >= col.ge
+    if col.le is not None:
+        ok &= num <= col.le
+    return ok
+
+
+def _check_column(col: ColumnSpec, s: pd.Series):
+    """
+    (values, ok): `values` is what the model would store for the rows where
+    `ok` is True. Rows with ok False are decided by the model.
+    """
+    isnull = s.isna().to_numpy()
+    if col.coerce == "model":
+        return s, np.zeros(len(s), dtype=bool)
+
+    if col.coerce == "strip":
+        # the validator turns anything but None into str(v).strip()
+        values = pd.Series(None, index=s.index, dtype=object)
+        values[~isnull] = s[~isnull].astype(str).str.strip()
+        return values, ~isnull
+
+    if col.coerce == "int":
+        # _coerce_int: int(float(v)) for numbers and numeric strings
+        num = pd.to_numeric(s, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        ok = np.isfinite(num) & (np.abs(num) < 2**53)
+        num = np.trunc(np.where(ok, num, 0))
+        return num.astype(np.int64), _in_bounds(col, num, ok)
+
+    if col.kind == "str":
+        ok = _is_instance(s, str)
+        values = s
+    else:
+        # numbers, or strings that are plainly numbers (a column with one bad
+        # value is read as strings); anything else is left to the model
+        pattern = INT_TEXT if col.kind == "int" else FLOAT_TEXT
+        text = _is_instance(s, str)
+        ok = _is_instance(s, (int, float)) | (text & s.where(text, "").str.fullmatch(pattern).to_numpy(dtype=bool))
+        num = pd.to_numeric(s.where(ok, None), errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        ok &= np.isfinite(num)
+        if col.kind == "int":
+            ok &= (np.trunc(num) == num) & (np.abs(num) < 2**53)
+        num = np.where(ok, num, 0.0)
+        ok = _in_bounds(col, num, ok)
+        values = num.astype(np.int64) if col.kind == "int" else num
+
+    if col.nullable:
+        ok = ok | isnull
+        values = pd.Series(values, index=s.index, dtype=object).where(~isnull, None)
+    return values, ok
+
+
+def check_columns(spec: TableSpec, df: pd.DataFrame):
+    """
+    (values, ok) for the whole chunk: every column check and spec.rules.
+    `values` maps column name -> converted values (Series or array).
+    """
+    for name in spec.names:
+        if name not in df.columns:
+            df[name] = None   # optional columns the CSV does not have
+
+    ok = np.ones(len(df), dtype=bool)
+    values = {}
+    for col in spec.columns:
+        values[col.name], col_ok = _check_column(col, df[col.name])
+        ok &= col_ok
+    for rule in spec.rules:
+        ok &= np.asarray(rule(values), dtype=bool)
+    return values, ok
+
+
+def check_chunk(spec: TableSpec, df: pd.DataFrame, vectorized: bool = True):
+    """
+    (rows to stage, error messages) for one chunk. Staged rows are
+    (row, *spec.names). vectorized=False builds the model for every row
+    (the reference the benchmark compares against).
+    """
+    names = spec.names
+    values, ok = check_columns(spec, df)
+    if not vectorized:
+        ok[:] = False
+
+    staged = list(zip(df.index[ok].tolist(), *(values[name][ok].tolist() for name in names)))
+    errors: List[str] = []
+
+    # The rest: let the model decide, with the row as the old loop passed it
+    rejected = np.flatnonzero(~ok)
+    records = df.iloc[rejected].to_dict("records")
+    for pos, cleaned_values in zip(rejected, records):
+        i = int(df.index[pos])
+        try:
+            m = spec.model(**cleaned_values)
+            staged.append((i, *(getattr(m, name) for name in names)))
+        except ValidationError as e:
+            errors.extend(spec.row_errors(i, cleaned_values, e))
+
+    staged.sort(key=lambda r: r[0])
+    return staged, errors
+
+
+def _check_batch(df: pd.DataFrame, spec: TableSpec, vectorized: bool):
+    # executors.run_checks wants the batch first
+    return check_chunk(spec, df, vectorized)
+
+
+# -----------------------
+# Loader
+# -----------------------
+def _stage_table(spec: TableSpec) -> str:
+    return f"load_{spec.table}"
+
+
+def load_csv(spec: TableSpec, file, progress: Optional[dict] = None,
+             chunk_rows: int = csv_stream.CHUNK_ROWS, vectorized: bool = True,
+             parallel: bool = False) -> Dict[str, Any]:
+    """
+    Validate a CSV chunk by chunk and insert the rows into spec.table.
+    Returns {"status", "inserted", "ignored", "errors"}; ignored counts valid
+    rows that were duplicates in the file or already in the table.
+    With parallel=True the chunks are checked in the CPU pool; this
+    connection still does all the writing.
+    """
+    # file: UploadFile.file (or raw bytes); read chunk_rows rows at a time
+    stream = csv_stream.as_stream(file)
+    columns = csv_stream.read_header(stream)  # Normalized header names
+
+    missing = [c for c in spec.required_headers if c not in columns]
+    if missing:
+        return {"status": "error", "errors": [f"Missing columns: {missing}"]}
+
+    progress = progress if progress is not None else {}
+    stage = _stage_table(spec)
+    names = spec.names
+    key = ", ".join(spec.key)
+    valid_count = 0
+    errors: List[str] = []
+
+    try:
+        # One transaction for the whole file
+        with get_conn() as c:
+            c.execute(f"CREATE TEMP TABLE IF NOT EXISTS {stage} (row INTEGER PRIMARY KEY, {', '.join(names)})")
+            c.execute(f"DELETE FROM temp.{stage}")
+
+            tasks = ((df, spec, vectorized) for df in csv_stream.iter_chunks(stream, progress, chunk_rows))
+            for _, (staged, chunk_errors) in executors.run_checks(_check_batch, tasks, parallel):
+                c.executemany(
+                    f"INSERT INTO temp.{stage} VALUES ({', '.join('?' for _ in range(len(names) + 1))})",
+                    staged,
+                )
+                valid_count += len(staged)
+                errors.extend(chunk_errors)
+                progress["validated"] = valid_count
+                progress["errors"] = len(errors)
+
+            # If none were valid, stop and return error
+            if not valid_count:
+                c.execute(f"DELETE FROM temp.{stage}")
+                return {"status": "error", "errors": errors or ["No valid rows."]}
+
+            # Last row per key, like drop_duplicates(keep="last"); rows already in the table are kept
+            rows_inserted = c.execute(f"""
+                INSERT OR IGNORE INTO {spec.table} ({', '.join(names)})
+                SELECT {', '.join(names)} FROM temp.{stage}
+                WHERE row IN (SELECT MAX(row) FROM temp.{stage} GROUP BY {key})
+                ORDER BY row
+            """).rowcount
+            c.execute(f"DELETE FROM temp.{stage}")
+            progress["inserted"] = rows_inserted
+    except sqlite3.Error as e:
+        return {"status": "error", "errors": [f"DB error:: {e}"]}
+
+    return {
+        "status": "ok",
+        "inserted": rows_inserted,
+        "ignored": valid_count - rows_inserted,
+        "errors": errors,
+    }
@@ -0,0 +1,127 @@
+import hashlib
+import os
+import threading
+import time
+from typing import Callable, Dict
+
+from crud import tda_cache_crud
+
+# Parsed TDAs by content: SHA-256 of the PDF bytes + the parser version.
+# Students re-upload the same audit while they try preferences; those
+# uploads are answered from tda_cache (crud/tda_cache_crud.py) without
+# calling OpenAI. The version hashes the model and prompt, so editing the
+# prompt misses the old entries (and startup deletes them); DELETE
+# /tda/cache clears everything, e.g. after a change to the parsing code.
+# Only successful parses are stored: errors may be a network blip.
+# A cache failure never fails an upload, it just parses.
+
+ENABLED = os.getenv("TITAN_TDA_CACHE", "1") != "0"
+TTL_SECONDS = float(os.getenv("TITAN_TDA_CACHE_TTL_DAYS", "30")) * 86400
+MAX_ENTRIES = int(os.getenv("TITAN_TDA_CACHE_MAX_ENTRIES", "5000"))
+
+_LOCK = threading.Lock()
+_STATS = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "invalidated": 0, "cache_errors": 0}
+# one parse per PDF at a time: a double submit waits for the first and hits
+_IN_FLIGHT: Dict[str, threading.Lock] = {}
+
+
+def parser_version(model: str, prompt: str, revision: int = 1) -> str:
+    """Cache version for a model + prompt; bump revision when the parsing code changes."""
+    return hashlib.sha256(f"{model}\0{revision}\0{prompt}".encode()).hexdigest()[:16]
+
+
+def _count(name: str, n: int = 1):
+    with _LOCK:
+        _STATS[name] += n
+
+
+def ensure(version: str):
+    """Create the table and drop entries of other parser versions (startup)."""
+    tda_cache_crud.ensure_tda_cache()
+    stale = tda_cache_crud.delete_entries(keep_version=version)
+    _count("invalidated", stale)
+    if stale:
+        print(f"TDA cache: dropped {stale} entries of an older parser version.")
+
+
+def _lookup(digest: str, version: str):
+    try:
+        return tda_cache_crud.get_entry(digest, version, time.time() - TTL_SECONDS)
+    except Exception as e:
+        print("TDA cache read failed:", e)
+        _count("cache_errors")
+        return None
+
+
+def _store(digest: str, version: str, result: dict):
+    try:
+        evicted = tda_cache_crud.put_entry(digest, version, result, time.time() - TTL_SECONDS, MAX_ENTRIES)
+    except Exception as e:
+        print("TDA cache write failed:", e)
+        _count("cache_errors")
+        return
+    with _LOCK:
+        _STATS["stores"] += 1
+        _STATS["evictions"] += evicted
+
+
+def lookup(file_bytes: bytes, version: str):
+    """The cached parse of these PDF bytes (counted as a hit or miss), or None."""
+    if not ENABLED:
+        return None
+    result = _lookup(hashlib.sha256(file_bytes).hexdigest(), version)
+    _count("hits" if result is not None else "misses")
+    return result
+
+
+def store(file_bytes: bytes, version: str, result: dict):
+    """Keep a successful parse."""
+    if ENABLED and result.get("status") != "error":
+        _store(hashlib.sha256(file_bytes).hexdigest(), version, result)
+
+
+def cached_parse(file_bytes: bytes, version: str, parse: Callable[[], dict]) -> dict:
+    """parse()'s result for these PDF bytes, from the cache when it has them."""
+    if not ENABLED:
+        return parse()
+    key = f"{hashlib.sha256(file_bytes).hexdigest()}:{version}"
+    with _LOCK:
+        flight = _IN_FLIGHT.setdefault(key, threading.Lock())
+    try:
+        with flight:
+            result = lookup(file_bytes, version)
+            if result is not None:
+                return result
+            result = parse()
+            store(file_bytes, version, result)
+            return result
+    finally:
+        with _LOCK:
+            if not flight.locked():
+                _IN_FLIGHT.pop(key, None)
+
+
+def invalidate() -> int:
+    """Delete every cached parse; returns how many there were."""
+    removed = tda_cache_crud.delete_entries()
+    _count("invalidated", removed)
+    return removed
+
+
+def stats() -> dict:
+    with _LOCK:
+        counters = dict(_STATS)
+    lookups = counters["hits"] + counters["misses"]
+    totals = tda_cache_crud.get_totals() if ENABLED else {"entries": 0, "size_bytes": 0}
+    return {
+        "enabled": ENABLED,
+        "ttl_seconds": TTL_SECONDS,
+        "max_entries": MAX_ENTRIES,
+        **totals,
+        **counters,
+        "hit_rate": round(counters["hits"] / lookups, 3) if lookups else None,
+    }
+
+
+def close():
+    tda_cache_crud.close_pool()
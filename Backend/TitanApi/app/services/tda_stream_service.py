@@ -0,0 +1,90 @@
+import time
+from typing import AsyncIterator
+
+from parser import PDF_parser
+from services import executors, sse
+import cache
+
+# Server-sent events for POST /tda/upload/stream.
+# PDF_parser.parse_tda_events runs on the tda lane like /tda/upload and
+# hands its stages to the event loop (executors.stream); each course id gets
+# its open sections (from the cache snapshot) as soon as it is known, so the
+# page can show the first sections while the model is still answering.
+# Events:
+#   received, text_extracted, courses_identified  stage progress
+#   sections  {course_id, sections, count}        once per course with open sections or not
+#   done      {total_classes, courses, elapsed_ms}
+#   error     {detail}                            the parse failed; nothing follows
+# Every event carries elapsed_ms since the upload was received.
+
+KEEPALIVE_SECONDS = 15.0
+
+
+def _produce(emit, file_bytes: bytes, filename: str):
+    events = PDF_parser.parse_tda_events(file_bytes, filename)
+    try:
+        # emit raises StreamClosed once the client is gone: no more backend reads
+        for item in events:
+            emit(item)
+    except executors.StreamClosed:
+        raise
+    except Exception as e:
+        emit(("result", {"status": "error", "errors": [str(e)]}))
+    finally:
+        events.close()
+
+
+def start(file_bytes: bytes, filename: str) -> AsyncIterator[str]:
+    """
+    Queue the parse on the tda lane and return the SSE body. Raises
+    LaneFull right away (before any response is sent) when the lane is full.
+    """
+    items = executors.stream("tda", _produce, file_bytes, filename, idle_seconds=KEEPALIVE_SECONDS)
+    return _stream(items, time.perf_counter())
+
+
+async def _stream(items: AsyncIterator, start: float) -> AsyncIterator[str]:
+    def elapsed():
+        return round((time.perf_counter() - start) * 1000, 1)
+
+    sent = {}  # normalized course id -> section count
+    try:
+        async for item in items:
+            if item is None:
+                yield sse.KEEPALIVE
+                continue
+            stage, data = item
+
+            if stage == "course":
+                course_id = cache.normalize_course_id(data)
+                if course_id not in sent:
+                    yield _course_event(course_id, sent, elapsed())
+            elif stage == "result":
+                if data.get("status") == "error":
+                    yield sse.event("error", {"detail": data.get("errors", ["Unknown error"]), "elapsed_ms": elapsed()})
+                    return
+                # backends may name a course only in the final answer
+                for course in data.get("courses_allowed") or []:
+                    course_id = cache.normalize_course_id(course)
+                    if course_id not in sent:
+                        yield _course_event(course_id, sent, elapsed())
+                yield sse.event("done", {
+                    "total_classes": sum(sent.values()),
+                    "courses": len(sent),
+                    "elapsed_ms": elapsed(),
+                })
+            else:
+                yield sse.event(stage, {**data, "elapsed_ms": elapsed()})
+    finally:
+        await items.aclose()  # stops the parse if the client went away
+
+
+def _course_event(course_id: str, sent: dict, elapsed_ms: float) -> str:
+    sections = PDF_parser.match_open_classes([course_id])["eligible_classes"]
+    sent[course_id] = len(sections)
+    return sse.event("sections", {
+        "course_id": course_id,
+        "sections": sections,
+        "count": len(sections),
+        "elapsed_ms": elapsed_ms,
+    })
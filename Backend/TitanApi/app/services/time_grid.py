@@ -0,0 +1,65 @@
+from typing import Dict, Iterable
+
+from services.open_query_service import DAY_NUMS
+
+# A section's meeting times as one Python int: bit (day - 1) * SLOTS_PER_DAY
+# + minute // SLOT_MINUTES is set while it meets (day 1 = Monday, like
+# day_mask). Two sections clash when their grids AND to non-zero, so the
+# schedule engine checks a section against everything picked so far with
+# one AND instead of comparing meetings pairwise. cache.py builds the grid
+# of every section when it publishes a snapshot (OpenSnapshot.grids).
+# Meetings are rounded out to whole slots; class times are on 5 minutes.
+# /open/query time filters stay on the per-meeting NumPy columns
+# (services/open_query_service.py): a window over the whole catalog is
+# ~100x cheaper there (benchmarks/bench_time_grid.py).
+
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+DAY_SLOTS_MASK = (1 << SLOTS_PER_DAY) - 1
+
+
+def week_grid(meetings: Iterable[dict]) -> int:
+    """Slot bits of a section's meetings; TBA/online meetings take no slots."""
+    grid = 0
+    for m in meetings:
+        day = DAY_NUMS.get(m.get("day"), 0)
+        start, end = m.get("start"), m.get("end")
+        if not 1 <= day <= 7 or start is None or end is None or end <= start:
+            continue
+        first = (day - 1) * SLOTS_PER_DAY + start // SLOT_MINUTES
+        last = (day - 1) * SLOTS_PER_DAY + -(-end // SLOT_MINUTES)  # exclusive, rounded up
+        grid |= ((1 << (last - first)) - 1) << first
+    return grid
+
+
+def build_grids(groups: Dict[tuple, dict], previous: Dict[tuple, dict] = None,
+                previous_grids: Dict[tuple, int] = None) -> Dict[tuple, int]:
+    """Grid per group key; groups that are the same object as in previous keep their grid."""
+    previous = previous or {}
+    previous_grids = previous_grids or {}
+    return {
+        key: previous_grids[key] if previous.get(key) is group and key in previous_grids
+        else week_grid(group.get("meetings") or ())
+        for key, group in groups.items()
+    }
+
+
+def day_bits(grid: int) -> int:
+    """The day_mask of a grid: bit (day - 1) for every day with a slot set."""
+    days = 0
+    for day in range(7):
+        if (grid >> (day * SLOTS_PER_DAY)) & DAY_SLOTS_MASK:
+            days |= 1 << day
+    return days
+
+
+def idle_hours(grid: int) -> float:
+    """Hours between the first and last class of each day that are not in class."""
+    idle = 0
+    for day in range(7):
+        bits = (grid >> (day * SLOTS_PER_DAY)) & DAY_SLOTS_MASK
+        if bits:
+            span = bits.bit_length() - ((bits & -bits).bit_length() - 1)
+            idle += span - bits.bit_count()
+    return idle * SLOT_MINUTES / 60
+
@@ -0,0 +1,119 @@
+"""
+Startup cache build: old pandas group_meetings vs the streaming grouper.
+
+Run from anywhere:
+    python Backend/TitanApi/benchmarks/bench_open_cache.py [--repeat 5]
+
+Reads the bundled openclasslist.db, never writes to it.
+"""
+import argparse
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+import numpy as np
+import pandas as pd
+
+from db import get_conn
+from crud import open_class_list_crud
+
+
+def legacy_group_meetings(df):
+    # group_meetings as it was before the streaming grouper
+    df = pd.DataFrame(df)
+    df["meeting"] = list(zip(
+        df["day_of_week"].to_numpy(),
+        df["start_min"].to_numpy(),
+        df["end_min"].to_numpy(),
+        df["room"].to_numpy()
+    ))
+    grouped = (
+        df.groupby(
+            ["term", "crn", "course_id", "title", "units", "section", "professor", "status"],
+            sort=False,
+            as_index=False
+        ).agg(meetings=("meeting", list))
+    )
+    result = []
+    for row in grouped.itertuples(index=False):
+        meeting_list = [
+            {
+                "day": int(d) if isinstance(d, (np.integer,)) else d,
+                "start": int(s) if isinstance(s, (np.integer,)) else s,
+                "end": int(e) if isinstance(e, (np.integer,)) else e,
+                "room": r
+            }
+            for (d, s, e, r) in row.meetings
+        ]
+        result.append({
+            "term": row.term,
+            "crn": int(row.crn) if isinstance(row.crn, (np.integer,)) else row.crn,
+            "course_id": row.course_id,
+            "title": row.title,
+            "units": row.units,
+            "section": row.section,
+            "professor": row.professor,
+            "status": row.status,
+            "meetings": meeting_list
+        })
+    return result
+
+
+def legacy_build():
+    with get_conn(readonly=True) as c:
+        rows = [dict(row) for row in c.execute("SELECT * FROM open_classes").fetchall()]
+        rows = open_class_list_crud.convert_days_of_week(rows)
+        return legacy_group_meetings(rows)
+
+
+def streaming_build():
+    return open_class_list_crud.get_open_class_groups()
+
+
+def measure(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, statistics.median(times), peak
+
+
+def by_key(groups):
+    return {
+        (g["term"], str(g["crn"])): (
+            g["course_id"], g["title"], g["units"], g["section"], g["professor"], g["status"],
+            sorted((m["day"] or "", m["start"], m["end"], m["room"]) for m in g["meetings"]),
+        )
+        for g in groups
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    legacy, legacy_t, legacy_peak = measure(legacy_build, args.repeat)
+    stream, stream_t, stream_peak = measure(streaming_build, args.repeat)
+
+    same = by_key(legacy) == by_key(stream)
+    print(f"groups: legacy={len(legacy)} streaming={len(stream)} identical={same}")
+    print(f"{'impl':<10} {'median ms':>10} {'peak MiB':>10}")
+    print(f"{'pandas':<10} {legacy_t * 1000:>10.1f} {legacy_peak / 2**20:>10.2f}")
+    print(f"{'streaming':<10} {stream_t * 1000:>10.1f} {stream_peak / 2**20:>10.2f}")
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
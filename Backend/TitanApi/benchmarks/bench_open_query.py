@@ -0,0 +1,154 @@
+"""
+/open/query: SQL (open_class_query_crud) vs the in-memory engine
+(services/open_query_service) over the cache snapshot.
+
+Runs a fixed set of lookups plus randomized filter combinations through both
+paths on a temporary copy of openclasslist.db, fails (exit 1) on the first
+result that differs, then prints per-query latency for each. The batch
+lookup (/open/query/batch) is checked against one query per course.
+
+    python Backend/TitanApi/benchmarks/bench_open_query.py [--cases 500] [--repeat 5] [--seed 0]
+"""
+import argparse
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+import db
+import cache
+from crud import open_classes_mat_crud, open_class_query_crud
+from services import open_query_service
+from schemas import OpenQueryFilters
+
+# What script.js and the TDA page actually send, plus the edge cases
+FIXED_CASES = [
+    OpenQueryFilters(subject="CPSC", course="131"),
+    OpenQueryFilters(subject="cpsc", course="131", only_open=False),
+    OpenQueryFilters(subject="MATH", course="150A", term="Fall 2025"),
+    OpenQueryFilters(subject="CPSC", course="131", days=[1, 3], days_mode="all"),
+    OpenQueryFilters(subject="CPSC", course="131", modality="online", time_start=480, time_end=720),
+    OpenQueryFilters(crn="11942"),
+    OpenQueryFilters(only_open=False),
+    OpenQueryFilters(time_end=600, only_open=False),
+    OpenQueryFilters(days=[6, 7], modality="hybrid", only_open=False),
+    OpenQueryFilters(subject="NOPE", course="999"),
+]
+
+
+def random_filters(rng, groups):
+    g = rng.choice(groups)
+    days = rng.sample(range(1, 8), rng.randint(1, 3)) if rng.random() < 0.4 else []
+    start = rng.choice([None, None, 420, 480, 600, 720, 900, 1080])
+    end = rng.choice([None, None, 600, 720, 900, 1140, 1320])
+    course = None
+    if rng.random() < 0.6:
+        number = str(g.get("number") or "")
+        course = rng.choice([g["course_id"], number, number[:2], g["course_id"].lower()])
+    return OpenQueryFilters(
+        term=rng.choice([None, None, g["term"], g["term"].upper(), "Spring 1999"]),
+        subject=rng.choice([None, g.get("subject"), (g.get("subject") or "").lower()]),
+        course=course or None,
+        crn=str(g["crn"]) if rng.random() < 0.1 else None,
+        only_open=rng.random() < 0.5,
+        time_start=start,
+        time_end=end,
+        days=days,
+        days_mode=rng.choice(["any", "all"]),
+        modality=rng.choice([None, None, "online", "inperson", "hybrid"]),
+    )
+
+
+def batch_courses(rng, groups, size):
+    ids = rng.sample(sorted({g["course_id"] for g in groups}), size)
+    return {cid: (cid.split()[0], " ".join(cid.split()[1:])) for cid in ids if len(cid.split()) > 1}
+
+
+def median_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cases", type=int, default=500)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = Path(tmp) / "openclasslist.db"
+        shutil.copy(db.ROOT / "TitanSchedulerDatabase" / "openclasslist.db", db.DB_PATH)
+        open_classes_mat_crud.ensure_open_classes_mat()
+
+        start = time.perf_counter()
+        snapshot = cache.rebuild_open_cache()
+        build_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        open_query_service.build_columns(snapshot.data)
+        columns_ms = (time.perf_counter() - start) * 1000
+
+        rng = random.Random(args.seed)
+        cases = FIXED_CASES + [random_filters(rng, snapshot.data) for _ in range(args.cases)]
+
+        sql_ms, mem_ms, matched = [], [], 0
+        for f in cases:
+            expected = open_class_query_crud.run_open_query(f)
+            got = open_query_service.run_open_query(snapshot.columns, f)
+            if got != expected:
+                print(f"MISMATCH {f.model_dump(exclude_defaults=True)}: sql={len(expected)} rows, memory={len(got)} rows")
+                db.close_pools()
+                sys.exit(1)
+            matched += bool(expected)
+            sql_ms.append(median_ms(lambda: open_class_query_crud.run_open_query(f), args.repeat))
+            mem_ms.append(median_ms(lambda: open_query_service.run_open_query(snapshot.columns, f), args.repeat))
+
+        courses = batch_courses(rng, snapshot.data, 20)
+        batch_f = OpenQueryFilters()
+        singles = {
+            key: open_class_query_crud.run_open_query(batch_f.model_copy(update={"subject": subj, "course": course}))
+            for key, (subj, course) in courses.items()
+        }
+        for name, run in (
+            ("sql", lambda: open_class_query_crud.run_open_query_batch(batch_f, courses)),
+            ("memory", lambda: open_query_service.run_open_query_batch(snapshot.columns, batch_f, courses)),
+        ):
+            if run() != singles:
+                print(f"MISMATCH batch ({name}) vs one query per course")
+                db.close_pools()
+                sys.exit(1)
+        batch_ms = {
+            "singles": median_ms(lambda: [open_class_query_crud.run_open_query(
+                batch_f.model_copy(update={"subject": subj, "course": course}))
+                for subj, course in courses.values()], args.repeat),
+            "sql batch": median_ms(lambda: open_class_query_crud.run_open_query_batch(batch_f, courses), args.repeat),
+            "memory batch": median_ms(lambda: open_query_service.run_open_query_batch(
+                snapshot.columns, batch_f, courses), args.repeat),
+        }
+
+        db.close_pools()
+
+    print(f"{len(cases)} cases identical ({matched} non-empty); "
+          f"snapshot build {build_ms:.1f} ms, of which columns {columns_ms:.1f} ms")
+    print(f"{'path':<8} {'median ms':>10} {'p95 ms':>10} {'max ms':>10}")
+    for name, ms in (("sql", sql_ms), ("memory", mem_ms)):
+        ms = sorted(ms)
+        p95 = ms[int(len(ms) * 0.95) - 1]
+        print(f"{name:<8} {statistics.median(ms):>10.3f} {p95:>10.3f} {ms[-1]:>10.3f}")
+
+    print(f"batch of {len(courses)} courses, identical to one query per course:")
+    for name, ms in batch_ms.items():
+        print(f"  {name:<13} {ms:>10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+/open/upload ingest: sequential checks vs parallel=True (one partition per
+term, checked in worker processes, one writer connection).
+
+Builds a synthetic multi-term open-classes CSV (--terms terms of --sections
+sections, 1-3 meetings each, a few bad rows) and ingests it both ways on
+temporary copies of openclasslist.db. Fails (exit 1) if the results or the
+tables differ, then prints wall time and time spent in the checks.
+
+    python Backend/TitanApi/benchmarks/bench_parallel_ingest.py [--terms 8] [--sections 6000] [--workers N]
+"""
+import argparse
+import io
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+import db
+from crud import open_classes_mat_crud, section_digest_crud
+from services import csv_scraper_service, executors
+
+HEADER = "term,course_id,crn,section,day_of_week,start_min,end_min,room,instruction_mode,professor,status"
+MODES = ["In Person", "Online", "Hybrid"]
+
+
+def synthetic_csv(terms, sections, course_ids, rng):
+    lines = [HEADER]
+    for t in range(terms):
+        term = f"Bench {2040 + t}"
+        for i in range(sections):
+            crn = str(50000 + i)
+            course_id = rng.choice(course_ids) if rng.random() > 0.005 else "NOPE 000"
+            mode = rng.choice(MODES)
+            professor = rng.choice(["", "Ada Lovelace", "Alan Turing"])
+            days = rng.sample(range(1, 6), rng.randint(1, 3)) if mode != "Online" else [-1]
+            start = rng.randrange(420, 1200, 5)
+            for day in days:
+                end = start + 75 if day != -1 else -1
+                if rng.random() < 0.005:
+                    end = start  # breaks end_after_start
+                lines.append(",".join(str(v) for v in (
+                    term, course_id, crn, f"{i % 30 + 1:02d}", day, -1 if day == -1 else start,
+                    end, "Online" if day == -1 else f"CS {100 + i % 300}", mode, professor, "Open",
+                )))
+    return ("\n".join(lines) + "\n").encode()
+
+
+def ingest(path, data, chunk_rows, parallel):
+    db.close_pools()
+    db.DB_PATH = path
+    shutil.copy(db.ROOT / "TitanSchedulerDatabase" / "openclasslist.db", path)
+    open_classes_mat_crud.ensure_open_classes_mat()
+    section_digest_crud.ensure_section_digest()
+
+    start = time.perf_counter()
+    result = csv_scraper_service.scrape_csv_stream(io.BytesIO(data), chunk_rows=chunk_rows, parallel=parallel)
+    wall_ms = (time.perf_counter() - start) * 1000
+    with db.get_conn(readonly=True) as c:
+        tables = {
+            "section": c.execute("SELECT * FROM section ORDER BY term_id, crn").fetchall(),
+            "meeting": c.execute(
+                "SELECT term_id, crn, day_of_week, start_min, end_min, room FROM meeting "
+                "ORDER BY term_id, crn, day_of_week"
+            ).fetchall(),
+        }
+    db.close_pools()
+    timings = result.pop("timings", {})
+    return wall_ms, timings, result, tables
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--terms", type=int, default=8)
+    ap.add_argument("--sections", type=int, default=6000)
+    ap.add_argument("--chunk-rows", type=int, default=csv_scraper_service.csv_stream.CHUNK_ROWS)
+    ap.add_argument("--workers", type=int, default=executors.CPU_WORKERS)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    executors.CPU_WORKERS = args.workers
+    executors.BATCHES_AHEAD = 2 * args.workers
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = Path(tmp) / "courses.db"
+        shutil.copy(db.ROOT / "TitanSchedulerDatabase" / "openclasslist.db", db.DB_PATH)
+        with db.get_conn(readonly=True) as c:
+            course_ids = [r[0] for r in c.execute("SELECT course_id FROM course ORDER BY course_id")]
+        data = synthetic_csv(args.terms, args.sections, course_ids, random.Random(args.seed))
+
+        # workers start once per server, not per upload
+        start = time.perf_counter()
+        list(executors.cpu_pool().map(abs, range(args.workers)))
+        pool_ms = (time.perf_counter() - start) * 1000
+
+        seq = ingest(Path(tmp) / "sequential.db", data, args.chunk_rows, False)
+        par = ingest(Path(tmp) / "parallel.db", data, args.chunk_rows, True)
+        executors.shutdown()
+
+    if seq[2] != par[2] or seq[3] != par[3]:
+        print("MISMATCH: parallel ingest differs from sequential")
+        sys.exit(1)
+
+    rows = data.count(b"\n") - 1
+    print(f"{rows} rows over {args.terms} terms, {args.workers} workers (started in {pool_ms:.0f} ms); "
+          f"results and tables identical, {len(seq[2]['errors'])} errors")
+    print(f"{'mode':<11} {'wall ms':>9} {'validate ms':>12} {'stage ms':>9} {'apply ms':>9}")
+    for name, (wall_ms, timings, _, _) in (("sequential", seq), ("parallel", par)):
+        print(f"{name:<11} {wall_ms:>9.0f} {timings.get('validate_ms', 0):>12.0f} "
+              f"{timings.get('stage_ms', 0):>9.0f} {timings.get('apply_ms', 0):>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Schedule search (services/schedule_engine.py) on synthetic catalogs of
+growing size: how much of the tree the branch and bound visits, how soon
+the first and the final best schedule show up (what /schedule/enumerate
+streams), and what the default time budget gets compared to a long one.
+
+Each catalog has --courses N courses (a fifth of them required) with 2 to
+--max-sections sections on MWF/MW/TR/single-day patterns between 7:00 and
+22:00, 3 or 4 units, professors with ratings, and a student who prefers
+Mon-Thu, 9:00-15:00 on Mon/Wed. Seeded, so runs compare.
+
+    python Backend/TitanApi/benchmarks/bench_schedule_enumerate.py [--courses 5,10,20,40,80,160] [--max-sections 8] [--long-ms 5000]
+"""
+import argparse
+import math
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from services import schedule_engine
+
+PATTERNS = [("Mon", "Wed", "Fri"), ("Mon", "Wed"), ("Tue", "Thur"), ("Mon",), ("Tue",), ("Wed",), ("Thur",), ("Fri",)]
+LENGTHS = {1: 165, 2: 75, 3: 50}  # minutes per meeting by meetings a week
+
+
+def catalog(n_courses: int, max_sections: int, rng: random.Random):
+    by_course, ratings = {}, {}
+    professors = [f"Professor {i}" for i in range(max(10, n_courses))]
+    for name in professors:
+        if rng.random() < 0.7:
+            ratings[name] = round(rng.uniform(1.5, 5.0), 1)
+    for c in range(n_courses):
+        course_id = f"SYN {100 + c}"
+        units = rng.choice((3, 3, 3, 4))
+        sections = []
+        for s in range(rng.randint(2, max_sections)):
+            days = rng.choice(PATTERNS)
+            length = LENGTHS[len(days)]
+            start = rng.randrange(7 * 60, 22 * 60 - length, 30)
+            sections.append({
+                "term": "Synthetic", "crn": f"{c}{s:02d}", "course_id": course_id, "units": units,
+                "section": f"{s + 1:02d}", "professor": rng.choice(professors),
+                "meetings": [{"day": d, "start": start, "end": start + length, "room": "X"} for d in days],
+            })
+        by_course[course_id] = tuple(sections)
+    return by_course, ratings
+
+
+def run(courses, prefs, budget_ms):
+    improvements = []
+    result = schedule_engine.search(courses, 15, k=5, time_budget_ms=budget_ms, prefs=prefs,
+                                    on_improve=improvements.append)
+    return result, improvements
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--courses", default="5,10,20,40,80,160")
+    ap.add_argument("--max-sections", type=int, default=8)
+    ap.add_argument("--long-ms", type=float, default=5000)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    print(f"default budget {schedule_engine.TIME_BUDGET_MS:.0f} ms vs long {args.long_ms:.0f} ms, top 5, 15 units")
+    print(f"{'courses':>7} {'sections':>8} {'tree':>8} {'nodes':>9} {'ms':>8} {'done':>5} {'first ms':>8} "
+          f"{'best ms':>8} {'best':>8} {'@default':>9}")
+    for n in (int(x) for x in args.courses.split(",")):
+        rng = random.Random(args.seed + n)
+        by_course, ratings = catalog(n, args.max_sections, rng)
+        prefs = schedule_engine.preferences(
+            days=["Mon", "Tue", "Wed", "Thu"],
+            times_by_day={"Mon": ["09:00-15:00"], "Wed": ["09:00-15:00"]},
+            ratings=ratings,
+        )
+        ids = list(by_course)
+        courses, _ = schedule_engine.build_courses(ids, required=ids[: max(1, n // 5)], by_course=by_course,
+                                                   prefs=prefs)
+        # leaves of the unpruned tree: every course skipped or at one of its options
+        tree = sum(math.log10(len(c.options) + 1) for c in courses)
+
+        result, improvements = run(courses, prefs, args.long_ms)
+        default, _ = run(courses, prefs, schedule_engine.TIME_BUDGET_MS)
+        best = result["schedules"][0]["score"]
+        print(f"{n:>7} {sum(len(v) for v in by_course.values()):>8} {'1e%.0f' % tree:>8} {result['nodes']:>9} "
+              f"{result['ms']:>8.1f} {'yes' if result['complete'] else 'no':>5} {improvements[0]['ms']:>8.1f} "
+              f"{improvements[-1]['ms']:>8.1f} {best:>8.2f} {default['schedules'][0]['score']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+/courses/upload, /sections/upload, /meetings/upload: the shared table loader
+(services/table_loader.py) with column checks vs one Pydantic model per row.
+
+Builds a synthetic catalog (courses, sections, meetings; --rows rows each,
+with a few bad and duplicated rows) and, on temporary copies of
+openclasslist.db, checks every chunk both ways and loads the three files
+both ways. Fails (exit 1) if the staged rows, the error messages or the
+resulting tables differ, then prints the timings.
+
+    python Backend/TitanApi/benchmarks/bench_table_loader.py [--rows 100000] [--seed 0]
+"""
+import argparse
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+import db
+from db import get_conn
+from crud import open_classes_mat_crud, section_digest_crud
+from services import courses_csv, csv_stream, meetings_csv, sections_csv, table_loader
+
+MODES = ["In Person", "Online", "Hybrid"]
+STATUSES = ["Open", "Closed", "Waitlist"]
+
+
+def synthetic_catalog(rows, terms, rng):
+    """CSV bytes for (courses, sections, meetings); about 1% bad rows, 1% repeats."""
+    # Children only reference parents that load, or the insert fails on a foreign key
+    courses = ["course_id,subject,number,description,units,prereq,coreq"]
+    course_ids = []
+    for i in range(rows):
+        subject, number = f"ZB{i % 500:03d}", f"{100 + i // 500}{'ABCD'[i % 4]}"
+        course_id = f"{subject} {number}"
+        units = rng.choice(["x", ""]) if rng.random() < 0.01 else rng.choice(["1", "3", "4", "1.5"])
+        if units[:1].isdigit():
+            course_ids.append(course_id)
+        courses.append(f"{course_id},{subject},{number},Bench course {i},{units},,")
+    courses += rng.sample(courses[1:], rows // 100)
+
+    sections = ["term_id,crn,course_id,section,instruction_mode,professor,status"]
+    keys = []
+    for i in range(rows):
+        term_id, crn = rng.choice(terms), str(900000 + i)
+        bad = rng.random() < 0.01
+        if not bad:
+            keys.append((term_id, crn))
+        sections.append(",".join([
+            rng.choice(["x", ""]) if bad else str(term_id), crn, rng.choice(course_ids),
+            f"{i % 20 + 1:02d}", rng.choice(MODES), rng.choice(["", "Ada Lovelace", "Alan Turing"]),
+            rng.choice(STATUSES),
+        ]))
+    sections += rng.sample(sections[1:], rows // 100)
+
+    meetings = ["term_id,crn,day_of_week,start_min,end_min,room"]
+    for i in range(rows):
+        term_id, crn = keys[i % len(keys)]
+        start = rng.randrange(420, 1260, 5)
+        day = str(i // len(keys) % 7 + 1)
+        if rng.random() < 0.01:
+            day = rng.choice(["", "Mon", "9", "-2"])
+        end = start + 75 if rng.random() >= 0.005 else rng.choice([start, start - 5])
+        meetings.append(f"{term_id},{crn},{day},{start},{end},{'' if rng.random() < 0.005 else 'CS 101'}")
+    meetings += rng.sample(meetings[1:], rows // 100)
+
+    return tuple(("\n".join(lines) + "\n").encode() for lines in (courses, sections, meetings))
+
+
+def check_chunks(spec, data, chunk_rows):
+    """Check every chunk both ways; returns (vectorized s, per-row s) or None on a mismatch."""
+    times = {True: 0.0, False: 0.0}
+    stream = csv_stream.as_stream(data)
+    csv_stream.read_header(stream)
+    for df in csv_stream.iter_chunks(stream, None, chunk_rows):
+        results = {}
+        for vectorized in (True, False):
+            start = time.perf_counter()
+            results[vectorized] = table_loader.check_chunk(spec, df.copy(), vectorized)
+            times[vectorized] += time.perf_counter() - start
+        if repr(results[True]) != repr(results[False]):  # 3 == 3.0, so compare types too
+            return None
+    return times[True], times[False]
+
+
+def load_all(path, files, chunk_rows, vectorized):
+    """Load the three files into a fresh copy of the DB; returns (seconds per table, table dumps)."""
+    db.close_pools()
+    db.DB_PATH = path
+    shutil.copy(db.ROOT / "TitanSchedulerDatabase" / "openclasslist.db", path)
+    open_classes_mat_crud.ensure_open_classes_mat()
+    section_digest_crud.ensure_section_digest()
+
+    seconds, dumps = {}, {}
+    for spec, data in files:
+        start = time.perf_counter()
+        result = table_loader.load_csv(spec, data, chunk_rows=chunk_rows, vectorized=vectorized)
+        seconds[spec.table] = time.perf_counter() - start
+        if result["status"] != "ok":
+            raise SystemExit(f"{spec.table} load failed: {result['errors'][:3]}")
+        with get_conn(readonly=True) as c:
+            cols = ", ".join(spec.names)
+            dumps[spec.table] = (result, c.execute(f"SELECT {cols} FROM {spec.table} ORDER BY {cols}").fetchall())
+    db.close_pools()
+    return seconds, dumps
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--chunk-rows", type=int, default=csv_stream.CHUNK_ROWS)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = Path(tmp) / "terms.db"
+        shutil.copy(db.ROOT / "TitanSchedulerDatabase" / "openclasslist.db", db.DB_PATH)
+        with get_conn(readonly=True) as c:
+            terms = [r[0] for r in c.execute("SELECT term_id FROM term ORDER BY term_id")]
+
+        start = time.perf_counter()
+        data = synthetic_catalog(args.rows, terms, random.Random(args.seed))
+        gen_ms = (time.perf_counter() - start) * 1000
+        files = list(zip((courses_csv.SPEC, sections_csv.SPEC, meetings_csv.SPEC), data))
+
+        checks = {}
+        for spec, blob in files:
+            checks[spec.table] = check_chunks(spec, blob, args.chunk_rows)
+            if checks[spec.table] is None:
+                print(f"MISMATCH {spec.table}: column checks and per-row models disagree")
+                db.close_pools()
+                sys.exit(1)
+
+        fast, fast_dump = load_all(Path(tmp) / "vectorized.db", files, args.chunk_rows, True)
+        slow, slow_dump = load_all(Path(tmp) / "per_row.db", files, args.chunk_rows, False)
+        if fast_dump != slow_dump:
+            bad = [t for t in fast_dump if fast_dump[t] != slow_dump[t]]
+            print(f"MISMATCH loaded tables: {bad}")
+            sys.exit(1)
+
+    print(f"{args.rows} rows per table (+1% repeats), generated in {gen_ms:.0f} ms; "
+          f"staged rows, errors and tables identical")
+    print(f"{'table':<8} {'rows':>8} {'errors':>7} {'check ms':>9} {'per-row ms':>11} {'load ms':>9} {'per-row load ms':>16}")
+    for spec, blob in files:
+        result = fast_dump[spec.table][0]
+        vec_s, row_s = checks[spec.table]
+        lines = blob.count(b"\n") - 1
+        print(f"{spec.table:<8} {lines:>8} {len(result['errors']):>7} "
+              f"{vec_s * 1000:>9.0f} {row_s * 1000:>11.0f} "
+              f"{fast[spec.table] * 1000:>9.0f} {slow[spec.table] * 1000:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
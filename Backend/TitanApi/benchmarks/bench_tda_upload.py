@@ -0,0 +1,151 @@
+"""
+/tda/upload end to end: rule-based parser (parser/tda_local.py) vs the
+LLM backend, plus a repeat upload answered from the TDA cache.
+
+Checks the local parse of TDA_Example.pdf (repo root) and its recorded
+fixture against the courses its TAKE==> lists leave open, worked out by
+hand (exit 1 on a difference), then times --runs
+uploads through the app per mode (--concurrency at a time) on a temporary
+copy of openclasslist.db and a temporary TDA cache. The backend mode only
+runs with --backend and uses TITAN_TDA_BACKEND (parser/tda_backends.py):
+with openai it needs OPENAI_API_KEY and costs a request per run, so for
+offline runs point OPENAI_BASE_URL at benchmarks/openai_stub_server.py or
+use TITAN_TDA_BACKEND=fixture. The openai backend is timed twice: with the
+whole PDF uploaded (file) and with the compacted text inline (text).
+
+    python Backend/TitanApi/benchmarks/bench_tda_upload.py [--runs 10] [--concurrency 1] [--backend] [--pdf path]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+REPO = Path(__file__).resolve().parents[3]
+
+# TDA_Example.pdf, worked out by hand from the audit text (not from the
+# parser): every "TAKE==>" list, which belongs to the block header after it,
+# under an unfulfilled ("-") block, minus the listed courses whose rows show
+# a grade of C- or better or IP. parser/fixtures/TDA_Example.*.json (the
+# fixture backend's answer) is checked against it too.
+IN_PROGRESS = ["CPSC 362", "CPSC 375", "MATH 338", "POSC 100"]  # FA25 rows with IP
+EXPECTED = [
+    # TAKE==> CPSC 471(FA06 or after),315,481,490,491   - CPSC UPPER DIVISION CORE - B; no rows
+    "CPSC 471", "CPSC 315", "CPSC 481", "CPSC 490", "CPSC 491",
+    # TAKE==> CPSC 362,351,335,332                       - CPSC UPPER DIVISION CORE - A; 362 is IP
+    "CPSC 351", "CPSC 335", "CPSC 332",
+    # TAKE==> CPSC 240 and TAKE==> MATH 338               - ... MATHEMATICS REQUIREMENT; 240 is a W, 338 IP
+    "CPSC 240",
+    # TAKE==> CPSC 254,301,349,375,386,411, ... (5 lines) - CPSC ELECTIVES; 375 is IP
+    "CPSC 254", "CPSC 301", "CPSC 349", "CPSC 386", "CPSC 411", "CPSC 411A", "CPSC 431",
+    "CPSC 439", "CPSC 440", "CPSC 449", "CPSC 352", "CPSC 454", "CPSC 456", "CPSC 458",
+    "CPSC 462", "CPSC 463", "CPSC 464", "CPSC 466", "CPSC 474", "CPSC 479", "CPSC 483",
+    "CPSC 484", "CPSC 485", "CPSC 486", "CPSC 499", "EGGN 495",
+    "MATH 335", "MATH 340", "MATH 370", "CPSC 455", "CPSC 459",
+    # TAKE==> POSC 100  HONR 201B(FA00 or after)         - AMERICAN GOVERNMENT; POSC 100 is IP
+    "HONR 201B",
+]
+
+
+def time_uploads(client, pdf, runs, concurrency=1):
+    """ms per POST /tda/upload, the last response and the wall time of all of them."""
+    from parser import tda_local
+
+    def upload(_):
+        tda_local.extract_pages.cache_clear()  # every run reads the PDF, like a new upload
+        start = time.perf_counter()
+        response = client.post("/tda/upload", files={"file": ("tda.pdf", pdf, "application/pdf")})
+        if response.status_code != 200:
+            raise SystemExit(f"/tda/upload failed: {response.status_code} {response.text[:300]}")
+        return (time.perf_counter() - start) * 1000, response
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        done = list(pool.map(upload, range(runs)))
+    wall_ms = (time.perf_counter() - start) * 1000
+    return [ms for ms, _ in done], done[-1][1].json(), wall_ms
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=10)
+    ap.add_argument("--concurrency", type=int, default=1)
+    ap.add_argument("--backend", action="store_true", help="also time TITAN_TDA_BACKEND (local rules off)")
+    ap.add_argument("--pdf", type=Path, default=REPO / "TDA_Example.pdf")
+    args = ap.parse_args()
+    pdf = args.pdf.read_bytes()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["TITAN_TDA_CACHE_PATH"] = str(Path(tmp) / "tda_cache.db")
+        import db
+        db.DB_PATH = Path(tmp) / "courses.db"
+        shutil.copy(db.ROOT / "TitanSchedulerDatabase" / "openclasslist.db", db.DB_PATH)
+
+        from fastapi.testclient import TestClient
+        import main as app_main
+        from parser import PDF_parser, tda_backends, tda_local
+        from services import tda_cache_service
+
+        local = tda_local.parse_tda_local(pdf)
+        if args.pdf.name == "TDA_Example.pdf":
+            answers = {"local parse": local["courses_allowed"]}
+            for fixture in tda_backends.FIXTURES_DIR.glob("TDA_Example.*.json"):
+                answers[f"fixture {fixture.name}"] = json.loads(fixture.read_text())["courses_allowed"]
+            failed = False
+            for name, courses in answers.items():
+                if courses != EXPECTED:
+                    print(f"MISMATCH: {name} of TDA_Example.pdf")
+                    print(" missing:", [c for c in EXPECTED if c not in courses])
+                    print(" extra:  ", [c for c in courses if c not in EXPECTED])
+                    failed = True
+            if sorted(local["in_progress"]) != IN_PROGRESS:
+                print(f"MISMATCH: local in_progress {local['in_progress']} != {IN_PROGRESS}")
+                failed = True
+            if failed:
+                sys.exit(1)
+
+        results = {}
+        with TestClient(app_main.app) as client:
+            tda_cache_service.ENABLED = False
+            results["local"] = time_uploads(client, pdf, args.runs, args.concurrency)
+            if args.backend:
+                PDF_parser.LOCAL_PARSER = False
+                backend = PDF_parser.BACKEND
+                if backend.name == "openai":
+                    for mode in ("file", "text"):
+                        backend.INPUT = mode
+                        results[f"openai/{mode}"] = time_uploads(client, pdf, args.runs, args.concurrency)
+                else:
+                    results[backend.name] = time_uploads(client, pdf, args.runs, args.concurrency)
+                backend_stats = backend.stats()
+                PDF_parser.LOCAL_PARSER = True
+            tda_cache_service.ENABLED = True
+            time_uploads(client, pdf, 1)
+            results["cached"] = time_uploads(client, pdf, args.runs, args.concurrency)
+        db.close_pools()
+
+    print(f"{args.pdf.name}: local parse confidence {local['confidence']:.2f}, "
+          f"{len(local['courses_allowed'])} courses allowed"
+          + (" (matches expected)" if args.pdf.name == "TDA_Example.pdf" else "")
+          + (f", issues: {local['issues']}" if local["issues"] else ""))
+    print(f"{args.runs} uploads per mode, {args.concurrency} at a time")
+    print(f"{'mode':<12} {'median ms':>10} {'min ms':>8} {'max ms':>8} {'uploads/s':>10} {'open sections':>14}")
+    for mode, (times, body, wall_ms) in results.items():
+        sections = next(iter(body.values()))["total_classes"]
+        print(f"{mode:<12} {statistics.median(times):>10.1f} {min(times):>8.1f} {max(times):>8.1f} "
+              f"{len(times) / wall_ms * 1000:>10.1f} {sections:>14}")
+    if args.backend:
+        print("backend:", backend_stats)
+    else:
+        print("(backend mode skipped; pass --backend to time TITAN_TDA_BACKEND)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Conflict checks: pairwise meeting comparison vs the week grid (services/time_grid.py).
+
+pairwise is hasTimeConflict from script.js ported as is: every meeting of
+one section against every meeting of the other, normalizing the day names
+on each comparison. grid is one AND of two ints built with the snapshot.
+Both run over --pairs random pairs of real sections and over checking a
+section against a --picked section partial schedule (what the schedule
+engine does per node), and must agree (exit 1 when they do not). Also
+times building the grids for the whole snapshot, and a time window over
+the catalog through the /open/query meeting columns vs the grids, which is
+why the filters do not use them.
+
+    python Backend/TitanApi/benchmarks/bench_time_grid.py [--pairs 20000] [--picked 5] [--repeat 5]
+
+Works on a temporary copy of openclasslist.db.
+"""
+import argparse
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+import numpy as np
+
+DAY_NAMES = {
+    "monday": "Mon", "mon": "Mon", "tuesday": "Tue", "tue": "Tue", "wednesday": "Wed", "wed": "Wed",
+    "thursday": "Thu", "thu": "Thu", "thur": "Thu", "friday": "Fri", "fri": "Fri",
+    "saturday": "Sat", "sat": "Sat", "sunday": "Sun", "sun": "Sun",
+}
+DAY_NUMBERS = {1: "Mon", 2: "Tue", 3: "Wed", 4: "Thu", 5: "Fri", 6: "Sat", 7: "Sun"}
+
+
+def normalize_day(day):
+    if isinstance(day, int):
+        return DAY_NUMBERS.get(day, str(day))
+    if isinstance(day, str):
+        return DAY_NAMES.get(day.lower(), day)
+    return day
+
+
+def pairwise_conflict(new_meetings, existing_sections):
+    """hasTimeConflict (script.js)."""
+    if not new_meetings:
+        return False
+    for existing in existing_sections:
+        for nm in new_meetings:
+            new_day = normalize_day(nm.get("day"))
+            if not new_day or new_day == "TBA" or nm.get("start") is None or nm.get("end") is None:
+                continue
+            for em in existing:
+                day = normalize_day(em.get("day"))
+                if not day or em.get("start") is None or em.get("end") is None:
+                    continue
+                if new_day == day and not (nm["end"] <= em["start"] or nm["start"] >= em["end"]):
+                    return True
+    return False
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return result, statistics.median(times)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pairs", type=int, default=20000)
+    ap.add_argument("--picked", type=int, default=5)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        import db
+        db.DB_PATH = Path(tmp) / "courses.db"
+        shutil.copy(db.ROOT / "TitanSchedulerDatabase" / "openclasslist.db", db.DB_PATH)
+        import cache
+        from services import time_grid
+        from services.open_query_service import _meeting_time_mask
+        from schemas import OpenQueryFilters
+
+        snapshot = cache.rebuild_open_cache()
+        db.close_pools()
+
+    keys = list(snapshot.groups)
+    sections = [snapshot.groups[k]["meetings"] for k in keys]
+    grids = [snapshot.grids[k] for k in keys]
+    n = len(keys)
+
+    _, build_s = timed(lambda: time_grid.build_grids(snapshot.groups), args.repeat)
+    _, reuse_s = timed(lambda: time_grid.build_grids(snapshot.groups, snapshot.groups, snapshot.grids), args.repeat)
+
+    pairs = [(rng.randrange(n), rng.randrange(n)) for _ in range(args.pairs)]
+    slow, pair_slow = timed(lambda: [pairwise_conflict(sections[a], [sections[b]]) for a, b in pairs], args.repeat)
+    fast, pair_fast = timed(lambda: [grids[a] & grids[b] != 0 for a, b in pairs], args.repeat)
+    pair_diff = sum(x != y for x, y in zip(slow, fast))
+
+    # a candidate against a partial schedule: the picked grids are OR'd once per node
+    checks = []
+    for _ in range(args.pairs // args.picked):
+        picked = [rng.randrange(n) for _ in range(args.picked)]
+        busy = 0
+        for i in picked:
+            busy |= grids[i]
+        checks.append((rng.randrange(n), picked, busy))
+    slow_s, sched_slow = timed(lambda: [pairwise_conflict(sections[c], [sections[i] for i in p]) for c, p, _ in checks],
+                               args.repeat)
+    fast_s, sched_fast = timed(lambda: [grids[c] & busy != 0 for c, _, busy in checks], args.repeat)
+    sched_diff = sum(x != y for x, y in zip(slow_s, fast_s))
+
+    # Mon/Wed 10:00-12:00 over the whole catalog
+    cols = snapshot.columns
+    f = OpenQueryFilters(time_start=600, time_end=720, days=[1, 3], only_open=False)
+    window = time_grid.week_grid([{"day": "Mon", "start": 600, "end": 720}, {"day": "Wed", "start": 600, "end": 720}])
+    words = -(-7 * time_grid.SLOTS_PER_DAY // 64)
+    grid_words = np.frombuffer(b"".join(g.to_bytes(words * 8, "little") for g in grids), dtype="<u8").reshape(n, words)
+    window_words = np.frombuffer(window.to_bytes(words * 8, "little"), dtype="<u8")
+    used = np.flatnonzero(window_words)
+    reps = args.repeat * 20
+    _, win_cols = timed(lambda: _meeting_time_mask(cols, f) & ((cols.meeting_bit & 0b101) != 0), reps)
+    _, win_words = timed(lambda: (grid_words[:, used] & window_words[used]).any(axis=1), reps)
+    _, win_ints = timed(lambda: [g & window != 0 for g in grids], reps)
+
+    print(f"{n} sections, grids built in {build_s * 1000:.1f} ms ({reuse_s * 1000:.1f} ms when reused after a refresh)")
+    print(f"{'check':<32} {'pairwise':>12} {'grid':>12} {'speedup':>8} {'disagree':>9}")
+    print(f"{'section vs section':<32} {pair_slow / len(pairs) * 1e9:>9.0f} ns {pair_fast / len(pairs) * 1e9:>9.0f} ns "
+          f"{pair_slow / pair_fast:>7.1f}x {pair_diff:>9}")
+    print(f"{f'section vs {args.picked} picked':<32} {sched_slow / len(checks) * 1e9:>9.0f} ns "
+          f"{sched_fast / len(checks) * 1e9:>9.0f} ns {sched_slow / sched_fast:>7.1f}x {sched_diff:>9}")
+    print(f"time window over the catalog: meeting columns {win_cols * 1e6:.1f} us, "
+          f"grid words {win_words * 1e6:.1f} us, grid ints {win_ints * 1e6:.1f} us")
+    if pair_diff or sched_diff:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+EXPLAIN QUERY PLAN regression check for /open/query.
+
+Builds open_classes_mat on a temporary copy of openclasslist.db and fails
+(exit 1) if any of the lookups the frontend sends does a full scan of the
+table instead of an index search.
+
+    python Backend/TitanApi/benchmarks/check_open_query_plan.py
+"""
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+import db
+from crud import open_classes_mat_crud, open_class_query_crud
+from schemas import OpenQueryFilters
+
+# What script.js and the TDA page actually send
+COMMON_LOOKUPS = [
+    OpenQueryFilters(subject="CPSC", course="131"),
+    OpenQueryFilters(subject="cpsc", course="131", only_open=False),
+    OpenQueryFilters(subject="MATH", course="150A", term="Fall 2025"),
+    OpenQueryFilters(subject="CPSC", course="131", days=[1, 3], days_mode="all"),
+    OpenQueryFilters(subject="CPSC", course="131", modality="online", time_start=480, time_end=720),
+    OpenQueryFilters(crn="11942"),
+]
+
+
+def full_scans(plan):
+    # "SCAN keys" is the small CTE result; anything else scanned is a table/index walk
+    return [line for line in plan if line.startswith("SCAN") and line != "SCAN keys"]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = Path(tmp) / "openclasslist.db"
+        shutil.copy(db.ROOT / "TitanSchedulerDatabase" / "openclasslist.db", db.DB_PATH)
+        open_classes_mat_crud.ensure_open_classes_mat()
+
+        failed = 0
+        for f in COMMON_LOOKUPS:
+            plan = open_class_query_crud.explain_open_query(f)
+            scans = full_scans(plan)
+            label = f.model_dump(exclude_defaults=True)
+            print(f"{'FAIL' if scans else 'ok  '} {label}")
+            for line in plan:
+                print(f"       {line}")
+            failed += bool(scans)
+
+        db.close_pools()
+
+    if failed:
+        print(f"{failed} lookup(s) fall back to a full scan")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
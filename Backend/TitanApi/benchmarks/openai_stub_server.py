@@ -0,0 +1,129 @@
+"""
+Stand-in for the two OpenAI endpoints parse_tda uses (POST /v1/files,
+POST /v1/responses), for offline latency and load runs of /tda/upload
+through the real OpenAI backend (parser/tda_backends.py): timeouts,
+retries and the concurrency limit all run as they would against OpenAI.
+
+Every response answers with --fixture (default: the recorded answer for
+TDA_Example.pdf) after --latency-ms (+ up to --jitter-ms); file uploads
+take --upload-ms. --error-rate of the requests fail with a 500 or a 429 so
+the retries get exercised. Requests with "stream": true get the answer as
+server-sent events, in --chunks text deltas spread over the latency.
+
+    python Backend/TitanApi/benchmarks/openai_stub_server.py [--port 8765] [--latency-ms 3000] [--upload-ms 0] [--error-rate 0.1]
+
+then start the app with
+    TITAN_TDA_BACKEND=openai OPENAI_API_KEY=stub OPENAI_BASE_URL=http://127.0.0.1:8765/v1
+(and TITAN_TDA_LOCAL=0 so the local parser does not answer first).
+"""
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+FIXTURES = Path(__file__).resolve().parents[1] / "app" / "parser" / "fixtures"
+
+
+def make_handler(answer: str, latency_ms: float, jitter_ms: float, upload_ms: float, error_rate: float,
+                 chunks: int, rng: random.Random):
+    ids = itertools.count(1)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _stream(self, response, wait):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            seq = itertools.count()
+
+            def event(body):
+                body["sequence_number"] = next(seq)
+                self.wfile.write(f"event: {body['type']}\ndata: {json.dumps(body)}\n\n".encode())
+                self.wfile.flush()
+
+            event({"type": "response.created", "response": {**response, "status": "in_progress", "output": []}})
+            step = -(-len(answer) // chunks)
+            for i in range(0, len(answer), step):
+                time.sleep(wait / chunks)
+                event({"type": "response.output_text.delta", "item_id": response["output"][0]["id"],
+                       "output_index": 0, "content_index": 0, "delta": answer[i:i + step], "logprobs": []})
+            event({"type": "response.completed", "response": response})
+
+        def do_POST(self):
+            size = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(size)
+            with lock:
+                n = next(ids)
+                fail = rng.random() < error_rate
+                wait = (latency_ms + rng.uniform(0, jitter_ms)) / 1000
+            now = int(time.time())
+
+            if self.path.endswith("/files"):
+                time.sleep(upload_ms / 1000)
+                if fail:
+                    return self._send(500, {"error": {"message": "stub: server error", "type": "server_error"}})
+                return self._send(200, {
+                    "id": f"file-stub{n}", "object": "file", "bytes": size, "created_at": now,
+                    "filename": "tda.pdf", "purpose": "assistants", "status": "processed",
+                })
+            if self.path.endswith("/responses"):
+                stream = json.loads(body or b"{}").get("stream")
+                if not stream:
+                    time.sleep(wait)
+                if fail:
+                    return self._send(429, {"error": {"message": "stub: rate limited", "type": "rate_limit_exceeded"}})
+                response = {
+                    "id": f"resp_stub{n}", "object": "response", "created_at": now, "status": "completed",
+                    "model": "stub", "parallel_tool_calls": True, "tool_choice": "auto", "tools": [],
+                    "output": [{
+                        "type": "message", "id": f"msg_stub{n}", "role": "assistant", "status": "completed",
+                        "content": [{"type": "output_text", "text": answer, "annotations": []}],
+                    }],
+                }
+                return self._stream(response, wait) if stream else self._send(200, response)
+            self._send(404, {"error": {"message": f"stub: no route {self.path}"}})
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--fixture", type=Path, default=next(FIXTURES.glob("TDA_Example.*.json")))
+    ap.add_argument("--latency-ms", type=float, default=3000)
+    ap.add_argument("--jitter-ms", type=float, default=0)
+    ap.add_argument("--upload-ms", type=float, default=0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--chunks", type=int, default=20)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    answer = json.dumps(json.loads(args.fixture.read_text()))
+    handler = make_handler(answer, args.latency_ms, args.jitter_ms, args.upload_ms, args.error_rate,
+                           args.chunks, random.Random(args.seed))
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), handler)
+    print(f"OpenAI stub on http://127.0.0.1:{args.port}/v1 ({args.latency_ms:.0f} ms, "
+          f"{args.error_rate:.0%} errors, answering {args.fixture.name})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+-- ingest_jobs.sql
+-- One row per background CSV ingest (POST /open/upload). Only the worker
+-- thread writes here: once when a job starts and once when it finishes, so
+-- it never waits on the write lock its own ingest holds. Queued jobs and
+-- the live counters of the running one stay in memory (see
+-- services/ingest_jobs_service.py). Applied at startup by
+-- crud/ingest_jobs_crud.py.
+
+CREATE TABLE IF NOT EXISTS ingest_job (
+  job_id         TEXT PRIMARY KEY,
+  kind           TEXT    NOT NULL,
+  filename       TEXT,
+  state          TEXT    NOT NULL DEFAULT 'running'
+                 CHECK (state IN ('running', 'done', 'error')),
+  stage          TEXT,
+  total_bytes    INTEGER,
+  rows_processed INTEGER NOT NULL DEFAULT 0,
+  rows_per_sec   REAL,
+  error_count    INTEGER NOT NULL DEFAULT 0,
+  errors         TEXT,      -- JSON list of row errors
+  result         TEXT,      -- JSON: inserted counts, timings, cache_version
+  created_at     REAL    NOT NULL,
+  started_at     REAL    NOT NULL,
+  finished_at    REAL
+);
+
+CREATE INDEX IF NOT EXISTS idx_ingest_job_created ON ingest_job(created_at);
@@ -0,0 +1,249 @@
+-- open_classes_mat.sql
+-- Optional materialized copy of the open_classes view.
+-- One row per meeting plus normalized columns and flags the query endpoint
+-- filters on, kept in sync by the triggers below so reads skip the
+-- section/term/course/meeting join. section_facts rolls those rows up to
+-- one row per (term_id, crn). Applied at startup by
+-- crud/open_classes_mat_crud.py, which rebuilds both tables right after.
+
+DROP TRIGGER IF EXISTS trg_ocm_meeting_insert;
+DROP TRIGGER IF EXISTS trg_ocm_meeting_update;
+DROP TRIGGER IF EXISTS trg_ocm_meeting_delete;
+DROP TRIGGER IF EXISTS trg_ocm_section_insert;
+DROP TRIGGER IF EXISTS trg_ocm_section_update;
+DROP TRIGGER IF EXISTS trg_ocm_section_delete;
+DROP TRIGGER IF EXISTS trg_ocm_course_update;
+DROP TRIGGER IF EXISTS trg_ocm_term_update;
+DROP TRIGGER IF EXISTS trg_ocm_term_delete;
+DROP TRIGGER IF EXISTS trg_facts_mat_insert;
+DROP TRIGGER IF EXISTS trg_facts_mat_update;
+DROP TRIGGER IF EXISTS trg_facts_mat_delete;
+DROP TABLE IF EXISTS section_facts;
+DROP VIEW IF EXISTS section_facts_src;
+DROP TABLE IF EXISTS open_classes_mat;
+DROP VIEW IF EXISTS open_classes_src;
+
+-- Same join as open_classes plus the precomputed columns.
+-- Column order must match open_classes_mat.
+CREATE VIEW open_classes_src AS
+SELECT
+  s.term_id,
+  t.term,
+  s.crn,
+  s.course_id,
+  c.subject,
+  c.number,
+  c.description AS title,
+  c.units,
+  c.prereq,
+  c.coreq,
+  s.section,
+  s.professor,
+  s.status,
+  m.day_of_week,
+  m.start_min,
+  m.end_min,
+  m.room,
+  UPPER(t.term)                                         AS term_uc,
+  UPPER(c.subject)                                      AS subject_uc,
+  UPPER(s.course_id)                                    AS course_id_uc,
+  UPPER(IFNULL(s.status, '')) LIKE 'OPEN%'              AS is_open,
+  CASE WHEN m.day_of_week BETWEEN 1 AND 7
+       THEN 1 << (m.day_of_week - 1) ELSE 0 END         AS day_bit,
+  UPPER(IFNULL(m.room, '')) LIKE '%ONLINE%'             AS is_online,
+  (TRIM(IFNULL(m.room, '')) <> ''
+   AND UPPER(IFNULL(m.room, '')) NOT LIKE '%ONLINE%'
+   AND UPPER(TRIM(IFNULL(m.room, ''))) <> 'TBA')        AS is_in_person
+FROM section AS s
+JOIN term    AS t ON t.term_id   = s.term_id
+JOIN course  AS c ON c.course_id = s.course_id
+JOIN meeting AS m ON m.term_id   = s.term_id
+                 AND m.crn       = s.crn;
+
+CREATE TABLE open_classes_mat (
+  term_id      INTEGER NOT NULL,
+  term         TEXT    NOT NULL,
+  crn          TEXT    NOT NULL,
+  course_id    TEXT    NOT NULL,
+  subject      TEXT,
+  number       TEXT,
+  title        TEXT,
+  units        INTEGER,
+  prereq       TEXT,
+  coreq        TEXT,
+  section      TEXT,
+  professor    TEXT,
+  status       TEXT,
+  day_of_week  INTEGER NOT NULL,
+  start_min    INTEGER,
+  end_min      INTEGER,
+  room         TEXT,
+  term_uc      TEXT,
+  subject_uc   TEXT,
+  course_id_uc TEXT,
+  is_open      INTEGER NOT NULL,
+  day_bit      INTEGER NOT NULL,
+  is_online    INTEGER NOT NULL,
+  is_in_person INTEGER NOT NULL,
+  PRIMARY KEY (term_id, crn, day_of_week)
+);
+
+-- Covering indexes for the lookups /open/query does
+CREATE INDEX idx_ocm_term_crn       ON open_classes_mat(term, crn);
+CREATE INDEX idx_ocm_term_uc        ON open_classes_mat(term_uc, crn);
+CREATE INDEX idx_ocm_crn            ON open_classes_mat(crn, term);
+CREATE INDEX idx_ocm_subject_course ON open_classes_mat(subject_uc, course_id_uc, is_open, term, crn);
+CREATE INDEX idx_ocm_day_time       ON open_classes_mat(day_of_week, start_min, end_min, term, crn);
+
+-- Trigger bodies delete then insert instead of INSERT OR REPLACE: the
+-- conflict mode of the statement that fires a trigger (INSERT OR IGNORE,
+-- or ABORT for an upsert) overrides the one written inside it, which
+-- silently skipped or failed the refresh of existing rows.
+
+-- MEETING
+CREATE TRIGGER trg_ocm_meeting_insert AFTER INSERT ON meeting
+BEGIN
+  DELETE FROM open_classes_mat
+  WHERE term_id = NEW.term_id AND crn = NEW.crn AND day_of_week = NEW.day_of_week;
+
+  INSERT INTO open_classes_mat
+  SELECT * FROM open_classes_src
+  WHERE term_id = NEW.term_id AND crn = NEW.crn AND day_of_week = NEW.day_of_week;
+END;
+
+CREATE TRIGGER trg_ocm_meeting_update AFTER UPDATE ON meeting
+BEGIN
+  DELETE FROM open_classes_mat
+  WHERE term_id = OLD.term_id AND crn = OLD.crn AND day_of_week = OLD.day_of_week;
+  DELETE FROM open_classes_mat
+  WHERE term_id = NEW.term_id AND crn = NEW.crn AND day_of_week = NEW.day_of_week;
+
+  INSERT INTO open_classes_mat
+  SELECT * FROM open_classes_src
+  WHERE term_id = NEW.term_id AND crn = NEW.crn AND day_of_week = NEW.day_of_week;
+END;
+
+CREATE TRIGGER trg_ocm_meeting_delete AFTER DELETE ON meeting
+BEGIN
+  DELETE FROM open_classes_mat
+  WHERE term_id = OLD.term_id AND crn = OLD.crn AND day_of_week = OLD.day_of_week;
+END;
+
+-- SECTION
+CREATE TRIGGER trg_ocm_section_insert AFTER INSERT ON section
+BEGIN
+  DELETE FROM open_classes_mat WHERE term_id = NEW.term_id AND crn = NEW.crn;
+
+  INSERT INTO open_classes_mat
+  SELECT * FROM open_classes_src
+  WHERE term_id = NEW.term_id AND crn = NEW.crn;
+END;
+
+CREATE TRIGGER trg_ocm_section_update AFTER UPDATE ON section
+BEGIN
+  DELETE FROM open_classes_mat WHERE term_id = OLD.term_id AND crn = OLD.crn;
+  DELETE FROM open_classes_mat WHERE term_id = NEW.term_id AND crn = NEW.crn;
+
+  INSERT INTO open_classes_mat
+  SELECT * FROM open_classes_src
+  WHERE term_id = NEW.term_id AND crn = NEW.crn;
+END;
+
+CREATE TRIGGER trg_ocm_section_delete AFTER DELETE ON section
+BEGIN
+  DELETE FROM open_classes_mat WHERE term_id = OLD.term_id AND crn = OLD.crn;
+END;
+
+-- COURSE (title/units/prereqs are copied into every section row)
+CREATE TRIGGER trg_ocm_course_update AFTER UPDATE ON course
+BEGIN
+  DELETE FROM open_classes_mat WHERE course_id IN (OLD.course_id, NEW.course_id);
+
+  INSERT INTO open_classes_mat
+  SELECT * FROM open_classes_src
+  WHERE course_id = NEW.course_id;
+END;
+
+-- TERM
+CREATE TRIGGER trg_ocm_term_update AFTER UPDATE ON term
+BEGIN
+  UPDATE open_classes_mat SET term_id = NEW.term_id, term = NEW.term, term_uc = UPPER(NEW.term)
+  WHERE term_id = OLD.term_id;
+END;
+
+CREATE TRIGGER trg_ocm_term_delete AFTER DELETE ON term
+BEGIN
+  DELETE FROM open_classes_mat WHERE term_id = OLD.term_id;
+END;
+
+-- SECTION FACTS
+-- Per section: 7-bit day mask (bit 0 = Monday), earliest start / latest end
+-- of the scheduled meetings, and modality flags. Days/modality filters
+-- become integer tests on one row per section.
+CREATE VIEW section_facts_src AS
+SELECT
+  term_id,
+  crn,
+  term,
+  MAX(term_uc)                                          AS term_uc,
+  MAX(subject_uc)                                       AS subject_uc,
+  MAX(course_id_uc)                                     AS course_id_uc,
+  MAX(is_open)                                          AS is_open,
+  SUM(DISTINCT day_bit)                                 AS day_mask,
+  MIN(CASE WHEN day_bit > 0 THEN start_min END)         AS first_start,
+  MAX(CASE WHEN day_bit > 0 THEN end_min END)           AS last_end,
+  MAX(is_online)                                        AS is_online,
+  MAX(is_in_person)                                     AS is_in_person,
+  MAX(day_of_week = -1)                                 AS is_tba
+FROM open_classes_mat
+GROUP BY term_id, crn;
+
+CREATE TABLE section_facts (
+  term_id      INTEGER NOT NULL,
+  crn          TEXT    NOT NULL,
+  term         TEXT    NOT NULL,
+  term_uc      TEXT,
+  subject_uc   TEXT,
+  course_id_uc TEXT,
+  is_open      INTEGER NOT NULL,
+  day_mask     INTEGER NOT NULL,
+  first_start  INTEGER,
+  last_end     INTEGER,
+  is_online    INTEGER NOT NULL,
+  is_in_person INTEGER NOT NULL,
+  is_tba       INTEGER NOT NULL,
+  PRIMARY KEY (term_id, crn)
+);
+
+CREATE INDEX idx_facts_subject_course ON section_facts(subject_uc, course_id_uc);
+CREATE INDEX idx_facts_term_uc        ON section_facts(term_uc);
+CREATE INDEX idx_facts_crn            ON section_facts(crn);
+
+CREATE TRIGGER trg_facts_mat_insert AFTER INSERT ON open_classes_mat
+BEGIN
+  DELETE FROM section_facts WHERE term_id = NEW.term_id AND crn = NEW.crn;
+
+  INSERT INTO section_facts
+  SELECT * FROM section_facts_src WHERE term_id = NEW.term_id AND crn = NEW.crn;
+END;
+
+CREATE TRIGGER trg_facts_mat_update AFTER UPDATE ON open_classes_mat
+BEGIN
+  DELETE FROM section_facts WHERE term_id = OLD.term_id AND crn = OLD.crn;
+  DELETE FROM section_facts WHERE term_id = NEW.term_id AND crn = NEW.crn;
+
+  INSERT INTO section_facts
+  SELECT * FROM section_facts_src WHERE term_id = OLD.term_id AND crn = OLD.crn;
+
+  INSERT INTO section_facts
+  SELECT * FROM section_facts_src WHERE term_id = NEW.term_id AND crn = NEW.crn
+  AND NOT (NEW.term_id = OLD.term_id AND NEW.crn = OLD.crn);
+END;
+
+CREATE TRIGGER trg_facts_mat_delete AFTER DELETE ON open_classes_mat
+BEGIN
+  DELETE FROM section_facts WHERE term_id = OLD.term_id AND crn = OLD.crn;
+
+  INSERT INTO section_facts
+  SELECT * FROM section_facts_src WHERE term_id = OLD.term_id AND crn = OLD.crn;
+END;
@@ -112,3 +112,6 @@ CREATE INDEX IF NOT EXISTS idx_section_term   ON section(term_id);
 CREATE INDEX IF NOT EXISTS idx_section_course ON section(course_id);
 CREATE INDEX IF NOT EXISTS idx_meeting_crn    ON meeting(crn);
 CREATE INDEX IF NOT EXISTS idx_meeting_time   ON meeting(day_of_week, start_min);
+
+-- Optional materialized copy of open_classes with triggers and covering
+-- indexes lives in open_classes_mat.sql (applied by the API at startup).
@@ -0,0 +1,53 @@
+-- section_digest.sql
+-- Content digest per section for delta ingest (/open/upload): SHA-1 over the
+-- section fields plus its meetings ordered by day, as computed by
+-- services/csv_scraper_service.py. The ingest compares incoming rows
+-- against it to skip unchanged sections. Any other write to a section or
+-- its meetings drops the stored digest, and the next ingest recomputes it
+-- from the tables. Applied at startup by crud/section_digest_crud.py.
+
+CREATE TABLE IF NOT EXISTS section_digest (
+  term_id INTEGER NOT NULL,
+  crn     TEXT    NOT NULL,
+  digest  TEXT    NOT NULL,
+  PRIMARY KEY (term_id, crn)
+) WITHOUT ROWID;
+
+DROP TRIGGER IF EXISTS trg_digest_section_insert;
+DROP TRIGGER IF EXISTS trg_digest_section_update;
+DROP TRIGGER IF EXISTS trg_digest_section_delete;
+DROP TRIGGER IF EXISTS trg_digest_meeting_insert;
+DROP TRIGGER IF EXISTS trg_digest_meeting_update;
+DROP TRIGGER IF EXISTS trg_digest_meeting_delete;
+
+CREATE TRIGGER trg_digest_section_insert AFTER INSERT ON section
+BEGIN
+  DELETE FROM section_digest WHERE term_id = NEW.term_id AND crn = NEW.crn;
+END;
+
+CREATE TRIGGER trg_digest_section_update AFTER UPDATE ON section
+BEGIN
+  DELETE FROM section_digest WHERE term_id = OLD.term_id AND crn = OLD.crn;
+  DELETE FROM section_digest WHERE term_id = NEW.term_id AND crn = NEW.crn;
+END;
+
+CREATE TRIGGER trg_digest_section_delete AFTER DELETE ON section
+BEGIN
+  DELETE FROM section_digest WHERE term_id = OLD.term_id AND crn = OLD.crn;
+END;
+
+CREATE TRIGGER trg_digest_meeting_insert AFTER INSERT ON meeting
+BEGIN
+  DELETE FROM section_digest WHERE term_id = NEW.term_id AND crn = NEW.crn;
+END;
+
+CREATE TRIGGER trg_digest_meeting_update AFTER UPDATE ON meeting
+BEGIN
+  DELETE FROM section_digest WHERE term_id = OLD.term_id AND crn = OLD.crn;
+  DELETE FROM section_digest WHERE term_id = NEW.term_id AND crn = NEW.crn;
+END;
+
+CREATE TRIGGER trg_digest_meeting_delete AFTER DELETE ON meeting
+BEGIN
+  DELETE FROM section_digest WHERE term_id = OLD.term_id AND crn = OLD.crn;
+END;
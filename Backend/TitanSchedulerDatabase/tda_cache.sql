@@ -0,0 +1,21 @@
+-- tda_cache.sql
+-- Parsed Titan Degree Audits (POST /tda/upload), keyed by the SHA-256 of
+-- the PDF bytes plus the parser version (model + prompt), so re-uploading
+-- the same audit skips the OpenAI call. Lives in its own file
+-- (tda_cache.db, TITAN_TDA_CACHE_PATH): entries are per student and the
+-- writes should not queue behind catalog ingests. Expiry and LRU eviction
+-- are done by crud/tda_cache_crud.py, which applies this at startup.
+
+CREATE TABLE IF NOT EXISTS tda_cache (
+  pdf_sha256   TEXT    NOT NULL,
+  version      TEXT    NOT NULL,   -- parser version (services/tda_cache_service.py)
+  result       TEXT    NOT NULL,   -- JSON returned by parse_tda
+  size_bytes   INTEGER NOT NULL,
+  created_at   REAL    NOT NULL,
+  last_used_at REAL    NOT NULL,
+  hits         INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (pdf_sha256, version)
+);
+
+CREATE INDEX IF NOT EXISTS idx_tda_cache_last_used ON tda_cache(last_used_at);
+CREATE INDEX IF NOT EXISTS idx_tda_cache_created ON tda_cache(created_at);
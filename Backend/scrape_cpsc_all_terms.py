@@ -24,6 +24,8 @@ CLASS_SEARCH_URL = (
 SUBJECT_VISIBLE_TEXT = "Computer Science"
 OUTPUT_CSV = "csuf_cpsc_all_terms_sections.csv"
 UPLOAD_URL = "http://127.0.0.1:8000/open/upload"
+JOBS_URL = "http://127.0.0.1:8000/ingest/jobs"
+JOB_MAX_WAIT_SECONDS = 30 * 60  # stop polling an ingest job after this long
 
 # Day mapping for your schema
 DAY_MAP = {"M": 1, "T": 2, "W": 3, "R": 4, "F": 5, "S": 6, "U": 7}
@@ -368,12 +370,32 @@ def upload_csv(filepath: str):
     print(f"\n🌐 Uploading {filepath} ...")
     with open(filepath, "rb") as f:
         files = {"file": (os.path.basename(filepath), f, "text/csv")}
-        resp = requests.post(UPLOAD_URL, files=files)
+        # The file covers whole terms of the subject, so sections it no longer lists are dropped;
+        # its terms are checked in parallel on the server
+        resp = requests.post(UPLOAD_URL, files=files, params={"prune": "true", "parallel": "true"})
     print(f"→ Upload status: {resp.status_code}")
-    try:
+    if resp.status_code != 202:
         print(resp.text)
-    except Exception:
-        pass
+        return
+
+    # The backend ingests in the background; poll the job until it finishes
+    job_id = resp.json()["job_id"]
+    deadline = time.time() + JOB_MAX_WAIT_SECONDS
+    while True:
+        resp = requests.get(f"{JOBS_URL}/{job_id}")
+        resp.raise_for_status()
+        job = resp.json()
+        print(f"  → {job['state']} / {job['stage']}: {job['rows_processed']} rows")
+        if job["state"] in ("done", "error"):
+            break
+        if time.time() > deadline:
+            print(f"→ Gave up waiting on job {job_id} after {JOB_MAX_WAIT_SECONDS}s; check {JOBS_URL}/{job_id}")
+            return
+        time.sleep(1)
+    result = job["result"] or {}
+    print(f"→ Ingest {job['state']}: {result.get('delta')}")
+    for err in job["errors"] or []:
+        print("   ", err)
 
 
 def main():
@@ -66,6 +66,7 @@ function showLoadingOverlay() {
   spinner.style.animation = 'spin 1s linear infinite';
   
   const text = document.createElement('p');
+  text.id = 'loading-overlay-text';
   text.textContent = 'Generating your schedule...';
   text.style.color = 'white';
   text.style.fontSize = '18px';
@@ -84,6 +85,127 @@ function hideLoadingOverlay() {
   }
 }
 
+function setLoadingText(message) {
+  const text = document.getElementById('loading-overlay-text');
+  if (text) {
+    text.textContent = message;
+  }
+}
+
+// ================= TDA UPLOAD (STREAMED) =================
+// POST /tda/upload/stream answers with server-sent events: stage updates,
+// then the open sections of each course as soon as the course is known.
+// Resolves with all eligible classes once the "done" event arrives.
+async function uploadTdaStream(file) {
+  const formData = new FormData();
+  formData.append('file', file);
+
+  const response = await fetch(`${API_BASE_URL}/tda/upload/stream`, {
+    method: 'POST',
+    body: formData
+  });
+  console.log('Upload response status:', response.status);
+
+  if (!response.ok) {
+    let errorMessage = 'Failed to upload and parse PDF';
+    const errorText = await response.text();
+    try {
+      const errorData = JSON.parse(errorText);
+      errorMessage = errorData.detail || errorData.message || errorMessage;
+      console.error('Upload error details:', errorData);
+    } catch (e) {
+      console.error('Upload error text:', errorText);
+      errorMessage = `HTTP ${response.status}: ${errorText}`;
+    }
+    throw new Error(errorMessage);
+  }
+
+  const eligibleClasses = [];
+  let coursesSeen = 0;
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) {
+      break;
+    }
+    buffer += decoder.decode(value, { stream: true });
+
+    // events are separated by a blank line
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let eventName = 'message';
+      let data = '';
+      for (const line of block.split('\n')) {
+        if (line.startsWith('event:')) {
+          eventName = line.slice(6).trim();
+        } else if (line.startsWith('data:')) {
+          data += line.slice(5).trim();
+        }
+      }
+      if (!data) {
+        continue; // keep-alive comment
+      }
+      const payload = JSON.parse(data);
+
+      if (eventName === 'received') {
+        setLoadingText('Reading your degree audit...');
+      } else if (eventName === 'text_extracted') {
+        setLoadingText('Finding the courses you still need...');
+      } else if (eventName === 'sections') {
+        coursesSeen += 1;
+        eligibleClasses.push(...payload.sections);
+        setLoadingText(`Found ${coursesSeen} courses, ${eligibleClasses.length} open sections...`);
+      } else if (eventName === 'courses_identified') {
+        console.log(`${payload.count} courses identified (${payload.source})`);
+      } else if (eventName === 'error') {
+        const detail = Array.isArray(payload.detail) ? payload.detail.join('; ') : payload.detail;
+        throw new Error(detail || 'Failed to parse PDF');
+      } else if (eventName === 'done') {
+        console.log(`Received ${payload.total_classes} open classes for ${payload.courses} courses in ${payload.elapsed_ms} ms`);
+        return eligibleClasses;
+      }
+    }
+  }
+  throw new Error('Upload stream ended before the audit was parsed');
+}
+
+// ================= SCHEDULE SEARCH (SERVER) =================
+// POST /schedule/enumerate searches every conflict-free combination of the
+// eligible courses' sections and scores them with the preferences. The
+// checked days and times are sent as hard constraints, as the local planner
+// filters by them: sections outside them are dropped before the search.
+// Resolves with the best schedule in the shape generateScheduleFromClasses
+// returns, or null when the server found none.
+async function enumerateSchedules(eligibleClasses, preferences) {
+  const courses = [...new Set(eligibleClasses.map(c => c.course_id || `${c.subject} ${c.number}`))];
+  const response = await fetch(`${API_BASE_URL}/schedule/enumerate`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({
+      courses: courses,
+      max_units: preferences.preferredUnits || 15,
+      preferred_days: preferences.preferredDays || [],
+      preferred_times_by_day: preferences.preferredTimesByDay || {},
+      hard_preferences: true
+    })
+  });
+  if (!response.ok) {
+    throw new Error(`HTTP ${response.status}: ${await response.text()}`);
+  }
+  const data = (await response.json()).data;
+  console.log('Schedule search:', data.search, `${data.schedules.length} schedules`);
+  if (!data.schedules.length) {
+    return null;
+  }
+  return { ...data.schedules[0], remaining_needed: data.remaining_needed };
+}
+
 // ================= PREFERENCES DATA STORAGE =================
 const preferences = {
   preferredDays: ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat'],
@@ -284,48 +406,23 @@ async function initializeGenerateButton() {
           throw new Error(`Cannot reach backend server at ${API_BASE_URL}. Please check if the server is running.`);
         }
         
-        // Step 1: Upload and parse the PDF
+        // Step 1: Upload and parse the PDF; the overlay follows the stream's progress
         console.log('Step 1: Uploading PDF...');
-        const formData = new FormData();
-        formData.append('file', preferences.uploadedFile);
-        
-        const uploadResponse = await fetch(`${API_BASE_URL}/tda/upload`, {
-          method: 'POST',
-          body: formData
-        });
-        
-        console.log('Upload response status:', uploadResponse.status);
-        
-        if (!uploadResponse.ok) {
-          let errorMessage = 'Failed to upload and parse PDF';
-          try {
-            const errorData = await uploadResponse.json();
-            errorMessage = errorData.detail || errorData.message || errorMessage;
-            console.error('Upload error details:', errorData);
-          } catch (e) {
-            const errorText = await uploadResponse.text();
-            console.error('Upload error text:', errorText);
-            errorMessage = `HTTP ${uploadResponse.status}: ${errorText}`;
-          }
-          throw new Error(errorMessage);
-        }
-        
-        const uploadData = await uploadResponse.json();
-        console.log('Upload response data:', uploadData);
-        
-        // Backend returns only open classes in format: { "Open Classes:": { "eligible_classes": [...] } }
-        const openClassesData = uploadData["Open Classes:"];
-        
-        if (!openClassesData || !openClassesData.eligible_classes) {
-          throw new Error('No open classes received from server');
-        }
-        
-        const eligibleClasses = openClassesData.eligible_classes || [];
+        const eligibleClasses = await uploadTdaStream(preferences.uploadedFile);
         console.log(`Received ${eligibleClasses.length} eligible open classes`);
         
         // Step 2: Generate schedule from eligible classes with filters
         console.log('Step 2: Generating schedule with filters...');
-        const generatedSchedule = generateScheduleFromClasses(eligibleClasses, preferences);
+        setLoadingText('Generating your schedule...');
+        let generatedSchedule = null;
+        try {
+          generatedSchedule = await enumerateSchedules(eligibleClasses, preferences);
+        } catch (searchError) {
+          console.warn('Server schedule search failed, using the local planner:', searchError);
+        }
+        if (!generatedSchedule) {
+          generatedSchedule = generateScheduleFromClasses(eligibleClasses, preferences);
+        }
         console.log('Generated schedule:', generatedSchedule);
         
         // Step 3: Display the generated schedule and remaining open classes
@@ -1214,40 +1311,25 @@ function createClassCard(classItem) {
 
 async function fetchAndDisplayOpenClasses(remainingNeeded, openClassesPanel) {
   try {
-    // Fetch open classes for each remaining needed course
-    const openClassesPromises = remainingNeeded.map(async (courseId) => {
-      // Extract subject and number from courseId (e.g., "CPSC 131" -> subject="CPSC", course="131")
-      const parts = courseId.trim().split(/\s+/);
-      if (parts.length < 2) return [];
-      
-      const subject = parts[0];
-      const course = parts.slice(1).join(' ');
-      
-      try {
-        const response = await fetch(`${API_BASE_URL}/open/query?subject=${encodeURIComponent(subject)}&course=${encodeURIComponent(course)}&only_open=true`);
-        if (!response.ok) {
-          console.warn(`Failed to fetch open classes for ${courseId}`);
-          return [];
-        }
+    // Fetch open classes for every remaining needed course in one request
+    let allOpenClasses = [];
+    try {
+      const response = await fetch(`${API_BASE_URL}/open/query/batch`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ courses: remainingNeeded, only_open: true })
+      });
+      if (response.ok) {
+        // { "CPSC 131": [...], "MATH 150A": [...] }
         const data = await response.json();
-        
-        // Handle new API format: { "Open Classes:": { "eligible_classes": [...] } }
-        let classes = [];
-        if (data && data["Open Classes:"] && data["Open Classes:"].eligible_classes) {
-          classes = data["Open Classes:"].eligible_classes;
-        } else if (Array.isArray(data)) {
-          // Fallback to old format if needed
-          classes = data;
-        }
-        
-        return classes;
-      } catch (error) {
-        console.error(`Error fetching open classes for ${courseId}:`, error);
-        return [];
+        allOpenClasses = remainingNeeded.map(courseId => data[courseId] || []);
+      } else {
+        console.warn('Failed to fetch open classes for remaining courses');
       }
-    });
+    } catch (error) {
+      console.error('Error fetching open classes:', error);
+    }
     
-    const allOpenClasses = await Promise.all(openClassesPromises);
     const flattenedClasses = allOpenClasses.flat();
     
     if (flattenedClasses.length === 0) {